@@ -0,0 +1,182 @@
+# ============================================================================
+# AGENDADOR DE REQUISIÇÕES - LIMITE DE TAXA DA BRAPI.DEV
+# ============================================================================
+#
+# Balde de fichas: cabem até `rajada` fichas e entram `taxa` por segundo;
+# cada requisição gasta uma. Sem ficha, o pedido espera numa fila limitada
+# ordenada por prioridade (comandos antes do pré-aquecimento e das
+# revalidações) e, dentro da mesma prioridade, por ordem de chegada.
+#
+# Todo pedido tem prazo: se não conseguir ficha a tempo, se a fila estiver
+# cheia de pedidos tão ou mais prioritários, ou se for tirado da fila por um
+# mais prioritário, recebe LimiteDeTaxa em vez de esperar para sempre.
+#
+# Um HTTP 429 pausa o balde inteiro pelo Retry-After da resposta ou, sem
+# ele, por um backoff exponencial (2, 4, 8... até BACKOFF_MAXIMO segundos).
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_FUNDO = 1
+
+BACKOFF_INICIAL = 2
+BACKOFF_MAXIMO = 60
+
+
+class LimiteDeTaxa(Exception):
+    """A requisição não foi feita por causa do limite de taxa da API"""
+
+    def __init__(self, espera=None):
+        self.espera = espera  # Segundos até valer a pena tentar de novo (se conhecido)
+        super().__init__(f'Limite de requisições atingido (tente em {espera:.0f}s)' if espera else
+                         'Limite de requisições atingido')
+
+
+def ler_retry_after(valor):
+    """Segundos de um cabeçalho Retry-After (número ou data HTTP), ou None"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(valor) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AgendadorRequisicoes:
+    """Balde de fichas com fila por prioridade, prazos e pausa após 429"""
+
+    def __init__(self, taxa=1.0, rajada=5, tamanho_fila=100, relogio=time.monotonic):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.tamanho_fila = tamanho_fila
+        self.relogio = relogio
+
+        self._fichas = float(rajada)
+        self._atualizado = relogio()
+        self._pausado_ate = 0.0
+        self._backoff = 0
+
+        # Fila e despachante pertencem ao event loop em que foram criados
+        self._fila = []  # heap de (prioridade, ordem, future)
+        self._ordem = itertools.count()
+        self._despachante = None
+        self._loop = None
+
+        self.liberadas = 0
+        self.recusadas = 0     # Fila cheia ou tirada da fila por pedido mais prioritário
+        self.expiradas = 0     # Prazo acabou esperando ficha
+        self.limitadas = 0     # Respostas 429
+
+    # ===== FICHAS =====
+    def _repor(self):
+        agora = self.relogio()
+        self._fichas = min(self.rajada, self._fichas + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+        return agora
+
+    def _espera_ficha(self):
+        """Segundos até poder liberar um pedido (0 = agora)"""
+        agora = self._repor()
+        if agora < self._pausado_ate:
+            return self._pausado_ate - agora
+        if self._fichas >= 1:
+            return 0.0
+        return (1 - self._fichas) / self.taxa
+
+    # ===== PEDIDOS =====
+    async def vaga(self, prioridade=PRIORIDADE_INTERATIVA, prazo=10.0):
+        """Esperar uma ficha por até `prazo` segundos; LimiteDeTaxa se não der"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._fila, self._despachante, self._loop = [], None, loop
+
+        if not self._fila and self._espera_ficha() == 0:
+            self._fichas -= 1
+            self.liberadas += 1
+            return
+
+        espera = self._espera_ficha()
+        if espera > prazo:
+            # Nem com a fila vazia daria tempo (ex: pausado pelo Retry-After)
+            self.expiradas += 1
+            raise LimiteDeTaxa(espera)
+
+        self._fila = [item for item in self._fila if not item[2].done()]
+        heapq.heapify(self._fila)
+        if len(self._fila) >= self.tamanho_fila:
+            pior = max(self._fila)
+            if pior[0] <= prioridade:
+                self.recusadas += 1
+                raise LimiteDeTaxa(espera)
+            self._fila.remove(pior)
+            heapq.heapify(self._fila)
+            self.recusadas += 1
+            pior[2].set_exception(LimiteDeTaxa(espera))
+
+        pedido = loop.create_future()
+        heapq.heappush(self._fila, (prioridade, next(self._ordem), pedido))
+        if self._despachante is None or self._despachante.done():
+            self._despachante = loop.create_task(self._despachar())
+
+        try:
+            await asyncio.wait_for(asyncio.shield(pedido), prazo)
+        except asyncio.TimeoutError:
+            if not pedido.done():
+                pedido.cancel()  # O despachante pula pedidos já resolvidos
+                self.expiradas += 1
+                raise LimiteDeTaxa(self._espera_ficha()) from None
+            # A ficha chegou junto com o prazo: conta como liberado
+        finally:
+            # Pedido desistido (comando cancelado): não deixar a ficha presa
+            if not pedido.done():
+                pedido.cancel()
+        pedido.result()
+
+    async def _despachar(self):
+        """Liberar os pedidos da fila, o mais prioritário primeiro, conforme entram fichas"""
+        while self._fila:
+            espera = self._espera_ficha()
+            if espera > 0:
+                await asyncio.sleep(espera)
+                continue
+            _, _, pedido = heapq.heappop(self._fila)
+            if pedido.done():
+                continue  # Prazo vencido ou tirado da fila
+            self._fichas -= 1
+            self.liberadas += 1
+            pedido.set_result(None)
+
+    # ===== RESPOSTAS =====
+    def limitado(self, retry_after=None):
+        """Registrar um 429: pausar o balde e devolver quantos segundos esperar"""
+        self.limitadas += 1
+        if retry_after is None:
+            self._backoff = min(BACKOFF_MAXIMO, self._backoff * 2 if self._backoff else BACKOFF_INICIAL)
+            retry_after = self._backoff
+        self._pausado_ate = max(self._pausado_ate, self.relogio() + retry_after)
+        self._fichas = 0.0
+        return retry_after
+
+    def sucesso(self):
+        self._backoff = 0
+
+    def estatisticas(self):
+        self._repor()
+        return {
+            'fichas': round(self._fichas, 2),
+            'na_fila': sum(1 for item in self._fila if not item[2].done()),
+            'pausado_por': max(0.0, self._pausado_ate - self.relogio()),
+            'liberadas': self.liberadas,
+            'recusadas': self.recusadas,
+            'expiradas': self.expiradas,
+            'limitadas': self.limitadas
+        }
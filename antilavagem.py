@@ -0,0 +1,156 @@
+# ============================================================================
+# ANTI-LAVAGEM - DETECTOR INCREMENTAL DE PIX SUSPEITOS
+# ============================================================================
+#
+# Cada PIX registrado alimenta o detector uma única vez. Por remetente ficam
+# janelas deslizantes (ex: última 1h e últimas 24h) com quantidade e volume;
+# eventos antigos saem pela esquerda da deque, então o custo por PIX é O(1)
+# amortizado. Alertas são gerados no momento em que um limite é cruzado e o
+# comando de admin só lê o que já está calculado.
+#
+# As contagens dos candidatos ao top só caem com o tempo, então são
+# descontadas antes de qualquer comparação com um remetente novo. De hora em
+# hora (no relógio dos PIX) uma varredura apaga quem não tem mais eventos em
+# nenhuma janela e remonta o top a partir das janelas vivas.
+
+import heapq
+from collections import deque
+
+from transacoes_colunares import para_timestamp
+
+# nome da janela -> (duração em segundos, limite de quantidade, limite de volume)
+JANELAS_PADRAO = {
+    '1h': (3600, 10, 50000.00),
+    '24h': (86400, 20, 200000.00),
+}
+LIMITE_ALTO_VALOR = 10000.00
+TAMANHO_TOP = 20        # Quantos remetentes mais ativos acompanhar
+MAXIMO_ALERTAS = 200    # Alertas e PIX de alto valor mais recentes guardados
+INTERVALO_LIMPEZA = 3600  # Segundos entre varreduras das janelas vazias
+
+
+class _Janela:
+    __slots__ = ('eventos', 'quantidade', 'volume')
+
+    def __init__(self):
+        self.eventos = deque()  # (timestamp em segundos, valor)
+        self.quantidade = 0
+        self.volume = 0.0
+
+    def avancar(self, agora, duracao):
+        """Descartar eventos que saíram da janela"""
+        eventos = self.eventos
+        while eventos and eventos[0][0] <= agora - duracao:
+            _, valor = eventos.popleft()
+            self.quantidade -= 1
+            self.volume -= valor
+
+
+class DetectorPix:
+    """Janelas deslizantes por remetente, alertas e top-k de remetentes ativos"""
+
+    def __init__(self, janelas=None, limite_alto_valor=LIMITE_ALTO_VALOR, tamanho_top=TAMANHO_TOP):
+        self.janelas = janelas or JANELAS_PADRAO
+        self.limite_alto_valor = limite_alto_valor
+        self.tamanho_top = tamanho_top
+        # A maior janela define o "mais ativo"
+        self.janela_top = max(self.janelas, key=lambda nome: self.janelas[nome][0])
+
+        self._por_usuario = {}  # user_id -> {nome da janela: _Janela}
+        self._top = {}          # user_id -> quantidade na janela_top (candidatos)
+        self.alertas = deque(maxlen=MAXIMO_ALERTAS)
+        self.alto_valor = deque(maxlen=MAXIMO_ALERTAS)
+        self._proxima_limpeza = None
+
+    @staticmethod
+    def _segundos(data):
+        return para_timestamp(data) / 1_000_000
+
+    def registrar(self, transacao_pix):
+        """Processar um PIX e gerar alertas (O(1) amortizado)"""
+        user_id = transacao_pix['remetente_id']
+        valor = transacao_pix['valor_bruto']
+        agora = self._segundos(transacao_pix['data'])
+
+        if valor >= self.limite_alto_valor:
+            self.alto_valor.append(transacao_pix)
+
+        janelas = self._por_usuario.get(user_id)
+        if janelas is None:
+            janelas = self._por_usuario[user_id] = {nome: _Janela() for nome in self.janelas}
+
+        for nome, (duracao, limite_quantidade, limite_volume) in self.janelas.items():
+            janela = janelas[nome]
+            janela.avancar(agora, duracao)
+            volume_anterior = janela.volume
+            janela.eventos.append((agora, valor))
+            janela.quantidade += 1
+            janela.volume += valor
+
+            # Alertar só na transação que cruza o limite
+            if janela.quantidade == limite_quantidade + 1:
+                self._alertar(user_id, 'quantidade', nome, janela.quantidade, transacao_pix['data'])
+            if volume_anterior <= limite_volume < janela.volume:
+                self._alertar(user_id, 'volume', nome, janela.volume, transacao_pix['data'])
+
+        self._atualizar_top(user_id, janelas[self.janela_top].quantidade, agora)
+        if self._proxima_limpeza is None or agora >= self._proxima_limpeza:
+            self._limpar(agora)
+
+    def _alertar(self, user_id, tipo, janela, valor, data):
+        self.alertas.append({'user_id': user_id, 'tipo': tipo, 'janela': janela, 'valor': valor, 'data': data})
+
+    def _atualizar_top(self, user_id, quantidade, instante):
+        """Manter no máximo `tamanho_top` candidatos (custo limitado por tamanho_top)"""
+        if user_id not in self._top and len(self._top) >= self.tamanho_top:
+            # Comparar com as contagens atuais, não com as da última vez que cada um enviou
+            self._expirar_top(instante)
+        if user_id in self._top or len(self._top) < self.tamanho_top:
+            self._top[user_id] = quantidade
+            return
+        menor = min(self._top, key=self._top.get)
+        if quantidade > self._top[menor]:
+            del self._top[menor]
+            self._top[user_id] = quantidade
+
+    def _expirar_top(self, instante):
+        """Descontar dos candidatos os eventos expirados e tirar quem zerou"""
+        duracao = self.janelas[self.janela_top][0]
+        for user_id in list(self._top):
+            janela = self._por_usuario[user_id][self.janela_top]
+            janela.avancar(instante, duracao)
+            if janela.quantidade:
+                self._top[user_id] = janela.quantidade
+            else:
+                del self._top[user_id]
+
+    def _limpar(self, instante):
+        """Apagar remetentes sem eventos e remontar o top a partir das janelas vivas"""
+        # A maior janela contém as outras: vazia nela, vazia em todas
+        duracao = self.janelas[self.janela_top][0]
+        for user_id in list(self._por_usuario):
+            janela = self._por_usuario[user_id][self.janela_top]
+            janela.avancar(instante, duracao)
+            if not janela.quantidade:
+                del self._por_usuario[user_id]
+
+        contagens = ((janelas[self.janela_top].quantidade, user_id) for user_id, janelas in self._por_usuario.items())
+        self._top = {user_id: quantidade for quantidade, user_id in heapq.nlargest(self.tamanho_top, contagens)}
+        self._proxima_limpeza = instante + INTERVALO_LIMPEZA
+
+    def mais_ativos(self, agora, quantidade_minima=0):
+        """Remetentes mais ativos na maior janela, já descontando eventos expirados"""
+        instante = self._segundos(agora)
+        self._expirar_top(instante)
+        if len(self._top) < self.tamanho_top:
+            # Vagas abertas por quem expirou podem ser de remetentes que ficaram fora do top
+            self._limpar(instante)
+
+        ativos = []
+        for user_id, quantidade in self._top.items():
+            if quantidade > quantidade_minima:
+                janela = self._por_usuario[user_id][self.janela_top]
+                ativos.append({'_id': user_id, 'total': quantidade, 'valor_total': janela.volume})
+
+        ativos.sort(key=lambda item: item['total'], reverse=True)
+        return ativos
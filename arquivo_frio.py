@@ -0,0 +1,154 @@
+# ============================================================================
+# ARQUIVO FRIO - SEGMENTOS COMPRIMIDOS E IMUTÁVEIS PARA HISTÓRICO ANTIGO
+# ============================================================================
+#
+# Registros antigos (transações, PIX) saem da memória e vão para arquivos
+# de segmento: uma lista de dicts em ordem cronológica, pickle + zlib,
+# gravada uma vez e nunca alterada. Um índice esparso (JSON) guarda por
+# segmento só o intervalo de datas, a quantidade, os grupos (ex: servidor_id)
+# e um filtro de Bloom das chaves (ex: user_id). Consultas pulam os segmentos
+# que não podem conter o que procuram e descomprimem os demais sob demanda.
+#
+# Layout do diretório:
+#   pix-00000003.seg         registros do segmento 3
+#   pix-indice.json          segmentos + corte (tudo antes dele está no frio)
+
+import json
+import os
+import pickle
+import zlib
+
+from transacoes_colunares import para_datetime, para_timestamp
+
+# O filtro tem ~16 bits por chave distinta (falso positivo < 0,5%), entre 256 bits e 8 KB
+BITS_POR_CHAVE = 16
+BITS_FILTRO_MIN = 1 << 8
+BITS_FILTRO_MAX = 1 << 16
+MULTIPLICADORES_FILTRO = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+def _posicoes_filtro(chave, bits):
+    return [((chave * multiplicador) >> 17) % bits for multiplicador in MULTIPLICADORES_FILTRO]
+
+
+class ArquivoFrio:
+    """Segmentos imutáveis de um tipo de registro com índice esparso"""
+
+    def __init__(self, diretorio, nome, chaves=None, grupo=None):
+        self.diretorio = diretorio
+        self.nome = nome
+        self.chaves = chaves  # registro -> inteiros indexados no filtro de Bloom
+        self.grupo = grupo    # registro -> valor pequeno e repetitivo (ex: servidor_id)
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho_indice = os.path.join(diretorio, f'{nome}-indice.json')
+        self.segmentos = []
+        self._filtros = {}  # numero do segmento -> filtro já convertido para int
+        self.corte = None  # timestamp (µs): registros anteriores já estão no frio
+        if os.path.exists(self.caminho_indice):
+            with open(self.caminho_indice) as f:
+                dados = json.load(f)
+            self.segmentos = dados['segmentos']
+            self.corte = dados['corte']
+
+    def __len__(self):
+        return sum(segmento['quantidade'] for segmento in self.segmentos)
+
+    @property
+    def data_corte(self):
+        return None if self.corte is None else para_datetime(self.corte)
+
+    # ===== ESCRITA =====
+    def gravar(self, registros, corte, tamanho_segmento=50_000):
+        """Gravar registros (ordem cronológica) e avançar o corte"""
+        for inicio in range(0, len(registros), tamanho_segmento):
+            self._gravar_segmento(registros[inicio:inicio + tamanho_segmento])
+        self.corte = para_timestamp(corte)
+        self._salvar_indice()
+
+    def _gravar_segmento(self, registros):
+        numero = self.segmentos[-1]['numero'] + 1 if self.segmentos else 0
+        arquivo = f'{self.nome}-{numero:08d}.seg'
+        caminho = os.path.join(self.diretorio, arquivo)
+
+        dados = zlib.compress(pickle.dumps(registros, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        with open(caminho + '.tmp', 'wb') as f:
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho + '.tmp', caminho)
+
+        chaves = set()
+        grupos = set()
+        for registro in registros:
+            if self.chaves is not None:
+                chaves.update(self.chaves(registro))
+            if self.grupo is not None:
+                grupos.add(self.grupo(registro))
+
+        bits = BITS_FILTRO_MIN
+        while bits < BITS_POR_CHAVE * len(chaves) and bits < BITS_FILTRO_MAX:
+            bits <<= 1
+        filtro = 0
+        for chave in chaves:
+            for posicao in _posicoes_filtro(chave, bits):
+                filtro |= 1 << posicao
+
+        self.segmentos.append({
+            'numero': numero,
+            'arquivo': arquivo,
+            'inicio': para_timestamp(registros[0]['data']),
+            'fim': para_timestamp(registros[-1]['data']),
+            'quantidade': len(registros),
+            'grupos': sorted(grupos, key=lambda g: (g is None, g)),
+            'bits_filtro': bits,
+            'filtro': format(filtro, 'x')
+        })
+
+    def _salvar_indice(self):
+        with open(self.caminho_indice + '.tmp', 'w') as f:
+            json.dump({'corte': self.corte, 'segmentos': self.segmentos}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.caminho_indice + '.tmp', self.caminho_indice)
+
+    # ===== LEITURA =====
+    def _pode_conter(self, segmento, chave):
+        filtro = self._filtros.get(segmento['numero'])
+        if filtro is None:
+            filtro = self._filtros[segmento['numero']] = int(segmento['filtro'], 16)
+        return all(filtro >> posicao & 1 for posicao in _posicoes_filtro(chave, segmento['bits_filtro']))
+
+    def _ler(self, segmento):
+        with open(os.path.join(self.diretorio, segmento['arquivo']), 'rb') as f:
+            return pickle.loads(zlib.decompress(f.read()))
+
+    def iterar(self, inicio=None, fim=None, chave=None, grupo=None, reverso=False):
+        """Registros com data em [inicio, fim), segmento a segmento (sem carregar tudo)
+
+        `chave` e `grupo` só servem para pular segmentos; quem chama ainda
+        filtra os registros.
+        """
+        ts_inicio = None if inicio is None else para_timestamp(inicio)
+        ts_fim = None if fim is None else para_timestamp(fim)
+
+        segmentos = reversed(self.segmentos) if reverso else self.segmentos
+        for segmento in segmentos:
+            if ts_inicio is not None and segmento['fim'] < ts_inicio:
+                continue
+            if ts_fim is not None and segmento['inicio'] >= ts_fim:
+                continue
+            if chave is not None and not self._pode_conter(segmento, chave):
+                continue
+            if grupo is not None and grupo not in segmento['grupos']:
+                continue
+
+            registros = self._ler(segmento)
+            if reverso:
+                registros.reverse()
+            for registro in registros:
+                if inicio is not None and registro['data'] < inicio:
+                    continue
+                if fim is not None and registro['data'] >= fim:
+                    continue
+                yield registro
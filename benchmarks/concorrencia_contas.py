@@ -0,0 +1,58 @@
+# ============================================================================
+# BENCHMARK - COMANDOS CONCORRENTES MOVIMENTANDO CONTAS NO EVENT LOOP
+# ============================================================================
+#
+# O bot roda num único event loop e os métodos do Database não cedem o loop:
+# cada movimentar confere e aplica todas as pernas sem ninguém no meio, sem
+# lock. Aqui N comandos simultâneos fazem o ciclo de um !pix (aguardam a
+# "resposta do Discord" e transferem), primeiro entre pares de contas
+# próprios e depois todos sobre a mesma conta. A vazão cresce com N nos dois
+# casos (quem espera é o await, não o Database) e a conta disputada nunca
+# fica negativa. Rodar da raiz do repositório:
+#   python -m benchmarks.concorrencia_contas [transferencias por comando] [espera em ms]
+
+import asyncio
+import sys
+import time
+
+from database import Database, SaldoInsuficiente
+
+
+async def comando(db, origem, destino, transferencias, espera, recusas):
+    for _ in range(transferencias):
+        await asyncio.sleep(espera)  # Confirmação / ctx.send entre a consulta e o débito
+        try:
+            db.transferir(origem, destino, 1.0)
+        except SaldoInsuficiente:
+            recusas.append(origem)
+
+
+async def rodar(simultaneos, mesma_conta, transferencias, espera):
+    db = Database()
+    recusas = []
+    pares = [(0, 1) if mesma_conta else (2 * i, 2 * i + 1) for i in range(simultaneos)]
+    if mesma_conta:
+        db.definir_saldo(0, simultaneos * transferencias / 2)  # Metade do necessário: metade é recusada
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(comando(db, origem, destino, transferencias, espera, recusas)
+                           for origem, destino in pares))
+    decorrido = time.perf_counter() - inicio
+    return simultaneos * transferencias / decorrido, len(recusas), db.obter_saldo(0)
+
+
+def medir(transferencias, espera):
+    niveis = (1, 4, 16, 64, 256)
+    print('comandos simultâneos     ' + ''.join(f'{n:>9}' for n in niveis))
+    for mesma_conta in (False, True):
+        resultados = [asyncio.run(rodar(n, mesma_conta, transferencias, espera)) for n in niveis]
+        nome = 'mesma conta (op/s)' if mesma_conta else 'contas próprias (op/s)'
+        print(f'{nome:25}' + ''.join(f'{vazao:>9.0f}' for vazao, _, _ in resultados))
+        if mesma_conta:
+            print(f'{"  recusadas":25}' + ''.join(f'{recusas:>9}' for _, recusas, _ in resultados))
+            print(f'{"  saldo final":25}' + ''.join(f'{saldo:>9.2f}' for _, _, saldo in resultados))
+
+
+if __name__ == '__main__':
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+          float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.001)
@@ -0,0 +1,80 @@
+# ============================================================================
+# BENCHMARK - ESCRITA ADIADA NA FRENTE DO SQLITE
+# ============================================================================
+#
+# Roda os padrões de escrita dos comandos (cassino via movimentar, PIX e
+# daily via aplicar_lote) direto no DatabaseSQLite e através da
+# EscritaAdiada, e conta tempo por comando, commits e lotes gravados. Sem
+# write-behind, cada aplicar_lote do SQLite faz o próprio commit.
+# Rodar da raiz do repositório:
+#   python -m benchmarks.escrita_adiada [comandos] [usuarios]
+
+import os
+import sys
+import tempfile
+import time
+
+from database import Credito, Debito, Experiencia, RegistroPix
+from database_sqlite import DatabaseSQLite
+from escrita_adiada import EscritaAdiada
+
+
+def cassino(db, i, usuarios):
+    user_id = i % usuarios
+    db.movimentar([(user_id, -10.0, 'aposta', 'Slots'), (user_id, 15.0, 'premio', 'Slots')])
+
+
+def pix(db, i, usuarios):
+    remetente, destinatario = i % usuarios, (i + 1) % usuarios
+    db.aplicar_lote([
+        Debito(remetente, 10.0, 'pix_enviado', ''),
+        Credito(destinatario, 9.9, 'pix_recebido', ''),
+        RegistroPix(remetente, 'A', destinatario, 'B', 10.0, 0.1, 9.9, '', 7, 'Servidor', 8, i),
+    ])
+
+
+def daily(db, i, usuarios):
+    user_id = i % usuarios
+    db.aplicar_lote([Credito(user_id, 100.0, 'daily', 'Daily'), Experiencia(user_id, 10)])
+    db.atualizar_campos_usuario(user_id, {'streak_daily': i})
+
+
+def abrir(caminho, adiada):
+    backend = DatabaseSQLite(caminho)
+    backend.commits = 0
+    commit = backend.commit
+
+    def contar_commit():
+        backend.commits += 1
+        commit()
+    backend.commit = contar_commit
+    # Intervalo do bot (50 ms), sem a task do event loop: só grava pelo caminho da escrita
+    return (EscritaAdiada(backend, intervalo=0.05) if adiada else backend), backend
+
+
+def medir(comandos, usuarios):
+    with tempfile.TemporaryDirectory() as diretorio:
+        for cenario in (cassino, pix, daily):
+            for adiada in (False, True):
+                modo = 'adiada' if adiada else 'direto'
+                db, backend = abrir(os.path.join(diretorio, f'{cenario.__name__}_{modo}.db'), adiada)
+                for user_id in range(usuarios):
+                    backend.criar_usuario(user_id, f'User{user_id}')
+                backend.commit()
+                backend.commits = 0
+
+                inicio = time.perf_counter()
+                for i in range(comandos):
+                    cenario(db, i, usuarios)
+                decorrido = time.perf_counter() - inicio
+                lotes = db.lotes_gravados if adiada else '-'
+                db.fechar()
+
+                print(f'{cenario.__name__:8} {modo:7} '
+                      f'{decorrido / comandos * 1e6:7.1f} µs/comando | '
+                      f'{backend.commits} commits | {lotes} lotes')
+
+
+if __name__ == '__main__':
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 1_000)
@@ -0,0 +1,52 @@
+# ============================================================================
+# BENCHMARK - MEMÓRIA DOS REGISTROS DE USUÁRIO
+# ============================================================================
+#
+# Compara o dict de nove chaves que o Database guardava por usuário (com
+# 'experiencia' duplicando 'xp' e data_criacao como datetime) com o registro
+# Usuario (__slots__, data como timestamp). Mede com tracemalloc o que fica
+# alocado em {user_id: registro}, nomes incluídos nos dois casos.
+# Rodar da raiz do repositório:
+#   python -m benchmarks.memoria_usuarios [usuarios]
+
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+
+from database import Usuario
+
+
+def dict_antigo(user_id, nome):
+    return {
+        'user_id': user_id,
+        'nome': nome,
+        'saldo': 1000.00,
+        'xp': 0,
+        'experiencia': 0,
+        'nivel': 1,
+        'streak_daily': 0,
+        'data_criacao': datetime.now()
+    }
+
+
+def alocado(criar, usuarios):
+    gc.collect()
+    tracemalloc.start()
+    registros = {user_id: criar(user_id, f'User{user_id}') for user_id in range(usuarios)}
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registros
+    return atual
+
+
+def medir(usuarios):
+    antigo = alocado(dict_antigo, usuarios)
+    compacto = alocado(Usuario, usuarios)
+    print(f'{usuarios} usuários: dict {antigo / 2**20:.0f} MiB ({antigo / usuarios:.0f} B/usuário) | '
+          f'Usuario {compacto / 2**20:.0f} MiB ({compacto / usuarios:.0f} B/usuário) | '
+          f'redução de {1 - compacto / antigo:.0%}')
+
+
+if __name__ == '__main__':
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,42 @@
+# ============================================================================
+# BENCHMARK - PAUSA NO CAMINHO DA ESCRITA QUANDO O JOURNAL PEDE UM SNAPSHOT
+# ============================================================================
+#
+# Compara o tempo de serializar o estado inline (como antes) com o tempo da
+# escrita que dispara o snapshot via fork. Rodar da raiz do repositório:
+#   python -m benchmarks.snapshot_journal [usuarios]
+
+import sys
+import tempfile
+import time
+
+import snapshot_binario
+from database import Database
+from journal import Journal
+
+
+def medir(usuarios):
+    db = Database()
+    for user_id in range(usuarios):
+        db.criar_usuario(user_id, f'User{user_id}')
+        db.registrar_transacao(user_id, 'daily', 1.0)
+
+    journal = Journal(tempfile.mkdtemp(), formato_snapshot=snapshot_binario)
+    db.ativar_journal(journal)
+
+    inicio = time.perf_counter()
+    journal._serializar(db._estado())
+    inline = time.perf_counter() - inicio
+
+    journal.registros_desde_snapshot = journal.registros_por_snapshot
+    inicio = time.perf_counter()
+    db.atualizar_saldo(0, 1)  # Esta escrita dispara o snapshot
+    com_fork = time.perf_counter() - inicio
+    journal.fechar()
+
+    print(f'{usuarios} usuários: serialização inline {inline * 1000:.0f} ms | '
+          f'escrita que dispara o snapshot {com_fork * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,59 @@
+# ============================================================================
+# BENCHMARK - STARTUP A PARTIR DO SNAPSHOT BINÁRIO
+# ============================================================================
+#
+# Mede, para tamanhos diferentes de base (usuários, todos com estatísticas
+# de PIX) e de janela quente (PIX em memória), o tempo de abrir o snapshot,
+# quanto disso é o pickle da seção 'resto' e o tempo de _carregar_estado
+# (índice de PIX por usuário e replay do detector anti-lavagem).
+# Rodar da raiz do repositório:
+#   python -m benchmarks.snapshot_resto
+
+import os
+import pickle
+import tempfile
+import time
+
+import snapshot_binario
+from database import Database, EstatisticasPix
+
+CENARIOS = ((100_000, 10_000), (400_000, 10_000), (100_000, 100_000))
+
+
+def montar(usuarios, pix):
+    db = Database()
+    for user_id in range(usuarios):
+        db.criar_usuario(user_id, f'User{user_id}')
+        db._estatisticas_pix[user_id] = EstatisticasPix()  # PIX de dias já arquivados
+    for i in range(pix):
+        db.registrar_transacao_pix(i % usuarios, 'A', (i * 7919 + 1) % usuarios, 'B',
+                                   10.0, 0.1, 9.9, '', i % 50, 'Servidor', 8, i)
+    return snapshot_binario.serializar(db._estado())
+
+
+def medir():
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'snapshot.bin')
+        for usuarios, pix in CENARIOS:
+            with open(caminho, 'wb') as f:
+                f.write(montar(usuarios, pix))
+
+            inicio = time.perf_counter()
+            estado = snapshot_binario.abrir(caminho)
+            abrir = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            pickle.loads(estado['snapshot']._secoes['resto'])
+            resto = time.perf_counter() - inicio
+
+            db = Database()
+            inicio = time.perf_counter()
+            db._carregar_estado(estado)
+            carregar = time.perf_counter() - inicio
+
+            print(f'{usuarios:>7} usuários {pix:>7} PIX quentes: abrir {abrir * 1000:5.0f} ms '
+                  f'(resto {resto * 1000:4.0f} ms) | _carregar_estado {carregar * 1000:5.0f} ms')
+
+
+if __name__ == '__main__':
+    medir()
@@ -3,15 +3,30 @@
 # ============================================================================
 
 import os
+import asyncio
+import signal
+from datetime import timedelta
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+import database
+from brapi_client import brapi
+from escrita_adiada import EscritaAdiada
+from journal import Journal
+import snapshot_binario
 
 # Carregar variáveis de ambiente
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 MONGODB_URI = os.getenv('MONGODB_URI')
 BRAPI_TOKEN = os.getenv('BRAPI_TOKEN')
+DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'memoria')  # memoria | sqlite | mongo
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'economia.db')
+JOURNAL_DIR = os.getenv('JOURNAL_DIR')  # Diretório persistente (ex: volume do Railway)
+ARQUIVO_FRIO_DIR = os.getenv('ARQUIVO_FRIO_DIR')  # Histórico antigo em disco (banco em memória; o Mongo lê do próprio banco)
+JANELA_QUENTE_DIAS = int(os.getenv('JANELA_QUENTE_DIAS', '30'))
+ESCRITA_ADIADA_MS = int(os.getenv('ESCRITA_ADIADA_MS', '50'))  # 0 desativa o write-behind do SQLite
+CACHE_USUARIOS = int(os.getenv('CACHE_USUARIOS', '10000'))  # Usuários ativos mantidos em memória (SQLite)
 
 # Configuração do bot
 intents = discord.Intents.default()
@@ -40,6 +55,46 @@ async def on_ready():
                     except Exception as e:
                         print(f'✗ Erro ao carregar {folder}/{cog_name}: {e}')
 
+async def main():
+    # SIGTERM (deploy no Railway) fecha o bot normalmente para o finally gravar o que
+    # estiver pendente; o handler padrão mata o processo sem passar nem pelo atexit
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+    except NotImplementedError:
+        pass  # Windows
+    async with bot:
+        if DATABASE_BACKEND == 'mongo':
+            await database.db.conectar()
+        if ARQUIVO_FRIO_DIR and DATABASE_BACKEND != 'mongo' and isinstance(database.db, database.Database):
+            database.db.ativar_arquivo_frio(ARQUIVO_FRIO_DIR, timedelta(days=JANELA_QUENTE_DIAS))
+        if DATABASE_BACKEND == 'sqlite':
+            database.db.iniciar()
+        try:
+            await bot.start(TOKEN)
+        finally:
+            await brapi.fechar()
+            if DATABASE_BACKEND == 'mongo':
+                await database.db.fechar()
+            elif DATABASE_BACKEND == 'sqlite':
+                database.db.fechar()
+            elif database.db.journal is not None:
+                # Gravar o journal aqui mesmo, sem depender do atexit
+                database.db.journal.fechar()
+
 # Executar o bot
 if __name__ == '__main__':
-    bot.run(TOKEN)
\ No newline at end of file
+    # Escolher o backend antes de qualquer cog importar database.db
+    if DATABASE_BACKEND == 'sqlite':
+        from database_sqlite import DatabaseSQLite
+        database.db = DatabaseSQLite(SQLITE_PATH, capacidade_cache=CACHE_USUARIOS)
+        if ESCRITA_ADIADA_MS > 0:
+            database.db = EscritaAdiada(database.db, intervalo=ESCRITA_ADIADA_MS / 1000)
+    elif DATABASE_BACKEND == 'mongo':
+        from database_mongo import DatabaseMongo
+        database.db = DatabaseMongo(MONGODB_URI, janela_quente=timedelta(days=JANELA_QUENTE_DIAS))
+    elif JOURNAL_DIR:
+        # Reconstruir o estado salvo do banco em memória
+        database.db.ativar_journal(Journal(JOURNAL_DIR, formato_snapshot=snapshot_binario))
+    
+    discord.utils.setup_logging()
+    asyncio.run(main())
\ No newline at end of file
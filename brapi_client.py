@@ -1,120 +1,486 @@
 # ============================================================================
 # API B3 - INTEGRAÇÃO COM BRAPI.DEV
 # ============================================================================
+#
+# Os métodos *_async são os usados pelos cogs: rodam no event loop do bot
+# sobre uma aiohttp.ClientSession compartilhada (conexões keep-alive), com
+# timeout por requisição e no máximo `max_conexoes` requisições ao mesmo
+# tempo. Os métodos síncronos de sempre (obter_cotacao...) continuam
+# existindo para scripts: cada chamada roda o equivalente assíncrono num
+# event loop próprio, com uma sessão temporária.
+#
+# Pedidos idênticos feitos enquanto um já está em andamento (ex: vários
+# !buscar_acao PETR4 no mesmo segundo) não geram outra requisição: esperam
+# a que está no ar e recebem o mesmo resultado (single-flight). Só um
+# comando não espera uma requisição de segundo plano: faz a sua, com a
+# prioridade dele.
+#
+# Cotações ficam num CacheExpiravel limitado (LRU) com validade dada pelo
+# horário da B3 (horario_b3.validade_cotacao): curta com o pregão aberto,
+# até a próxima abertura fora dele. Vencida, a cotação ainda é servida na
+# hora e revalidada em segundo plano; ticker inexistente fica no cache como
+# None por VALIDADE_NEGATIVA.
+#
+# Com `caminho_cache` (BRAPI_CACHE_PATH) tudo que vem da API também vai para
+# um CachePersistente em disco, com validade por tipo: cotações pelo horário
+# da B3, fundamentos e setores por um dia. Depois de um reinício as chaves
+# que faltam na memória são lidas de lá antes de ir à API. A gravação não
+# acontece na resposta: as respostas de INTERVALO_CACHE_DISCO segundos vão
+# num único commit, feito numa thread.
+#
+# Toda requisição passa antes pelo AgendadorRequisicoes (limite de taxa do
+# plano gratuito): comandos têm prioridade sobre o pré-aquecimento e as
+# revalidações, e um 429 pausa tudo pelo Retry-After. Pedido que não
+# consegue vaga no prazo levanta LimiteDeTaxa; nas cotações, quem pediu
+# recebe a última cotação conhecida marcada com 'desatualizada': True.
 
+import asyncio
 import os
-import requests
+import aiohttp
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import json
+
+from agendador_requisicoes import (AgendadorRequisicoes, LimiteDeTaxa, PRIORIDADE_FUNDO,
+                                    PRIORIDADE_INTERATIVA, ler_retry_after)
+from cache_lru import CacheExpiravel
+from cache_persistente import CachePersistente
+from horario_b3 import validade_cotacao
 
 load_dotenv()
 BRAPI_TOKEN = os.getenv('BRAPI_TOKEN', '')  # Gratuito sem token
 BRAPI_URL = 'https://brapi.dev/api'
+BRAPI_CACHE_PATH = os.getenv('BRAPI_CACHE_PATH', 'brapi_cache.db')  # Vazio desativa o cache em disco
+CAPACIDADE_CACHE = 2_000
+VALIDADE_NEGATIVA = 600          # Segundos que um ticker inexistente fica sem nova consulta
+TOLERANCIA_VELHO = 6 * 60 * 60   # Segundos após a validade em que a cotação ainda é servida
+VALIDADE_FUNDAMENTOS = 24 * 60 * 60
+VALIDADE_SETORES = 24 * 60 * 60
+INTERVALO_CACHE_DISCO = 1.0      # Segundos que as respostas esperam para ir ao disco num só commit
+BRAPI_REQUISICOES_POR_MINUTO = float(os.getenv('BRAPI_REQUISICOES_POR_MINUTO', '60'))
+PRAZO_INTERATIVO = 8             # Segundos que um comando espera por vaga no limite de taxa
+PRAZO_FUNDO = 60                 # Idem para pré-aquecimento e revalidações
 
 class BrapiAPI:
-    def __init__(self, token=''):
+    def __init__(self, token='', base_url=BRAPI_URL, timeout=10, max_conexoes=8, tickers_por_requisicao=10,
+                 capacidade_cache=CAPACIDADE_CACHE, caminho_cache=None,
+                 requisicoes_por_minuto=BRAPI_REQUISICOES_POR_MINUTO, rajada=5):
         self.token = token
-        self.base_url = BRAPI_URL
-        self.cache = {}
-        self.cache_tempo = {}  # Controlar tempo de cache
-    
-    def _fazer_requisicao(self, endpoint, params=None):
-        """Fazer requisição à API Brapi"""
-        if params is None:
-            params = {}
-        
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_conexoes = max_conexoes
+        self.tickers_por_requisicao = tickers_por_requisicao  # Limite de /quote/{t1,t2,...} por chamada
+        self.cache = CacheExpiravel(capacidade_cache, tolerancia_velho=TOLERANCIA_VELHO)
+        self.cache_disco = CachePersistente(caminho_cache, TOLERANCIA_VELHO) if caminho_cache else None
+        self._gravacao_disco = None  # Task que grava o cache em disco pendente
+        self._revalidando = set()  # Tickers com revalidação em segundo plano em andamento
+        self._tarefas = set()      # Referências das tarefas de segundo plano
+        self.agendador = AgendadorRequisicoes(requisicoes_por_minuto / 60, rajada)
+
+        # Sessão HTTP, semáforo e requisições em andamento pertencem ao event loop em que foram criados
+        self._sessao = None
+        self._limite = None
+        self._loop_sessao = None
+        self._em_voo = {}  # (endpoint, params) -> (Task da requisição em andamento, prioridade)
+
+        # Single-flight: requisições feitas de fato x pedidos que pegaram carona numa em andamento
+        self.requisicoes_emitidas = 0
+        self.requisicoes_coalescidas = 0
+
+    # ===== HTTP =====
+    def _obter_sessao(self):
+        loop = asyncio.get_running_loop()
+        if self._sessao is None or self._sessao.closed or self._loop_sessao is not loop:
+            self._sessao = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_conexoes, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._limite = asyncio.Semaphore(self.max_conexoes)
+            self._loop_sessao = loop
+            self._em_voo = {}
+        return self._sessao
+
+    async def _fazer_requisicao(self, endpoint, params=None, prioridade=PRIORIDADE_INTERATIVA):
+        """Fazer requisição à API Brapi; pedidos iguais simultâneos compartilham a mesma (single-flight)
+
+        None em falha de rede/HTTP; LimiteDeTaxa se não houver vaga no limite
+        de taxa dentro do prazo da prioridade.
+        """
+        sessao = self._obter_sessao()
+        prazo = PRAZO_INTERATIVO if prioridade == PRIORIDADE_INTERATIVA else PRAZO_FUNDO
+        chave = (endpoint, tuple(sorted((params or {}).items())))
+        em_voo = self._em_voo.get(chave)
+        # Comando não pega carona em requisição de segundo plano: ela espera vaga atrás
+        # dos comandos. Sai uma requisição do comando, e é nela que os próximos pegam carona
+        if em_voo is None or (em_voo[1] == PRIORIDADE_FUNDO and prioridade == PRIORIDADE_INTERATIVA):
+            self.requisicoes_emitidas += 1
+            tarefa = asyncio.ensure_future(self._requisitar(sessao, endpoint, params, prioridade, prazo))
+            self._em_voo[chave] = (tarefa, prioridade)
+            tarefa.add_done_callback(lambda _: self._sair_do_voo(chave, tarefa))
+            # shield: quem desiste (ex: comando cancelado) não cancela a requisição dos demais
+            return await asyncio.shield(tarefa)
+
+        tarefa = em_voo[0]
+        self.requisicoes_coalescidas += 1
+        # A requisição em andamento pode ser de segundo plano, com prazo maior que o nosso
+        try:
+            return await asyncio.wait_for(asyncio.shield(tarefa), prazo + self.timeout)
+        except asyncio.TimeoutError:
+            raise LimiteDeTaxa() from None
+
+    def _sair_do_voo(self, chave, tarefa):
+        # Uma requisição de segundo plano pode terminar depois de o comando ter ocupado a chave
+        if self._em_voo.get(chave, (None,))[0] is tarefa:
+            del self._em_voo[chave]
+
+    async def _requisitar(self, sessao, endpoint, params, prioridade, prazo):
+        """Fazer requisição à API Brapi sem bloquear o event loop, respeitando o limite de taxa"""
+        params = dict(params or {})
         if self.token:
             params['token'] = self.token
-        
+
+        loop = asyncio.get_running_loop()
+        fim_do_prazo = loop.time() + prazo
+        while True:
+            # Depois de um 429 a vaga só sai quando a pausa acabar (ou estoura o prazo)
+            await self.agendador.vaga(prioridade, fim_do_prazo - loop.time())
+            try:
+                async with self._limite:
+                    async with sessao.get(f'{self.base_url}{endpoint}', params=params) as response:
+                        if response.status == 429:
+                            espera = self.agendador.limitado(ler_retry_after(response.headers.get('Retry-After')))
+                            print(f'⚠️ Brapi: limite de requisições atingido, pausando por {espera:.0f}s')
+                            continue
+                        response.raise_for_status()
+                        dados = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f'Erro na requisição Brapi: {e!r}')
+                return None
+            self.agendador.sucesso()
+            return dados
+
+    async def fechar(self):
+        """Fechar a sessão HTTP e gravar o cache em disco pendente (no encerramento do bot)"""
+        if self._sessao is not None and not self._sessao.closed:
+            await self._sessao.close()
+        self._sessao = None
+        if self.cache_disco is not None:
+            await self.cache_disco.descarregar_async()
+
+    def _sincrono(self, coroutine):
+        """Rodar um método *_async fora do bot (scripts), com sessão temporária"""
+        sessao_bot = self._sessao, self._limite, self._loop_sessao, self._em_voo
+        self._sessao = None
+
+        async def rodar():
+            try:
+                return await coroutine
+            finally:
+                await self.fechar()
+        try:
+            return asyncio.run(rodar())
+        finally:
+            self._sessao, self._limite, self._loop_sessao, self._em_voo = sessao_bot
+
+    def estatisticas(self):
+        """Contadores do single-flight, do limite de taxa e dos caches"""
+        pedidos = self.requisicoes_emitidas + self.requisicoes_coalescidas
+        return {
+            'requisicoes_emitidas': self.requisicoes_emitidas,
+            'requisicoes_coalescidas': self.requisicoes_coalescidas,
+            'em_andamento': len(self._em_voo),
+            'taxa_coalescencia': self.requisicoes_coalescidas / pedidos if pedidos else 0.0,
+            'agendador': self.agendador.estatisticas(),
+            'cache': self.cache.estatisticas(),
+            'cache_disco': self.cache_disco.estatisticas() if self.cache_disco is not None else None
+        }
+
+    # ===== CACHE =====
+    @staticmethod
+    def _chave_cotacao(ticker):
+        return f'cotacao_{ticker.upper()}'
+
+    def _item_cotacao(self, ticker, cotacao):
+        if cotacao is None:
+            return self._chave_cotacao(ticker), 'negativo', None, VALIDADE_NEGATIVA
+        return self._chave_cotacao(ticker), 'cotacao', cotacao, validade_cotacao()
+
+    def _guardar(self, itens):
+        """Guardar [(chave, tipo, valor, validade em segundos)] na memória e no disco"""
+        agora = self.cache.relogio()
+        for chave, _, valor, validade in itens:
+            self.cache.guardar_ate(chave, valor, agora + validade)
+        if self.cache_disco is not None:
+            self.cache_disco.gravar([(chave, tipo, valor, agora + validade) for chave, tipo, valor, validade in itens])
+            if self._gravacao_disco is None or self._gravacao_disco.done():
+                self._gravacao_disco = asyncio.create_task(self._gravar_cache_disco())
+
+    async def _gravar_cache_disco(self):
+        """Juntar as respostas de INTERVALO_CACHE_DISCO segundos e gravar num commit, fora do event loop"""
+        await asyncio.sleep(INTERVALO_CACHE_DISCO)
         try:
-            url = f'{self.base_url}{endpoint}'
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            await self.cache_disco.descarregar_async()
         except Exception as e:
-            print(f'Erro na requisição Brapi: {e}')
-            return None
-    
-    def _cache_valido(self, chave, minutos=5):
-        """Verificar se cache ainda é válido"""
-        if chave not in self.cache_tempo:
+            print(f'⚠️ Cache em disco não gravado ({self.cache_disco.pendentes} pendentes): {e!r}')
+
+    def _carregar_do_disco(self, chave):
+        """Trazer a chave do disco para a memória (True se ainda servia)"""
+        if self.cache_disco is None:
             return False
-        
-        tempo_decorrido = (datetime.now() - self.cache_tempo[chave]).total_seconds() / 60
-        return tempo_decorrido < minutos
-    
-    def obter_cotacao(self, ticker, usar_cache=True):
-        """Obter cotação atual de uma ação"""
-        if usar_cache and self._cache_valido(f'cotacao_{ticker}'):
-            return self.cache.get(f'cotacao_{ticker}')
-        
-        response = self._fazer_requisicao(
-            '/quote/list',
-            {'search': ticker, 'limit': 1}
-        )
-        
-        if response and 'stocks' in response and len(response['stocks']) > 0:
-            cotacao = response['stocks'][0]
-            self.cache[f'cotacao_{ticker}'] = cotacao
-            self.cache_tempo[f'cotacao_{ticker}'] = datetime.now()
-            return cotacao
-        
-        return None
-    
-    def obter_cotacoes_multiplas(self, tickers):
+        registro = self.cache_disco.ler(chave)
+        if registro is None or self.cache.relogio() >= registro[1] + self.cache.tolerancia_velho:
+            return False
+        self.cache.guardar_ate(chave, *registro)
+        return True
+
+    def _consultar(self, chave):
+        """(valor, fresco) da memória ou, na falta, do disco; None se não houver"""
+        if chave not in self.cache:
+            self._carregar_do_disco(chave)
+        return self.cache.consultar(chave)
+
+    def _expira_em(self, chave):
+        if chave not in self.cache:
+            self._carregar_do_disco(chave)
+        return self.cache.expira_em(chave)
+
+    async def _em_cache(self, chave, tipo, validade, buscar):
+        """Valor da chave se estiver na validade, senão de `buscar()`; sem resposta da API, o vencido"""
+        consulta = self._consultar(chave)
+        if consulta is not None and consulta[1]:
+            return consulta[0]
+        try:
+            valor = await buscar()
+        except LimiteDeTaxa:
+            if consulta is None:
+                raise
+            return consulta[0]
+        if valor is None:
+            return consulta[0] if consulta is not None else None
+        self._guardar([(chave, tipo, valor, validade)])
+        return valor
+
+    def _revalidar(self, tickers):
+        """Buscar em segundo plano as cotações vencidas que acabaram de ser servidas"""
+        pendentes = [ticker for ticker in tickers if ticker not in self._revalidando]
+        if not pendentes:
+            return
+        self._revalidando.update(pendentes)
+
+        async def revalidar():
+            try:
+                await self._buscar_cotacoes(pendentes, PRIORIDADE_FUNDO)
+            finally:
+                self._revalidando.difference_update(pendentes)
+        tarefa = asyncio.create_task(revalidar())
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    # ===== CONSULTAS (ASYNC) =====
+    @staticmethod
+    def _desatualizada(cotacao):
+        """Última cotação conhecida, servida no lugar da atual (limite de taxa ou falha da API)"""
+        return dict(cotacao, desatualizada=True) if cotacao else None
+
+    async def obter_cotacao_async(self, ticker, usar_cache=True, permitir_velha=True):
+        """Obter cotação atual de uma ação (None se o ticker não existir)
+
+        Sem vaga no limite de taxa: a última cotação conhecida com
+        'desatualizada': True ou, se não houver nenhuma, LimiteDeTaxa.
+        Com permitir_velha=False (compra e venda) uma cotação vencida não é
+        servida direto: a atual é buscada na hora e, se não vier, a vencida
+        volta marcada com 'desatualizada': True.
+        """
+        ticker = ticker.upper()
+        chave = self._chave_cotacao(ticker)
+        ultima = self.cache.espiar(chave)  # Antes de consultar: vencida além da tolerância sai do cache
+        if usar_cache:
+            consulta = self._consultar(chave)
+            if consulta is not None:
+                cotacao, fresca = consulta
+                if fresca:
+                    return cotacao
+                if permitir_velha:
+                    self._revalidar([ticker])
+                    return cotacao
+                ultima = cotacao or ultima  # Pode ter vindo do disco
+
+        try:
+            response = await self._fazer_requisicao(
+                '/quote/list',
+                {'search': ticker, 'limit': 1}
+            )
+        except LimiteDeTaxa:
+            if not ultima:
+                raise
+            return self._desatualizada(ultima)
+        if response is None:
+            # Falha de rede/HTTP: não vira cache negativo
+            return None if permitir_velha else self._desatualizada(ultima)
+
+        cotacao = response['stocks'][0] if response.get('stocks') else None
+        self._guardar([self._item_cotacao(ticker, cotacao)])
+        return cotacao
+
+    async def obter_cotacoes_multiplas_async(self, tickers):
         """Obter cotações de múltiplas ações"""
         tickers_str = ','.join(tickers)
-        response = self._fazer_requisicao(
+        response = await self._fazer_requisicao(
             f'/quote/{tickers_str}'
         )
-        
+
         if response and 'results' in response:
             return response['results']
         return []
-    
-    def listar_acoes_setor(self, setor='', limite=50):
+
+    async def obter_cotacoes_async(self, tickers):
+        """Cotações de vários tickers {ticker: cotação ou None}: cache local primeiro, o resto em lotes
+
+        Vencidas são servidas e revalidadas em segundo plano; as que faltam
+        vão em requisições /quote/{t1,t2,...} de até `tickers_por_requisicao`,
+        todas ao mesmo tempo (cerca de uma ida e volta para a carteira inteira).
+        Lotes barrados pelo limite de taxa voltam com a última cotação conhecida
+        marcada com 'desatualizada': True; sem nenhuma, o ticker fica de fora.
+        """
+        cotacoes = {}
+        faltando, vencidas, ultimas = [], [], {}
+        for ticker in dict.fromkeys(ticker.upper() for ticker in tickers):
+            chave = self._chave_cotacao(ticker)
+            ultima = self.cache.espiar(chave)
+            consulta = self._consultar(chave)
+            if consulta is None:
+                faltando.append(ticker)
+                ultimas[ticker] = ultima
+                continue
+            cotacoes[ticker] = consulta[0]
+            if not consulta[1]:
+                vencidas.append(ticker)
+
+        if vencidas:
+            self._revalidar(vencidas)
+        buscadas = await self._buscar_cotacoes(faltando)
+        cotacoes.update(buscadas)
+        for ticker in faltando:
+            if ticker not in buscadas and ultimas.get(ticker):
+                cotacoes[ticker] = self._desatualizada(ultimas[ticker])
+        return cotacoes
+
+    async def atualizar_cotacoes_async(self, tickers, antecedencia=60, maximo=None):
+        """Renovar em lote as cotações ausentes ou que vencem nos próximos `antecedencia` segundos
+
+        `tickers` vem em ordem de prioridade; com `maximo`, só os primeiros
+        que precisam de renovação são buscados nesta rodada. Retorna quantos
+        foram buscados.
+        """
+        limite = self.cache.relogio() + antecedencia
+        vencendo = []
+        for ticker in dict.fromkeys(ticker.upper() for ticker in tickers):
+            expira_em = self._expira_em(self._chave_cotacao(ticker))
+            if (expira_em is None or expira_em <= limite) and ticker not in self._revalidando:
+                vencendo.append(ticker)
+                if maximo is not None and len(vencendo) >= maximo:
+                    break
+        await self._buscar_cotacoes(vencendo, PRIORIDADE_FUNDO)
+        return len(vencendo)
+
+    async def _buscar_cotacoes(self, tickers, prioridade=PRIORIDADE_INTERATIVA):
+        lotes = [tickers[i:i + self.tickers_por_requisicao]
+                 for i in range(0, len(tickers), self.tickers_por_requisicao)]
+        cotacoes = {}
+        for resultado in await asyncio.gather(*(self._buscar_lote(lote, prioridade) for lote in lotes)):
+            cotacoes.update(resultado)
+        return cotacoes
+
+    async def _buscar_lote(self, tickers, prioridade=PRIORIDADE_INTERATIVA):
+        """Uma requisição multi-ticker; o que não vier na resposta vira cache negativo"""
+        try:
+            response = await self._fazer_requisicao(f'/quote/{",".join(tickers)}', prioridade=prioridade)
+        except LimiteDeTaxa:
+            return {}  # Sem vaga: os tickers ficam de fora e nada entra no cache
+        if response is None or 'results' not in response:
+            return dict.fromkeys(tickers)  # Falha: nada entra no cache
+
+        cotacoes = dict.fromkeys(tickers)
+        for cotacao in response['results']:
+            ticker = (cotacao.get('symbol') or cotacao.get('stock') or '').upper()
+            if ticker in cotacoes:
+                # /quote/{tickers} chama o ticker de 'symbol'; /quote/list (e os cogs) de 'stock'
+                cotacao.setdefault('stock', ticker)
+                cotacoes[ticker] = cotacao
+        self._guardar([self._item_cotacao(ticker, cotacao) for ticker, cotacao in cotacoes.items()])
+        return cotacoes
+
+    async def listar_acoes_setor_async(self, setor='', limite=50):
         """Listar ações por setor"""
         params = {'limit': limite}
         if setor:
             params['sector'] = setor
-        
-        response = self._fazer_requisicao('/quote/list', params)
-        
+
+        response = await self._fazer_requisicao('/quote/list', params)
+
         if response and 'stocks' in response:
             return response['stocks']
         return []
-    
-    def obter_setores(self):
+
+    async def obter_setores_async(self):
         """Obter lista de setores disponíveis"""
-        response = self._fazer_requisicao('/quote/list', {'limit': 1})
-        
-        if response and 'availableSectors' in response:
-            return response['availableSectors']
-        return []
-    
-    def obter_preco_atual(self, ticker):
+        async def buscar():
+            response = await self._fazer_requisicao('/quote/list', {'limit': 1})
+            if response and 'availableSectors' in response:
+                return response['availableSectors']
+            return None
+
+        return await self._em_cache('setores', 'setores', VALIDADE_SETORES, buscar) or []
+
+    async def obter_preco_atual_async(self, ticker):
         """Obter apenas o preço atual de uma ação"""
-        cotacao = self.obter_cotacao(ticker)
+        cotacao = await self.obter_cotacao_async(ticker)
         if cotacao:
             return cotacao.get('regularMarketPrice', 0)
         return 0
-    
-    def obter_dados_fundamentalistas(self, ticker):
+
+    async def obter_dados_fundamentalistas_async(self, ticker):
         """Obter dados fundamentalistas (requer módulo)"""
-        response = self._fazer_requisicao(
-            f'/quote/{ticker}',
-            {'module': 'fundamentalData'}
-        )
-        
-        if response and 'results' in response and len(response['results']) > 0:
-            return response['results'][0].get('fundamentalData', {})
-        return {}
-    
-    def validar_ticker(self, ticker):
+        ticker = ticker.upper()
+
+        async def buscar():
+            response = await self._fazer_requisicao(
+                f'/quote/{ticker}',
+                {'module': 'fundamentalData'}
+            )
+            if response and 'results' in response and len(response['results']) > 0:
+                return response['results'][0].get('fundamentalData', {})
+            return None
+
+        return await self._em_cache(f'fundamentos_{ticker}', 'fundamentos', VALIDADE_FUNDAMENTOS, buscar) or {}
+
+    async def validar_ticker_async(self, ticker):
         """Validar se ticker existe na B3"""
-        cotacao = self.obter_cotacao(ticker, usar_cache=False)
+        cotacao = await self.obter_cotacao_async(ticker, usar_cache=False)
         return cotacao is not None
 
+    # ===== CONSULTAS (SÍNCRONAS, PARA SCRIPTS) =====
+    def obter_cotacao(self, ticker, usar_cache=True):
+        return self._sincrono(self.obter_cotacao_async(ticker, usar_cache))
+
+    def obter_cotacoes_multiplas(self, tickers):
+        return self._sincrono(self.obter_cotacoes_multiplas_async(tickers))
+
+    def obter_cotacoes(self, tickers):
+        return self._sincrono(self.obter_cotacoes_async(tickers))
+
+    def listar_acoes_setor(self, setor='', limite=50):
+        return self._sincrono(self.listar_acoes_setor_async(setor, limite))
+
+    def obter_setores(self):
+        return self._sincrono(self.obter_setores_async())
+
+    def obter_preco_atual(self, ticker):
+        return self._sincrono(self.obter_preco_atual_async(ticker))
+
+    def obter_dados_fundamentalistas(self, ticker):
+        return self._sincrono(self.obter_dados_fundamentalistas_async(ticker))
+
+    def validar_ticker(self, ticker):
+        return self._sincrono(self.validar_ticker_async(ticker))
+
 # Instância global
-brapi = BrapiAPI(BRAPI_TOKEN)
+brapi = BrapiAPI(BRAPI_TOKEN, caminho_cache=BRAPI_CACHE_PATH or None)
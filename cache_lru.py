@@ -0,0 +1,134 @@
+# ============================================================================
+# CACHE LRU - CONJUNTO DE TRABALHO COM TAMANHO MÁXIMO
+# ============================================================================
+#
+# Guarda até `capacidade` entradas; cada leitura move a chave para o fim e,
+# quando passa do limite, sai a que foi usada há mais tempo. Assim a memória
+# acompanha quem está ativo, não todo ID que já passou pelo bot. Acertos,
+# falhas e despejos ficam contados para calibrar a capacidade.
+#
+# Não tem lock próprio: quem usa de mais de uma thread deve proteger as chamadas.
+#
+# CacheExpiravel acrescenta validade por entrada: depois de vencida a entrada
+# ainda pode ser servida como "velha" por `tolerancia_velho` segundos (quem
+# usa decide se revalida em segundo plano). Guardar None é cache negativo
+# (ex: ticker que não existe).
+
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """Dict limitado que descarta as entradas usadas há mais tempo"""
+
+    def __init__(self, capacidade=10_000):
+        if capacidade <= 0:
+            raise ValueError('Capacidade do cache deve ser positiva')
+        self.capacidade = capacidade
+        self._entradas = OrderedDict()
+
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, chave):
+        return chave in self._entradas
+
+    def obter(self, chave, padrao=None):
+        """Valor da chave (marcando como usada agora) ou `padrao`"""
+        valor = self._entradas.get(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            self.falhas += 1
+            return padrao
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor):
+        self._entradas[chave] = valor
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+            self.despejos += 1
+
+    def espiar(self, chave, padrao=None):
+        """Valor da chave sem mexer na ordem nem nos contadores"""
+        return self._entradas.get(chave, padrao)
+
+    def descartar(self, chave):
+        self._entradas.pop(chave, None)
+
+    def limpar(self):
+        self._entradas.clear()
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'tamanho': len(self._entradas),
+            'capacidade': self.capacidade,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'despejos': self.despejos,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0
+        }
+
+
+class CacheExpiravel(CacheLRU):
+    """CacheLRU com validade por entrada e leitura de entradas vencidas (velhas)"""
+
+    def __init__(self, capacidade=10_000, tolerancia_velho=0, relogio=time.time):
+        super().__init__(capacidade)
+        self.tolerancia_velho = tolerancia_velho
+        self.relogio = relogio  # Relógio de parede: as validades podem ir para o disco
+
+        self.velhos = 0     # Leituras servidas depois da validade
+        self.negativos = 0  # Acertos em entradas None
+
+    def guardar(self, chave, valor, validade):
+        """Guardar `valor` válido por `validade` segundos"""
+        super().guardar(chave, (valor, self.relogio() + validade))
+
+    def guardar_ate(self, chave, valor, expira_em):
+        super().guardar(chave, (valor, expira_em))
+
+    def consultar(self, chave):
+        """(valor, fresco) da chave, ou None se ausente ou vencida além da tolerância"""
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            valor, expira_em = entrada
+            agora = self.relogio()
+            if agora < expira_em + self.tolerancia_velho:
+                self._entradas.move_to_end(chave)
+                if agora < expira_em:
+                    self.acertos += 1
+                    self.negativos += valor is None
+                    return valor, True
+                self.velhos += 1
+                return valor, False
+            del self._entradas[chave]
+        self.falhas += 1
+        return None
+
+    def expira_em(self, chave):
+        """Momento (relógio do cache) em que a entrada vence, ou None se ausente"""
+        entrada = self._entradas.get(chave)
+        return None if entrada is None else entrada[1]
+
+    def obter(self, chave, padrao=None):
+        """Valor da chave se ainda estiver na validade, senão `padrao`"""
+        consulta = self.consultar(chave)
+        return consulta[0] if consulta is not None and consulta[1] else padrao
+
+    def espiar(self, chave, padrao=None):
+        entrada = self._entradas.get(chave)
+        return padrao if entrada is None else entrada[0]
+
+    def estatisticas(self):
+        estatisticas = super().estatisticas()
+        estatisticas.update(velhos=self.velhos, negativos=self.negativos)
+        return estatisticas
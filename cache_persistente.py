@@ -0,0 +1,127 @@
+# ============================================================================
+# CACHE PERSISTENTE - RESPOSTAS DA BRAPI GUARDADAS EM DISCO ENTRE REINÍCIOS
+# ============================================================================
+#
+# Uma tabela SQLite chave -> (tipo, valor em JSON, expira_em). Nada é
+# carregado no startup: o BrapiAPI só lê uma chave daqui quando ela falta
+# no cache em memória, e grava aqui tudo que busca na API. Assim um bot
+# reiniciado continua usando as cotações, fundamentos e setores que ainda
+# estão na validade em vez de consultar tudo de novo.
+#
+# expira_em é o relógio de parede (time.time), o mesmo do CacheExpiravel.
+#
+# `gravar` não vai ao disco: as respostas ficam pendentes (e já visíveis em
+# `ler`) até `descarregar_async`, que grava o lote num único commit numa
+# thread, fora do event loop. `fechar` grava o que sobrou.
+
+import asyncio
+import json
+import sqlite3
+import time
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    chave TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    expira_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_expira_em ON cache (expira_em);
+"""
+
+
+class CachePersistente:
+    """Respostas da API com validade guardadas num arquivo SQLite"""
+
+    def __init__(self, caminho, tolerancia_velho=0):
+        self.caminho = caminho
+        self.tolerancia_velho = tolerancia_velho  # Vencidas há mais tempo que isso são apagadas
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute('PRAGMA synchronous=NORMAL')
+        self.conexao.executescript(ESQUEMA)
+        self.limpar_vencidos()
+
+        self._pendentes = {}  # chave -> (tipo, valor, expira_em) ainda não gravados
+        self._gravando = {}   # Lote sendo gravado na thread
+        self._gravacao = None  # Future da gravação em andamento
+
+        self.leituras = 0
+        self.acertos = 0
+        self.gravacoes = 0
+
+    def ler(self, chave):
+        """(valor, expira_em) da chave, ou None"""
+        self.leituras += 1
+        pendente = self._pendentes.get(chave) or self._gravando.get(chave)
+        if pendente is not None:
+            self.acertos += 1
+            return pendente[1], pendente[2]
+        linha = self.conexao.execute(
+            'SELECT valor, expira_em FROM cache WHERE chave = ?', (chave,)
+        ).fetchone()
+        if linha is None:
+            return None
+        self.acertos += 1
+        return json.loads(linha[0]), linha[1]
+
+    def gravar(self, itens):
+        """Deixar [(chave, tipo, valor, expira_em)] para a próxima gravação em lote"""
+        for chave, tipo, valor, expira_em in itens:
+            self._pendentes[chave] = (tipo, valor, expira_em)
+
+    @property
+    def pendentes(self):
+        return len(self._pendentes)
+
+    async def descarregar_async(self):
+        """Gravar os pendentes num único commit numa thread (espera a gravação anterior, se houver)"""
+        if self._gravacao is not None:
+            await asyncio.shield(self._gravacao)
+        if not self._pendentes:
+            return
+        self._gravando, self._pendentes = self._pendentes, {}
+        self._gravacao = asyncio.get_running_loop().run_in_executor(None, self._gravar_no_disco, self._gravando)
+        self._gravacao.add_done_callback(self._fim_da_gravacao)
+        await asyncio.shield(self._gravacao)
+
+    def _fim_da_gravacao(self, gravacao):
+        lote, self._gravando, self._gravacao = self._gravando, {}, None
+        if gravacao.cancelled() or gravacao.exception() is not None:
+            # Volta para a fila; o que foi guardado depois vale mais
+            self._pendentes = {**lote, **self._pendentes}
+
+    def _gravar_no_disco(self, lote):
+        if not lote:
+            return
+        self.conexao.executemany(
+            'INSERT OR REPLACE INTO cache (chave, tipo, valor, expira_em) VALUES (?, ?, ?, ?)',
+            [(chave, tipo, json.dumps(valor), expira_em) for chave, (tipo, valor, expira_em) in lote.items()]
+        )
+        self.conexao.commit()
+        self.gravacoes += len(lote)
+
+    def limpar_vencidos(self):
+        apagados = self.conexao.execute(
+            'DELETE FROM cache WHERE expira_em < ?', (time.time() - self.tolerancia_velho,)
+        ).rowcount
+        self.conexao.commit()
+        return apagados
+
+    def contar_por_tipo(self):
+        return dict(self.conexao.execute('SELECT tipo, COUNT(*) FROM cache GROUP BY tipo').fetchall())
+
+    def estatisticas(self):
+        return {
+            'leituras': self.leituras,
+            'acertos': self.acertos,
+            'gravacoes': self.gravacoes,
+            'pendentes': self.pendentes,
+            'por_tipo': self.contar_por_tipo()
+        }
+
+    def fechar(self):
+        """Gravar o que estiver pendente e fechar (sem gravação em andamento: ver descarregar_async)"""
+        self._gravar_no_disco(self._pendentes)
+        self._pendentes = {}
+        self.conexao.close()
@@ -0,0 +1,56 @@
+# ============================================================================
+# CHECKPOINTS DE SALDO - SALDO HISTÓRICO E RECONCILIAÇÃO INCREMENTAL
+# ============================================================================
+#
+# Cada transação do log guarda o saldo do usuário logo depois dela
+# (saldo_posterior). A cada INTERVALO_CHECKPOINT transações de um usuário
+# esse saldo vira um checkpoint (posição no log, timestamp, centavos), todos
+# num único array('q') por usuário, em ordem cronológica.
+#
+#   saldo em t    busca binária do último checkpoint <= t e depois só as
+#                 transações do usuário entre ele e o próximo (o Database
+#                 encadeia cada linha do log à anterior do mesmo usuário)
+#   reconciliação checkpoint + soma das transações até o próximo checkpoint
+#                 deve dar o saldo do próximo; cada intervalo é conferido uma
+#                 vez só (`verificados`)
+#
+# Os checkpoints são derivados do log: no startup são remontados a partir da
+# coluna de saldos do TransacoesColunares.
+
+import bisect
+from array import array
+
+INTERVALO_CHECKPOINT = 64
+CAMPOS = 3  # posição, timestamp, centavos
+
+
+class CheckpointsUsuario:
+    """Checkpoints de saldo de um usuário intercalados num array('q')"""
+    __slots__ = ('dados', 'desde_ultimo', 'verificados')
+
+    def __init__(self):
+        self.dados = array('q')
+        self.desde_ultimo = 0  # Transações do usuário depois do último checkpoint
+        self.verificados = 0   # Intervalos já conferidos pela reconciliação
+
+    def __len__(self):
+        return len(self.dados) // CAMPOS
+
+    def __getitem__(self, indice):
+        """(posição no log, timestamp, centavos)"""
+        if indice < 0:
+            indice += len(self)
+        return tuple(self.dados[indice * CAMPOS:(indice + 1) * CAMPOS])
+
+    def registrar(self, posicao, timestamp, centavos, intervalo=INTERVALO_CHECKPOINT):
+        """Contar uma transação do usuário e guardar checkpoint quando completar o intervalo"""
+        if not self.dados or self.desde_ultimo + 1 >= intervalo:
+            self.dados.extend((posicao, timestamp, centavos))
+            self.desde_ultimo = 0
+        else:
+            self.desde_ultimo += 1
+
+    def anterior(self, timestamp):
+        """Índice do último checkpoint com timestamp <= `timestamp` (-1 se nenhum)"""
+        dados = self.dados
+        return bisect.bisect_right(range(len(self)), timestamp, key=lambda i: dados[i * CAMPOS + 1]) - 1
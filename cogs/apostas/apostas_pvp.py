@@ -4,7 +4,7 @@
 
 import discord
 from discord.ext import commands
-from database import db
+from database import db, SaldoInsuficiente
 from datetime import datetime
 
 class ApostasPvP(commands.Cog):
@@ -50,9 +50,15 @@ class ApostasPvP(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Bloquear saldos
-        db.atualizar_saldo(ctx.author.id, -valor, 'aposta_bloqueada', 'Saldo bloqueado em aposta')
-        db.atualizar_saldo(usuario_desafiado.id, -valor, 'aposta_bloqueada', 'Saldo bloqueado em aposta')
+        # Bloquear saldos dos dois jogadores de uma vez (nenhum é debitado se o outro não tiver saldo)
+        try:
+            db.movimentar([
+                (ctx.author.id, -valor, 'aposta_bloqueada', 'Saldo bloqueado em aposta'),
+                (usuario_desafiado.id, -valor, 'aposta_bloqueada', 'Saldo bloqueado em aposta')
+            ])
+        except SaldoInsuficiente as e:
+            await ctx.send(f'<@{e.user_id}> não tem mais saldo suficiente para esta aposta!')
+            return
         
         # Criar aposta
         aposta_id = db.criar_aposta(
@@ -136,8 +142,7 @@ class ApostasPvP(commands.Cog):
     async def definir_vencedor(self, ctx, aposta_id: str, vencedor: discord.User):
         """Definir vencedor (requer admin)"""
         try:
-            from bson.objectid import ObjectId
-            aposta = db.apostas.find_one({'_id': ObjectId(aposta_id)})
+            aposta = db.obter_aposta(aposta_id)
             
             if not aposta:
                 await ctx.send('Aposta não encontrada!')
@@ -152,25 +157,13 @@ class ApostasPvP(commands.Cog):
             imposto = int(valor_total * 0.1) if valor_total > 1000 else 0
             valor_liquido = valor_total - imposto
             
-            db.atualizar_saldo(
-                vencedor.id,
-                valor_liquido,
-                'aposta_vencida',
-                f'Vitória em aposta contra {aposta["apostador"]}'
-            )
-            
+            lancamentos = [(vencedor.id, valor_total, 'aposta_vencida', f'Vitória em aposta contra {aposta["apostador"]}')]
             if imposto > 0:
-                db.registrar_transacao(
-                    vencedor.id,
-                    -imposto,
-                    'imposto',
-                    vencedor.id,
-                    0,
-                    'Imposto sobre ganho de aposta'
-                )
+                lancamentos.append((vencedor.id, -imposto, 'imposto', 'Imposto sobre ganho de aposta'))
+            db.movimentar(lancamentos)
             
             # Finalizar aposta
-            db.finalizar_aposta(ObjectId(aposta_id), vencedor.id)
+            db.finalizar_aposta(aposta_id, vencedor.id)
             
             embed = discord.Embed(
                 title='✅ Aposta Finalizada!',
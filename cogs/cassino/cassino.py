@@ -46,17 +46,11 @@ class Cassino(commands.Cog):
             imposto = int(ganho * 0.1) if ganho > 1000 else 0
             ganho_liquido = ganho - aposta - imposto
             
-            db.atualizar_saldo(ctx.author.id, ganho_liquido, 'aposta_ganha', 'Coinflip vencida')
-            
+            # Prêmio e imposto como lançamentos separados: o ledger soma o mesmo que o saldo
+            lancamentos = [(ctx.author.id, ganho - aposta, 'aposta_ganha', 'Coinflip vencida')]
             if imposto > 0:
-                db.registrar_transacao(
-                    ctx.author.id,
-                    -imposto,
-                    'imposto',
-                    usuario['saldo'] + ganho_liquido + imposto,
-                    usuario['saldo'] + ganho_liquido,
-                    'Imposto sobre ganho de coinflip'
-                )
+                lancamentos.append((ctx.author.id, -imposto, 'imposto', 'Imposto sobre ganho de coinflip'))
+            db.movimentar(lancamentos)
             
             embed = discord.Embed(
                 title='🎉 Você Ganhou!',
@@ -120,17 +114,10 @@ class Cassino(commands.Cog):
             imposto = int(ganho * 0.1) if ganho > 1000 else 0
             ganho_liquido = ganho - aposta - imposto
             
-            db.atualizar_saldo(ctx.author.id, ganho_liquido, 'aposta_ganha', 'Slots vencida')
-            
+            lancamentos = [(ctx.author.id, ganho - aposta, 'aposta_ganha', 'Slots vencida')]
             if imposto > 0:
-                db.registrar_transacao(
-                    ctx.author.id,
-                    -imposto,
-                    'imposto',
-                    usuario['saldo'] + ganho_liquido + imposto,
-                    usuario['saldo'] + ganho_liquido,
-                    'Imposto sobre ganho de slots'
-                )
+                lancamentos.append((ctx.author.id, -imposto, 'imposto', 'Imposto sobre ganho de slots'))
+            db.movimentar(lancamentos)
             
             titulo = '🎉 JACKPOT!' if rolo1 == rolo2 == rolo3 and rolo1 == '💎' else '🎉 Você Ganhou!'
             embed = discord.Embed(title=titulo, color=discord.Color.green())
@@ -178,17 +165,10 @@ class Cassino(commands.Cog):
             imposto = int(ganho * 0.1) if ganho > 1000 else 0
             ganho_liquido = ganho - aposta - imposto
             
-            db.atualizar_saldo(ctx.author.id, ganho_liquido, 'aposta_ganha', 'Roleta vencida')
-            
+            lancamentos = [(ctx.author.id, ganho - aposta, 'aposta_ganha', 'Roleta vencida')]
             if imposto > 0:
-                db.registrar_transacao(
-                    ctx.author.id,
-                    -imposto,
-                    'imposto',
-                    usuario['saldo'] + ganho_liquido + imposto,
-                    usuario['saldo'] + ganho_liquido,
-                    'Imposto sobre ganho de roleta'
-                )
+                lancamentos.append((ctx.author.id, -imposto, 'imposto', 'Imposto sobre ganho de roleta'))
+            db.movimentar(lancamentos)
             
             embed = discord.Embed(title='🎉 VOCÊ ACERTOU!', color=discord.Color.green())
             embed.add_field(name='Número Sorteado', value=f'🎲 {resultado}', inline=True)
@@ -4,13 +4,26 @@
 
 import discord
 from discord.ext import commands, tasks
-from database import db
+from cogs.paginacao import PaginasHistorico
+from database import db, Credito, Experiencia
 from datetime import datetime, timedelta
 import random
 
 class Economia(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        if hasattr(db, 'reconciliar'):
+            self.reconciliar_saldos.start()
+    
+    def cog_unload(self):
+        self.reconciliar_saldos.cancel()
+    
+    @tasks.loop(minutes=5)
+    async def reconciliar_saldos(self):
+        """Conferir em segundo plano o ledger dos usuários movimentados desde a última rodada"""
+        for divergencia in db.reconciliar():
+            print(f"⚠️ Saldo de {divergencia['user_id']} não bate com o ledger desde {divergencia['desde']:%d/%m %H:%M}: "
+                  f"esperado {divergencia['esperado']:.2f}, registrado {divergencia['registrado']:.2f}")
     
     @commands.command(name='saldo', help='Ver seu saldo atual')
     async def saldo(self, ctx, user: discord.User = None):
@@ -18,7 +31,7 @@ class Economia(commands.Cog):
         if user is None:
             user = ctx.author
         
-        usuario = db.obter_ou_criar_usuario(user.id, user.name)
+        usuario = db.consultar_usuario(user.id, user.name)
         
         embed = discord.Embed(
             title=f'💰 Saldo de {user.name}',
@@ -68,26 +81,20 @@ class Economia(commands.Cog):
         bonus = int(valor_recompensa * (nova_streak * 0.1))
         valor_total = valor_recompensa + bonus
         
-        # Atualizar banco de dados
-        db.atualizar_saldo(
-            ctx.author.id,
-            valor_total,
-            'daily',
-            f'Daily com streak de {nova_streak}'
-        )
+        # Atualizar banco de dados (crédito e XP juntos)
+        saldos = db.aplicar_lote([
+            Credito(ctx.author.id, valor_total, 'daily', f'Daily com streak de {nova_streak}'),
+            Experiencia(ctx.author.id, 25)
+        ])
         
-        db.usuarios.update_one(
-            {'user_id': ctx.author.id},
+        db.atualizar_campos_usuario(
+            ctx.author.id,
             {
-                '$set': {
-                    'ultima_recompensa_daily': datetime.now().isoformat(),
-                    'streak_daily': nova_streak
-                }
+                'ultima_recompensa_daily': datetime.now().isoformat(),
+                'streak_daily': nova_streak
             }
         )
         
-        db.adicionar_experiencia(ctx.author.id, 25)
-        
         embed = discord.Embed(
             title='💎 Daily Resgatado!',
             color=discord.Color.green(),
@@ -97,7 +104,7 @@ class Economia(commands.Cog):
         embed.add_field(name='Bônus Streak', value=f'🔥 +{bonus}', inline=True)
         embed.add_field(name='Total', value=f'✨ {valor_total}', inline=True)
         embed.add_field(name='Streak Atual', value=f'🌟 {nova_streak} dia(s)', inline=False)
-        embed.add_field(name='Novo Saldo', value=f'💰 {usuario["saldo"] + valor_total}', inline=False)
+        embed.add_field(name='Novo Saldo', value=f'💰 {saldos[ctx.author.id]:.2f}', inline=False)
         
         await ctx.send(embed=embed)
     
@@ -107,7 +114,7 @@ class Economia(commands.Cog):
         if user is None:
             user = ctx.author
         
-        usuario = db.obter_ou_criar_usuario(user.id, user.name)
+        usuario = db.consultar_usuario(user.id, user.name)
         
         # Calcular tempo ativo
         data_criacao = datetime.fromisoformat(usuario['data_criacao']) if isinstance(usuario['data_criacao'], str) else usuario['data_criacao']
@@ -131,36 +138,64 @@ class Economia(commands.Cog):
         
         await ctx.send(embed=embed)
     
-    @commands.command(name='ranking', help='Ver top 10 usuários mais ricos')
-    async def ranking(self, ctx):
-        """Mostrar ranking de usuários mais ricos"""
-        ricos = db.obter_top_ricos(10)
+    @commands.command(name='ranking', help='Ver ranking dos usuários mais ricos')
+    async def ranking(self, ctx, pagina: int = 1):
+        """Mostrar ranking de usuários mais ricos (10 por página)"""
+        pagina = max(pagina, 1)
+        inicio = (pagina - 1) * 10
+        ricos = db.obter_ranking(10, inicio)
         
         if not ricos:
-            await ctx.send('Nenhum usuário registrado ainda!')
+            await ctx.send('Nenhum usuário registrado ainda!' if pagina == 1 else 'Página vazia!')
             return
         
+        total_paginas = (db.contar_usuarios() + 9) // 10
         embed = discord.Embed(
-            title='🏆 Ranking - Top 10 Mais Ricos',
+            title='🏆 Ranking - Top 10 Mais Ricos' if pagina == 1 else f'🏆 Ranking - Página {pagina}',
             color=discord.Color.gold(),
             timestamp=datetime.now()
         )
         
-        for i, usuario in enumerate(ricos, 1):
+        for i, usuario in enumerate(ricos, inicio + 1):
             medalhas = ['🥇', '🥈', '🥉']
             medalha = medalhas[i-1] if i <= 3 else f'#{i}'
             
             embed.add_field(
-                name=f'{medalha} {usuario["username"]}',
+                name=f'{medalha} {usuario["nome"]}',
                 value=f'💰 {usuario["saldo"]:.2f} | ⭐ Nível {usuario["nivel"]}',
                 inline=False
             )
         
+        embed.set_footer(text=f'Página {pagina}/{total_paginas} | Use !ranking <página> ou !meu_rank')
+        
+        await ctx.send(embed=embed)
+    
+    @commands.command(name='meu_rank', help='Ver sua posição no ranking')
+    async def meu_rank(self, ctx, user: discord.User = None):
+        """Mostrar posição do usuário no ranking de saldo"""
+        if user is None:
+            user = ctx.author
+        
+        posicao = db.obter_posicao_ranking(user.id)
+        if posicao is None:
+            await ctx.send(f'{user.mention} ainda não está no ranking!')
+            return
+        
+        usuario = db.consultar_usuario(user.id, user.name)
+        embed = discord.Embed(
+            title=f'🏆 Posição de {user.name}',
+            color=discord.Color.gold(),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name='Posição', value=f'#{posicao} de {db.contar_usuarios()}', inline=True)
+        embed.add_field(name='Saldo', value=f'💰 {usuario["saldo"]:.2f}', inline=True)
+        embed.add_field(name='Página do Ranking', value=f'📄 {(posicao - 1) // 10 + 1}', inline=True)
+        
         await ctx.send(embed=embed)
     
     @commands.command(name='extrato', help='Ver histórico de transações')
-    async def extrato(self, ctx, user: discord.User = None, limite: int = 10):
-        """Mostrar extrato (histórico de transações)"""
+    async def extrato(self, ctx, user: discord.User = None, por_pagina: int = 10):
+        """Mostrar extrato (histórico de transações) paginado com botões"""
         if user is None:
             user = ctx.author
         
@@ -169,34 +204,42 @@ class Economia(commands.Cog):
             await ctx.send('Você só pode ver seu próprio extrato!')
             return
         
-        transacoes = db.obter_extrato(user.id, limite)
+        # Um embed comporta no máximo 25 campos
+        por_pagina = max(1, min(por_pagina, 25))
         
-        if not transacoes:
+        def montar_embed(transacoes, pagina):
+            embed = discord.Embed(
+                title=f'📊 Extrato de {user.name}',
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            for trans in transacoes:
+                data = datetime.fromisoformat(trans['data']) if isinstance(trans['data'], str) else trans['data']
+                valor_str = f'+{trans["valor"]}' if trans['valor'] > 0 else f'{trans["valor"]}'
+                # Transações antigas (anteriores ao saldo_posterior) não têm o saldo
+                saldo_posterior = trans.get('saldo_posterior')
+                saldo_str = f' | Saldo: {saldo_posterior:.2f}' if saldo_posterior is not None else ''
+                
+                embed.add_field(
+                    name=f'{trans["tipo"].upper()} - {data.strftime("%d/%m %H:%M")}',
+                    value=f'{valor_str}{saldo_str}',
+                    inline=False
+                )
+            embed.set_footer(text=f'Página {pagina} • mais recentes primeiro')
+            return embed
+        
+        paginas = PaginasHistorico(
+            ctx.author.id,
+            lambda cursor: db.consultar('obter_extrato_pagina', user.id, por_pagina, cursor),
+            montar_embed
+        )
+        if not await paginas.enviar(ctx):
             embed = discord.Embed(
                 title='📋 Extrato Vazio',
                 description=f'{user.mention} não tem transações registradas',
                 color=discord.Color.gray()
             )
             await ctx.send(embed=embed)
-            return
-        
-        embed = discord.Embed(
-            title=f'📊 Extrato de {user.name}',
-            color=discord.Color.blue(),
-            timestamp=datetime.now()
-        )
-        
-        for trans in transacoes:
-            data = datetime.fromisoformat(trans['data']) if isinstance(trans['data'], str) else trans['data']
-            valor_str = f'+{trans["valor"]}' if trans['valor'] > 0 else f'{trans["valor"]}'
-            
-            embed.add_field(
-                name=f'{trans["tipo"].upper()} - {data.strftime("%d/%m %H:%M")}',
-                value=f'{valor_str} | Saldo: {trans["saldo_posterior"]:.2f}',
-                inline=False
-            )
-        
-        await ctx.send(embed=embed)
     
     @commands.command(name='imposto', help='Ver imposto a pagar')
     async def imposto(self, ctx):
@@ -3,22 +3,80 @@
 # ============================================================================
 
 import discord
-from discord.ext import commands
-from database import db
+from discord.ext import commands, tasks
+from database import db, SaldoInsuficiente
 from brapi_client import brapi
+from agendador_requisicoes import LimiteDeTaxa
 from datetime import datetime
 
+# Cotações renovadas por rodada do pré-aquecimento (as mais populares primeiro)
+MAXIMO_COTACOES_POR_RODADA = 200
+AVISO_DESATUALIZADA = '⚠️ Última cotação conhecida: a brapi.dev limitou as consultas agora'
+
+def embed_quantidade_insuficiente(quantidade, ticker):
+    return discord.Embed(
+        title='❌ Quantidade Insuficiente',
+        description=f'Você não possui {quantidade} {ticker}',
+        color=discord.Color.red()
+    )
+
+def embed_quantidade_invalida():
+    return discord.Embed(
+        title='❌ Quantidade Inválida',
+        description='A quantidade deve ser maior que zero',
+        color=discord.Color.red()
+    )
+
+def embed_limite(ticker):
+    """Cotação atual indisponível (limite de requisições ou falha da API), não é ticker inexistente"""
+    return discord.Embed(
+        title='⏳ Cotação indisponível',
+        description=f'Não foi possível obter a cotação atual agora. Tente {ticker} de novo em alguns segundos.',
+        color=discord.Color.orange()
+    )
+
 class Investimentos(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.pre_aquecer_cotacoes.start()
+    
+    def cog_unload(self):
+        self.pre_aquecer_cotacoes.cancel()
+    
+    @tasks.loop(minutes=1)
+    async def pre_aquecer_cotacoes(self):
+        """Renovar antes de vencer as cotações de todos os tickers em carteira, dos mais detidos para os menos"""
+        # Exceção que escapa do corpo para o tasks.loop de vez, sem aviso: só registrar
+        try:
+            detentores = db.contar_detentores()
+            tickers = sorted(detentores, key=detentores.get, reverse=True)
+            # Rodada a cada minuto com antecedência de um minuto: no pregão (validade de 2 min)
+            # a cotação de quem tem ação nunca chega a vencer no caminho dos comandos
+            await brapi.atualizar_cotacoes_async(tickers, antecedencia=60, maximo=MAXIMO_COTACOES_POR_RODADA)
+        except Exception as e:
+            print(f'❌ Erro no pré-aquecimento de cotações: {e!r}')
+    
+    @pre_aquecer_cotacoes.before_loop
+    async def antes_do_pre_aquecimento(self):
+        await self.bot.wait_until_ready()
     
     @commands.command(name='comprar', help='Comprar ação da Bolsa B3')
     async def comprar_acao(self, ctx, ticker: str, quantidade: int):
         """Comprar ação"""
-        usuario = db.obter_ou_criar_usuario(ctx.author.id, ctx.author.name)
+        if quantidade <= 0:
+            await ctx.send(embed=embed_quantidade_invalida())
+            return
+        db.obter_ou_criar_usuario(ctx.author.id, ctx.author.name)
         
-        # Validar ticker
-        cotacao = brapi.obter_cotacao(ticker)
+        # Validar ticker (negociar só com a cotação atual, nunca com a última conhecida)
+        try:
+            cotacao = await brapi.obter_cotacao_async(ticker, permitir_velha=False)
+            limitada = bool(cotacao and cotacao.get('desatualizada'))
+        except LimiteDeTaxa:
+            cotacao, limitada = None, True
+        if limitada:
+            await ctx.send(embed=embed_limite(ticker))
+            return
         if not cotacao:
             embed = discord.Embed(
                 title='❌ Erro',
@@ -31,24 +89,21 @@ class Investimentos(commands.Cog):
         preco = cotacao.get('regularMarketPrice', 0)
         custo_total = preco * quantidade
         
-        # Verificar saldo
-        if usuario['saldo'] < custo_total:
+        # Debitar só agora, depois da cotação: movimentar confere o saldo atual (outro
+        # !comprar ou !pix pode ter gastado durante o await) e não deixa ficar negativo
+        try:
+            saldos = db.movimentar([
+                (ctx.author.id, -custo_total, 'investimento', f'Compra de {quantidade} {ticker} @ {preco:.2f}')
+            ])
+        except SaldoInsuficiente as e:
             embed = discord.Embed(
                 title='❌ Saldo Insuficiente',
-                description=f'Você precisa de 💵 {custo_total:.2f}, mas tem apenas 💵 {usuario["saldo"]:.2f}',
+                description=f'Você precisa de 💵 {custo_total:.2f}, mas tem apenas 💵 {e.saldo:.2f}',
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
-        
-        # Executar compra
-        db.atualizar_saldo(
-            ctx.author.id,
-            -custo_total,
-            'investimento',
-            f'Compra de {quantidade} {ticker} @ {preco:.2f}'
-        )
-        db.comprar_acao(ctx.author.id, ticker, quantidade, preco)
+        db.adicionar_acao(ctx.author.id, ticker, quantidade, preco)
         
         embed = discord.Embed(
             title='✅ Compra Realizada!',
@@ -59,30 +114,33 @@ class Investimentos(commands.Cog):
         embed.add_field(name='Quantidade', value=f'📊 {quantidade}', inline=True)
         embed.add_field(name='Preço Unitário', value=f'💵 {preco:.2f}', inline=True)
         embed.add_field(name='Custo Total', value=f'💰 {custo_total:.2f}', inline=True)
-        embed.add_field(name='Novo Saldo', value=f'💵 {usuario["saldo"] - custo_total:.2f}', inline=True)
+        embed.add_field(name='Novo Saldo', value=f'💵 {saldos[ctx.author.id]:.2f}', inline=True)
         
         await ctx.send(embed=embed)
     
     @commands.command(name='vender', help='Vender ação')
     async def vender_acao(self, ctx, ticker: str, quantidade: int):
         """Vender ação"""
-        usuario = db.obter_ou_criar_usuario(ctx.author.id, ctx.author.name)
-        
-        # Verificar se possui ação
-        carteira = db.obter_carteira(ctx.author.id)
-        investimento = next((inv for inv in carteira if inv['ticker'] == ticker), None)
+        if quantidade <= 0:
+            await ctx.send(embed=embed_quantidade_invalida())
+            return
+        db.obter_ou_criar_usuario(ctx.author.id, ctx.author.name)
         
+        # Verificar se possui ação (antes de gastar uma consulta à API)
+        investimento = db.obter_carteira(ctx.author.id).get(ticker)
         if not investimento or investimento['quantidade'] < quantidade:
-            embed = discord.Embed(
-                title='❌ Quantidade Insuficiente',
-                description=f'Você não possui {quantidade} {ticker}',
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
+            await ctx.send(embed=embed_quantidade_insuficiente(quantidade, ticker))
             return
         
         # Obter preço atual
-        cotacao = brapi.obter_cotacao(ticker)
+        try:
+            cotacao = await brapi.obter_cotacao_async(ticker, permitir_velha=False)
+            limitada = bool(cotacao and cotacao.get('desatualizada'))
+        except LimiteDeTaxa:
+            cotacao, limitada = None, True
+        if limitada:
+            await ctx.send(embed=embed_limite(ticker))
+            return
         if not cotacao:
             embed = discord.Embed(
                 title='❌ Erro',
@@ -92,11 +150,18 @@ class Investimentos(commands.Cog):
             await ctx.send(embed=embed)
             return
         
+        # Outro !vender pode ter rodado durante o await: vender primeiro, conferindo a
+        # posição atual, e só creditar se a venda aconteceu
+        investimento = db.obter_carteira(ctx.author.id).get(ticker)
+        custo_medio = investimento['preco_medio'] if investimento else 0
+        if not investimento or not db.vender_acao(ctx.author.id, ticker, quantidade):
+            await ctx.send(embed=embed_quantidade_insuficiente(quantidade, ticker))
+            return
+        
         preco_atual = cotacao.get('regularMarketPrice', 0)
         receita_total = preco_atual * quantidade
         
         # Calcular lucro/prejuizo e imposto
-        custo_medio = investimento['preco_medio']
         custo_investido = custo_medio * quantidade
         lucro = receita_total - custo_investido
         imposto = max(0, int(lucro * 0.05)) if lucro > 0 else 0  # 5% de imposto sobre lucro
@@ -104,24 +169,10 @@ class Investimentos(commands.Cog):
         receita_liquida = receita_total - imposto
         
         # Executar venda
-        db.atualizar_saldo(
-            ctx.author.id,
-            receita_liquida,
-            'venda_acao',
-            f'Venda de {quantidade} {ticker} @ {preco_atual:.2f}'
-        )
-        
+        lancamentos = [(ctx.author.id, receita_total, 'venda_acao', f'Venda de {quantidade} {ticker} @ {preco_atual:.2f}')]
         if imposto > 0:
-            db.registrar_transacao(
-                ctx.author.id,
-                -imposto,
-                'imposto',
-                usuario['saldo'] + receita_total,
-                usuario['saldo'] + receita_liquida,
-                f'Imposto sobre venda de {ticker}'
-            )
-        
-        db.vender_acao(ctx.author.id, ticker, quantidade)
+            lancamentos.append((ctx.author.id, -imposto, 'imposto', f'Imposto sobre venda de {ticker}'))
+        saldos = db.movimentar(lancamentos)
         
         embed = discord.Embed(
             title='✅ Venda Realizada!',
@@ -135,7 +186,7 @@ class Investimentos(commands.Cog):
         embed.add_field(name='Lucro/Prejuizo', value=f'📊 {lucro:.2f}', inline=True)
         embed.add_field(name='Imposto (5%)', value=f'💼 {imposto:.2f}', inline=True)
         embed.add_field(name='Receita Líquida', value=f'✨ {receita_liquida:.2f}', inline=True)
-        embed.add_field(name='Novo Saldo', value=f'💵 {usuario["saldo"] + receita_liquida:.2f}', inline=False)
+        embed.add_field(name='Novo Saldo', value=f'💵 {saldos[ctx.author.id]:.2f}', inline=False)
         
         await ctx.send(embed=embed)
     
@@ -162,9 +213,15 @@ class Investimentos(commands.Cog):
             timestamp=datetime.now()
         )
         
+        # Todas as cotações de uma vez: cache primeiro, o resto em requisições multi-ticker
+        cotacoes = await brapi.obter_cotacoes_async(carteira.keys())
+        
         valor_total = 0
-        for inv in carteira:
-            cotacao = brapi.obter_cotacao(inv['ticker'])
+        desatualizada = False
+        for ticker, inv in carteira.items():
+            cotacao = cotacoes.get(ticker.upper())
+            # Fora do dict (ou marcada) = barrada pelo limite de requisições
+            desatualizada |= ticker.upper() not in cotacoes or bool(cotacao and cotacao.get('desatualizada'))
             if cotacao:
                 preco_atual = cotacao.get('regularMarketPrice', inv['preco_medio'])
             else:
@@ -180,7 +237,7 @@ class Investimentos(commands.Cog):
             sinal_lucro = '📈' if lucro >= 0 else '📉'
             
             embed.add_field(
-                name=f'{inv["ticker"]} - {quantidade} ações',
+                name=f'{ticker} - {quantidade} ações',
                 value=f'💵 {preco_atual:.2f} | Valor: {valor_posicao:.2f}\n{sinal_lucro} Lucro: {lucro:.2f} ({percentual:.2f}%)',
                 inline=False
             )
@@ -190,13 +247,19 @@ class Investimentos(commands.Cog):
             value=f'{valor_total:.2f}',
             inline=False
         )
+        if desatualizada:
+            embed.set_footer(text=AVISO_DESATUALIZADA)
         
         await ctx.send(embed=embed)
     
     @commands.command(name='buscar_acao', help='Buscar informações de uma ação')
     async def buscar_acao(self, ctx, ticker: str):
         """Buscar detalhes de uma ação"""
-        cotacao = brapi.obter_cotacao(ticker)
+        try:
+            cotacao = await brapi.obter_cotacao_async(ticker)
+        except LimiteDeTaxa:
+            await ctx.send(embed=embed_limite(ticker))
+            return
         
         if not cotacao:
             embed = discord.Embed(
@@ -219,6 +282,8 @@ class Investimentos(commands.Cog):
         embed.add_field(name='Máxima', value=f'{cotacao.get("regularMarketDayHigh", "N/A")}', inline=True)
         embed.add_field(name='Mínima', value=f'{cotacao.get("regularMarketDayLow", "N/A")}', inline=True)
         embed.add_field(name='Volume', value=f'{cotacao.get("regularMarketVolume", "N/A")}', inline=True)
+        if cotacao.get('desatualizada'):
+            embed.set_footer(text=AVISO_DESATUALIZADA)
         
         await ctx.send(embed=embed)
 
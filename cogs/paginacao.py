@@ -0,0 +1,71 @@
+# ============================================================================
+# PAGINAÇÃO - BOTÕES PARA NAVEGAR EM HISTÓRICOS LONGOS
+# ============================================================================
+#
+# Usado por !extrato e !pix_historico. Cada página só é buscada no Database
+# quando alguém clica: a busca (um `db.consultar`, aguardado) devolve os
+# itens e o cursor da página seguinte (keyset), então nada além da página
+# visível é carregado. Os cursores das páginas já vistas ficam guardados
+# para o botão de voltar.
+#
+# Fica fora das pastas de cogs: o bot só carrega extensões de cogs/<pasta>/.
+
+import discord
+
+
+class PaginasHistorico(discord.ui.View):
+    """Botões que buscam a página mais recente/mais antiga sob demanda"""
+
+    def __init__(self, autor_id, buscar, montar_embed, timeout=180):
+        super().__init__(timeout=timeout)
+        self.autor_id = autor_id
+        self.buscar = buscar              # cursor -> awaitable de (itens, cursor da próxima página ou None)
+        self.montar_embed = montar_embed  # (itens, número da página) -> discord.Embed
+        self.cursores = [None]            # Cursor de cada página já visitada
+        self.pagina = 0
+        self.proximo = None
+        self.mensagem = None
+
+    async def enviar(self, ctx):
+        """Buscar a primeira página e enviar com os botões (False se não houver itens)"""
+        itens, self.proximo = await self.buscar(None)
+        if not itens:
+            return False
+        self._atualizar_botoes()
+        self.mensagem = await ctx.send(embed=self.montar_embed(itens, 1), view=self)
+        return True
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.autor_id:
+            await interaction.response.send_message('Só quem pediu o histórico pode navegar nele.', ephemeral=True)
+            return False
+        return True
+
+    async def _mostrar(self, interaction, pagina):
+        itens, self.proximo = await self.buscar(self.cursores[pagina])
+        self.pagina = pagina
+        self._atualizar_botoes()
+        await interaction.response.edit_message(embed=self.montar_embed(itens, pagina + 1), view=self)
+
+    def _atualizar_botoes(self):
+        self.mais_recentes.disabled = self.pagina == 0
+        self.mais_antigas.disabled = self.proximo is None
+
+    @discord.ui.button(label='◀ Mais recentes', style=discord.ButtonStyle.secondary)
+    async def mais_recentes(self, interaction, button):
+        await self._mostrar(interaction, self.pagina - 1)
+
+    @discord.ui.button(label='Mais antigas ▶', style=discord.ButtonStyle.primary)
+    async def mais_antigas(self, interaction, button):
+        del self.cursores[self.pagina + 1:]
+        self.cursores.append(self.proximo)
+        await self._mostrar(interaction, self.pagina + 1)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.mensagem is not None:
+            try:
+                await self.mensagem.edit(view=self)
+            except discord.HTTPException:
+                pass
@@ -23,15 +23,11 @@ class AdminPix(commands.Cog):
         
         if user:
             # Auditoria de usuário específico
-            historico = db.obter_historico_pix(user.id, limite)
+            historico = await db.consultar('obter_historico_pix', user.id, limite)
             titulo = f'🔍 Auditoria PIX - {user.name}'
         else:
             # Auditoria geral do servidor
-            historico = list(
-                db.pix_transacoes.find({
-                    'servidor_id': ctx.guild.id
-                }).sort('data', -1).limit(limite)
-            )
+            historico = await db.consultar('obter_pix_servidor', ctx.guild.id, limite=limite)
             titulo = f'🔍 Auditoria PIX - {ctx.guild.name}'
         
         if not historico:
@@ -93,12 +89,7 @@ class AdminPix(commands.Cog):
         data_inicio = datetime.now() - timedelta(days=dias)
         
         # Buscar todas transações do período
-        transacoes = list(
-            db.pix_transacoes.find({
-                'servidor_id': ctx.guild.id,
-                'data': {'$gte': data_inicio}
-            }).sort('data', -1)
-        )
+        transacoes = await db.consultar('obter_pix_servidor', ctx.guild.id, data_inicio=data_inicio)
         
         if not transacoes:
             await ctx.send('Nenhuma transação encontrada no período!')
@@ -217,11 +208,26 @@ class AdminPix(commands.Cog):
                 )
             
             embed.add_field(
-                name='🔥 Usuários Muito Ativos (>20 PIX)',
+                name='🔥 Usuários Muito Ativos (>20 PIX em 24h)',
                 value='\n'.join(frequentes_text) if frequentes_text else 'Nenhum',
                 inline=False
             )
         
+        # Alertas de janela (limites de quantidade/volume cruzados)
+        if suspeitos.get('alertas'):
+            alertas_text = []
+            for alerta in suspeitos['alertas'][:5]:
+                valor = f"{alerta['valor']} PIX" if alerta['tipo'] == 'quantidade' else f"💵 {alerta['valor']:.2f}"
+                alertas_text.append(
+                    f"<@{alerta['user_id']}>: {valor} em {alerta['janela']} - {alerta['data'].strftime('%d/%m %H:%M')}"
+                )
+            
+            embed.add_field(
+                name='⏱️ Alertas Recentes',
+                value='\n'.join(alertas_text),
+                inline=False
+            )
+        
         embed.set_footer(text='⚠️ Revisar manualmente transações suspeitas')
         
         await ctx.send(embed=embed)
@@ -237,7 +243,7 @@ class AdminPix(commands.Cog):
         data_inicio = datetime.now() - timedelta(days=dias)
         data_fim = datetime.now()
         
-        relatorio = db.obter_relatorio_pix_servidor(ctx.guild.id, data_inicio, data_fim)
+        relatorio = await db.consultar('obter_relatorio_pix_servidor', ctx.guild.id, data_inicio, data_fim)
         
         embed = discord.Embed(
             title=f'📊 Estatísticas PIX - {ctx.guild.name}',
@@ -289,10 +295,7 @@ class AdminPix(commands.Cog):
         usuario = db.obter_ou_criar_usuario(user.id, user.name)
         
         # Adicionar flag de bloqueio
-        db.usuarios.update_one(
-            {'user_id': user.id},
-            {'$set': {'pix_bloqueado': True, 'pix_bloqueio_motivo': motivo}}
-        )
+        db.bloquear_usuario_pix(user.id, motivo)
         
         embed = discord.Embed(
             title='🔒 Usuário Bloqueado',
@@ -323,10 +326,7 @@ class AdminPix(commands.Cog):
     async def pix_desbloquear(self, ctx, user: discord.User):
         """Desbloquear usuário"""
         
-        db.usuarios.update_one(
-            {'user_id': user.id},
-            {'$set': {'pix_bloqueado': False}, '$unset': {'pix_bloqueio_motivo': ''}}
-        )
+        db.desbloquear_usuario_pix(user.id)
         
         embed = discord.Embed(
             title='🔓 Usuário Desbloqueado',
@@ -4,7 +4,8 @@
 
 import discord
 from discord.ext import commands
-from database import db
+from cogs.paginacao import PaginasHistorico
+from database import db, Credito, Debito, Experiencia, RegistroPix, SaldoInsuficiente
 from datetime import datetime
 import re
 
@@ -180,9 +181,35 @@ class Pix(commands.Cog):
         # ========== EXECUTAR TRANSAÇÃO ==========
         
         try:
-            # Verificar saldo novamente (pode ter mudado durante confirmação)
-            remetente_atualizado = db.obter_usuario(ctx.author.id)
-            if remetente_atualizado['saldo'] < valor:
+            # Débito, taxa, crédito, registro do PIX e XP num único lote atômico;
+            # aplicar_lote confere o saldo de novo (pode ter mudado durante a confirmação) e
+            # aplica tudo na mesma chamada síncrona, sem outro comando rodando no meio
+            descricao_pix = descricao or "Sem descrição"
+            operacoes = [
+                Debito(ctx.author.id, valor_liquido, 'pix_enviado', f'PIX para {destinatario.name}: {descricao_pix}'),
+                Credito(destinatario.id, valor_liquido, 'pix_recebido', f'PIX de {ctx.author.name}: {descricao_pix}'),
+                RegistroPix(
+                    remetente_id=ctx.author.id,
+                    remetente_nome=ctx.author.name,
+                    destinatario_id=destinatario.id,
+                    destinatario_nome=destinatario.name,
+                    valor_bruto=valor,
+                    taxa=taxa,
+                    valor_liquido=valor_liquido,
+                    descricao=descricao_pix,
+                    servidor_id=ctx.guild.id if ctx.guild else None,
+                    servidor_nome=ctx.guild.name if ctx.guild else "DM",
+                    canal_id=ctx.channel.id,
+                    mensagem_id=ctx.message.id
+                ),
+                Experiencia(ctx.author.id, 10),
+                Experiencia(destinatario.id, 5)
+            ]
+            if taxa:
+                operacoes.insert(1, Debito(ctx.author.id, taxa, 'taxa_pix', f'Taxa sobre transferência de {valor:.2f}'))
+            try:
+                saldos = db.aplicar_lote(operacoes)
+            except SaldoInsuficiente:
                 embed = discord.Embed(
                     title='❌ Saldo Insuficiente',
                     description='Seu saldo mudou durante a confirmação!',
@@ -191,52 +218,6 @@ class Pix(commands.Cog):
                 await ctx.send(embed=embed)
                 return
             
-            # Debitar do remetente (valor total = valor + taxa já incluída)
-            db.atualizar_saldo(
-                ctx.author.id,
-                -valor,
-                'pix_enviado',
-                f'PIX para {destinatario.name}: {descricao or "Sem descrição"}'
-            )
-            
-            # Registrar taxa de transação
-            db.registrar_transacao(
-                ctx.author.id,
-                -taxa,
-                'taxa_pix',
-                remetente_atualizado['saldo'] - valor,
-                remetente_atualizado['saldo'] - valor,
-                f'Taxa de 1% sobre PIX de {valor:.2f}'
-            )
-            
-            # Creditar ao destinatário (valor líquido, sem a taxa)
-            db.atualizar_saldo(
-                destinatario.id,
-                valor_liquido,
-                'pix_recebido',
-                f'PIX de {ctx.author.name}: {descricao or "Sem descrição"}'
-            )
-            
-            # Registrar transação PIX completa na coleção específica
-            db.registrar_transacao_pix(
-                remetente_id=ctx.author.id,
-                remetente_nome=ctx.author.name,
-                destinatario_id=destinatario.id,
-                destinatario_nome=destinatario.name,
-                valor_bruto=valor,
-                taxa=taxa,
-                valor_liquido=valor_liquido,
-                descricao=descricao or "Sem descrição",
-                servidor_id=ctx.guild.id if ctx.guild else None,
-                servidor_nome=ctx.guild.name if ctx.guild else "DM",
-                canal_id=ctx.channel.id,
-                mensagem_id=ctx.message.id
-            )
-            
-            # Adicionar experiência
-            db.adicionar_experiencia(ctx.author.id, 10)
-            db.adicionar_experiencia(destinatario.id, 5)
-            
             # ========== EMBED DE SUCESSO ==========
             
             embed_sucesso = discord.Embed(
@@ -278,7 +259,7 @@ class Pix(commands.Cog):
             
             embed_sucesso.add_field(
                 name='📊 Novo Saldo (Remetente)',
-                value=f'💵 {remetente_atualizado["saldo"] - valor:.2f}',
+                value=f'💵 {saldos[ctx.author.id]:.2f}',
                 inline=True
             )
             
@@ -339,61 +320,63 @@ class Pix(commands.Cog):
             print(f'Erro no PIX: {e}')
     
     @commands.command(name='pix_historico', help='Ver histórico completo de PIX enviados e recebidos')
-    async def pix_historico(self, ctx, limite: int = 10):
-        """Ver histórico de PIX (enviados e recebidos)"""
+    async def pix_historico(self, ctx, por_pagina: int = 10):
+        """Ver histórico de PIX (enviados e recebidos) paginado com botões"""
         
-        # Validar limite
-        if limite < 1 or limite > 50:
-            limite = 10
+        # Validar tamanho da página (um embed comporta no máximo 25 campos)
+        if por_pagina < 1 or por_pagina > 25:
+            por_pagina = 10
         
-        historico = db.obter_historico_pix(ctx.author.id, limite)
+        def montar_embed(historico, pagina):
+            embed = discord.Embed(
+                title=f'📊 Histórico PIX de {ctx.author.name}',
+                description=f'Página {pagina} • {len(historico)} transações',
+                color=discord.Color.blue(),
+                timestamp=datetime.now()
+            )
+            
+            for trans in historico:
+                data = trans['data']
+                if isinstance(data, str):
+                    data = datetime.fromisoformat(data)
+                
+                # Determinar se foi enviado ou recebido
+                if trans['remetente_id'] == ctx.author.id:
+                    tipo_emoji = '📤'
+                    tipo_texto = 'ENVIADO'
+                    outro_usuario = trans['destinatario_nome']
+                    valor_display = f'-{trans["valor_bruto"]:.2f}'
+                else:
+                    tipo_emoji = '📥'
+                    tipo_texto = 'RECEBIDO'
+                    outro_usuario = trans['remetente_nome']
+                    valor_display = f'+{trans["valor_liquido"]:.2f}'
+                
+                embed.add_field(
+                    name=f'{tipo_emoji} {tipo_texto} - {data.strftime("%d/%m/%y %H:%M")}',
+                    value=(
+                        f'**{outro_usuario}**\n'
+                        f'💵 {valor_display}\n'
+                        f'📝 {trans["descricao"][:50]}'
+                    ),
+                    inline=False
+                )
+            
+            embed.set_footer(text='Use !extrato para ver todas as transações')
+            return embed
         
-        if not historico:
+        paginas = PaginasHistorico(
+            ctx.author.id,
+            lambda cursor: db.consultar('obter_pix_pagina', ctx.author.id, por_pagina, cursor),
+            montar_embed
+        )
+        if not await paginas.enviar(ctx):
             embed = discord.Embed(
                 title='📋 Histórico Vazio',
                 description='Você ainda não realizou nenhuma transação PIX.',
                 color=discord.Color.gray()
             )
             await ctx.send(embed=embed)
-            return
-        
-        embed = discord.Embed(
-            title=f'📊 Histórico PIX de {ctx.author.name}',
-            description=f'Últimas {len(historico)} transações',
-            color=discord.Color.blue(),
-            timestamp=datetime.now()
-        )
-        
-        for trans in historico:
-            data = trans['data']
-            if isinstance(data, str):
-                data = datetime.fromisoformat(data)
-            
-            # Determinar se foi enviado ou recebido
-            if trans['remetente_id'] == ctx.author.id:
-                tipo_emoji = '📤'
-                tipo_texto = 'ENVIADO'
-                outro_usuario = trans['destinatario_nome']
-                valor_display = f'-{trans["valor_bruto"]:.2f}'
-            else:
-                tipo_emoji = '📥'
-                tipo_texto = 'RECEBIDO'
-                outro_usuario = trans['remetente_nome']
-                valor_display = f'+{trans["valor_liquido"]:.2f}'
-            
-            embed.add_field(
-                name=f'{tipo_emoji} {tipo_texto} - {data.strftime("%d/%m/%y %H:%M")}',
-                value=(
-                    f'**{outro_usuario}**\n'
-                    f'💵 {valor_display}\n'
-                    f'📝 {trans["descricao"][:50]}'
-                ),
-                inline=False
-            )
-        
-        embed.set_footer(text='Use !extrato para ver todas as transações')
-        
-        await ctx.send(embed=embed)
     
     @commands.command(name='pix_stats', help='Ver estatísticas de PIX')
     async def pix_stats(self, ctx):
@@ -1,5 +1,223 @@
-from datetime import datetime
-from collections import defaultdict
+import bisect
+from array import array
+import uuid
+from datetime import datetime, time, timedelta
+from collections import Counter, defaultdict, deque, namedtuple
+from collections.abc import Mapping, MutableMapping
+from itertools import islice
+from types import MappingProxyType
+
+from antilavagem import DetectorPix
+from arquivo_frio import ArquivoFrio
+from checkpoints_saldo import CheckpointsUsuario
+from pix_particionado import PixParticionado
+from ranking import Ranking
+from transacoes_colunares import SALDO_DESCONHECIDO, TransacoesColunares, para_datetime, para_timestamp
+
+# Quantas transações recentes ficam no índice de cada usuário
+LIMITE_INDICE_USUARIO = 500
+# Histórico mantido em memória quando o arquivo frio está ativo
+JANELA_QUENTE_PADRAO = timedelta(days=30)
+
+class Usuario(MutableMapping):
+    """Registro compacto de usuário (__slots__) com acesso estilo dict
+
+    Os cogs continuam usando usuario['saldo'], usuario['experiencia'] etc.
+    'experiencia' é só um alias de 'xp' e data_criacao fica guardada como
+    timestamp, convertida para datetime na leitura.
+    """
+    __slots__ = ('user_id', 'nome', 'saldo', 'xp', 'nivel', 'streak_daily',
+                 'timestamp_criacao', 'ultima_recompensa_daily', 'extras')
+
+    CAMPOS = ('user_id', 'nome', 'saldo', 'xp', 'experiencia', 'nivel', 'streak_daily', 'data_criacao')
+
+    def __init__(self, user_id, nome, saldo=1000.00, xp=0, nivel=1, streak_daily=0, timestamp_criacao=None):
+        self.user_id = user_id
+        self.nome = nome
+        self.saldo = saldo
+        self.xp = xp
+        self.nivel = nivel
+        self.streak_daily = streak_daily
+        self.timestamp_criacao = datetime.now().timestamp() if timestamp_criacao is None else timestamp_criacao
+        self.ultima_recompensa_daily = None
+        self.extras = None  # dict criado só quando algum campo avulso é definido
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Converter o formato antigo (dict) vindo de journal, snapshot ou Mongo"""
+        usuario = cls(dados['user_id'], dados['nome'])
+        for chave, valor in dados.items():
+            if chave != 'user_id':
+                usuario[chave] = valor
+        return usuario
+
+    def __getitem__(self, chave):
+        if chave == 'experiencia':
+            return self.xp
+        if chave == 'data_criacao':
+            return datetime.fromtimestamp(self.timestamp_criacao)
+        if chave == 'ultima_recompensa_daily':
+            if self.ultima_recompensa_daily is None:
+                raise KeyError(chave)
+            return self.ultima_recompensa_daily
+        if chave in self.CAMPOS:
+            return getattr(self, chave)
+        if self.extras is not None and chave in self.extras:
+            return self.extras[chave]
+        raise KeyError(chave)
+
+    def __setitem__(self, chave, valor):
+        if chave == 'experiencia':
+            self.xp = valor
+        elif chave == 'data_criacao':
+            if isinstance(valor, str):
+                valor = datetime.fromisoformat(valor)
+            self.timestamp_criacao = valor.timestamp()
+        elif chave == 'ultima_recompensa_daily' or chave in self.CAMPOS:
+            setattr(self, chave, valor)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[chave] = valor
+
+    def __delitem__(self, chave):
+        if chave == 'ultima_recompensa_daily' and self.ultima_recompensa_daily is not None:
+            self.ultima_recompensa_daily = None
+        elif self.extras is not None and chave in self.extras:
+            del self.extras[chave]
+        else:
+            raise KeyError(chave)
+
+    def __iter__(self):
+        yield from self.CAMPOS
+        if self.ultima_recompensa_daily is not None:
+            yield 'ultima_recompensa_daily'
+        if self.extras:
+            yield from self.extras
+
+    def __len__(self):
+        return len(self.CAMPOS) + (self.ultima_recompensa_daily is not None) + len(self.extras or ())
+
+    def __repr__(self):
+        return f'Usuario({dict(self)!r})'
+
+class UsuarioPadrao(Mapping):
+    """Visão somente leitura de quem ainda não tem conta: valores iniciais, nada é criado
+
+    Usada por consultar_usuario para !saldo/!perfil de quem nunca jogou. Os
+    valores vêm de um dict imutável compartilhado; cada visão só guarda id e nome.
+    """
+    __slots__ = ('user_id', 'nome')
+
+    VALORES = MappingProxyType({'saldo': 1000.00, 'xp': 0, 'experiencia': 0, 'nivel': 1, 'streak_daily': 0})
+
+    def __init__(self, user_id, nome):
+        self.user_id = user_id
+        self.nome = nome
+
+    def __getitem__(self, chave):
+        if chave == 'user_id':
+            return self.user_id
+        if chave == 'nome':
+            return self.nome
+        if chave == 'data_criacao':
+            return datetime.now()
+        return self.VALORES[chave]
+
+    def __iter__(self):
+        return iter(Usuario.CAMPOS)
+
+    def __len__(self):
+        return len(Usuario.CAMPOS)
+
+    def __repr__(self):
+        return f'UsuarioPadrao({self.user_id!r}, {self.nome!r})'
+
+class SaldoInsuficiente(ValueError):
+    """Lançamento deixaria o saldo de um usuário negativo"""
+
+    def __init__(self, user_id, saldo, necessario):
+        super().__init__(f'Saldo insuficiente para {user_id}: {saldo:.2f} < {necessario:.2f}')
+        self.user_id = user_id
+        self.saldo = saldo
+        self.necessario = necessario
+
+# Operações aceitas por Database.aplicar_lote
+Lancamento = namedtuple('Lancamento', 'user_id valor tipo descricao', defaults=(None, ''))  # valor com sinal
+Debito = namedtuple('Debito', 'user_id valor tipo descricao', defaults=(None, ''))
+Credito = namedtuple('Credito', 'user_id valor tipo descricao', defaults=(None, ''))
+Experiencia = namedtuple('Experiencia', 'user_id quantidade')
+RegistroPix = namedtuple('RegistroPix', (
+    'remetente_id remetente_nome destinatario_id destinatario_nome valor_bruto taxa valor_liquido '
+    'descricao servidor_id servidor_nome canal_id mensagem_id'
+))
+
+def normalizar_lote(operacoes):
+    """Separar as operações de um lote em (lançamentos, experiências, PIX) com tipos simples"""
+    lancamentos, experiencias, pix = [], [], []
+    for operacao in operacoes:
+        if isinstance(operacao, (Debito, Credito)):
+            if operacao.valor < 0:
+                raise ValueError(f'Valor negativo em {operacao!r}')
+            sinal = -1 if isinstance(operacao, Debito) else 1
+            lancamentos.append((operacao.user_id, sinal * operacao.valor, operacao.tipo, operacao.descricao))
+        elif isinstance(operacao, Lancamento):
+            lancamentos.append(tuple(operacao))
+        elif isinstance(operacao, Experiencia):
+            experiencias.append(tuple(operacao))
+        elif isinstance(operacao, RegistroPix):
+            pix.append(operacao)
+        else:
+            raise TypeError(f'Operação de lote desconhecida: {operacao!r}')
+    return lancamentos, experiencias, pix
+
+def montar_pix(registro, data):
+    """Registro de PIX no formato salvo (dict) a partir de um RegistroPix"""
+    return dict(registro._asdict(), data=data, status='concluido')
+
+def fechar_pagina(pagina, tamanho):
+    """Cortar a página (lida com um item a mais) e montar o cursor da próxima, ou None no fim
+
+    O cursor é (timestamp, posição) do último item: a próxima página começa
+    logo antes dele, sem contar quantos itens vieram antes (keyset).
+    """
+    if len(pagina) <= tamanho:
+        return pagina, None
+    del pagina[tamanho:]
+    ultimo = pagina[-1]
+    return pagina, (para_timestamp(ultimo['data']), ultimo.get('posicao', -1))
+
+def _antes_do_cursor(registros, cursor):
+    """Registros do arquivo frio (mais recentes primeiro) que vêm depois do cursor na paginação"""
+    for registro in registros:
+        if cursor is None or (para_timestamp(registro['data']), registro.get('posicao', -1)) < cursor:
+            yield registro
+
+class EstatisticasPix:
+    """Contadores de PIX de um usuário, atualizados a cada transação"""
+    __slots__ = ('enviados', 'recebidos', 'valor_enviado', 'valor_recebido',
+                 'taxas', 'maior_enviado', 'maior_recebido')
+
+    def __init__(self):
+        self.enviados = 0
+        self.recebidos = 0
+        self.valor_enviado = 0.0
+        self.valor_recebido = 0.0
+        self.taxas = 0.0
+        self.maior_enviado = 0.0
+        self.maior_recebido = 0.0
+
+    def como_dict(self):
+        return {
+            'total_enviados': self.enviados,
+            'total_recebidos': self.recebidos,
+            'valor_total_enviado': self.valor_enviado,
+            'valor_total_recebido': self.valor_recebido,
+            'total_taxas': self.taxas,
+            'balanco': self.valor_recebido - self.valor_enviado,
+            'maior_pix_enviado': self.maior_enviado,
+            'maior_pix_recebido': self.maior_recebido
+        }
 
 class Database:
     """Database em memória - sem MongoDB"""
@@ -7,34 +225,261 @@ class Database:
     def __init__(self):
         # Dados dos usuários
         self.usuarios = {}
+        # Placares mantidos a cada alteração de saldo/xp
+        self._ranking_saldo = Ranking()
+        self._ranking_xp = Ranking()
         
-        # Transações gerais
-        self.transacoes_list = []
+        # Transações gerais (armazenamento colunar)
+        self.transacoes = TransacoesColunares()
+        # Índice por usuário: posições das últimas transações no log
+        self._indice_transacoes = defaultdict(lambda: deque(maxlen=LIMITE_INDICE_USUARIO))
+        self._indice_pendente = False  # True até a primeira consulta após um snapshot mapeado
+        # Checkpoints de saldo por usuário e quem tem intervalos ainda não reconciliados
+        self._checkpoints = {}
+        self._anteriores = array('q')  # Por linha do log: posição da transação anterior do mesmo usuário
+        self._reconciliar_pendentes = set()
         
         # Investimentos
         self.investimentos = {}
+        self._detentores = None  # Counter ticker -> carteiras com ele; None = montar no primeiro uso
         
         # PIX
         self.pix_transacoes_list = []
+        self._pix_base = 0  # Posição global do primeiro PIX ainda em memória
+        self._pix_por_usuario = {}  # user_id -> array('q') de posições dos PIX enviados e recebidos
+        self._pix_por_servidor = PixParticionado()
+        self._estatisticas_pix = {}  # user_id -> EstatisticasPix
+        self._detector_pix = DetectorPix()
         self.usuarios_bloqueados_pix = set()
         
+        # Apostas PvP
+        self.apostas = {}
+        
+        # Journal de mutações (opcional, ver ativar_journal)
+        self.journal = None
+        
+        # Histórico antigo em segmentos no disco (opcional, ver ativar_arquivo_frio)
+        self._frio_transacoes = None
+        self._frio_pix = None
+        self.janela_quente = JANELA_QUENTE_PADRAO
+        self.tamanho_segmento = 50_000
+        self._proximo_arquivamento = None
+        
         print("✅ Database em memória inicializado!")
 
+    # ===== PERSISTÊNCIA =====
+    def ativar_journal(self, journal):
+        """Reconstruir o estado a partir do journal e passar a registrar mutações"""
+        estado, registros = journal.carregar()
+        if estado is not None:
+            self._carregar_estado(estado)
+        
+        total = 0
+        for registro in registros:
+            self._aplicar_registro(registro)
+            total += 1
+        
+        self.journal = journal
+        journal.iniciar()
+        print(f"✅ Journal carregado: {len(self.usuarios)} usuários, {total} registros reaplicados")
+
+    def _registrar_mutacao(self, *registro):
+        """Enviar uma mutação já aplicada em memória para o journal"""
+        if self.journal is None:
+            return
+        self.journal.registrar(registro)
+        if self.journal.precisa_snapshot():
+            self.journal.solicitar_snapshot(self._estado())
+
+    def _aplicar_registro(self, registro):
+        """Reaplicar um registro do journal (o journal ainda está desativado)"""
+        operacao = registro[0]
+        if operacao == 'usuario':
+            self._inserir_usuario(registro[1])
+        elif operacao == 'transacao':
+            self._inserir_transacao(registro[1])
+        elif operacao == 'pix':
+            self._inserir_pix(registro[1])
+        elif operacao == 'aposta':
+            self.apostas[registro[1]['_id']] = registro[1]
+        elif operacao == 'movimentacao':
+            self._aplicar_lancamentos(*registro[1:])
+        elif operacao == 'lote':
+            self._aplicar_lote(*registro[1:])
+        else:
+            # Operações determinísticas: reaplicar o próprio método público
+            getattr(self, operacao)(*registro[1:])
+
+    def _estado(self):
+        return {
+            'usuarios': self.usuarios,
+            'transacoes': self.transacoes,
+            'investimentos': self.investimentos,
+            'pix_transacoes_list': self.pix_transacoes_list,
+            'pix_base': self._pix_base,
+            # Agregados de PIX incluem o que já foi para o arquivo frio
+            'pix_por_servidor': self._pix_por_servidor,
+            'estatisticas_pix': self._estatisticas_pix,
+            'usuarios_bloqueados_pix': self.usuarios_bloqueados_pix,
+            'apostas': self.apostas
+        }
+
+    def _carregar_estado(self, estado):
+        if 'snapshot' in estado:
+            # Snapshot mapeado (snapshot_binario): usuários viram objetos no
+            # primeiro acesso e os rankings só são montados na primeira consulta
+            snapshot = estado['snapshot']
+            self.usuarios = estado['usuarios']
+            self._ranking_saldo.carregar_depois(lambda: snapshot.valores('saldo'))
+            self._ranking_xp.carregar_depois(lambda: snapshot.valores('xp'))
+        else:
+            self.usuarios = {}
+            for usuario in estado['usuarios'].values():
+                self._inserir_usuario(usuario)
+        self.investimentos = estado['investimentos']
+        self._detentores = None
+        self.usuarios_bloqueados_pix = estado['usuarios_bloqueados_pix']
+        self.apostas = estado.get('apostas', {})
+        
+        self._indice_transacoes.clear()
+        self._indice_pendente = False
+        if 'snapshot' in estado:
+            self.transacoes = estado['transacoes']
+            self._indice_pendente = True  # Ver _garantir_indice_transacoes
+        elif 'transacoes' in estado:
+            self.transacoes = estado['transacoes']
+            self._montar_indice_transacoes()
+        else:
+            # Snapshot antigo, com uma lista de dicts
+            self.transacoes = TransacoesColunares()
+            for transacao in estado['transacoes_list']:
+                self._inserir_transacao(transacao)
+        
+        self.pix_transacoes_list = []
+        self._pix_base = estado.get('pix_base', 0)
+        self._pix_por_usuario = {}
+        self._pix_por_servidor = PixParticionado()
+        self._estatisticas_pix = {}
+        self._detector_pix = DetectorPix()
+        if 'estatisticas_pix' in estado:
+            self._pix_por_servidor = estado['pix_por_servidor']
+            self._estatisticas_pix = estado['estatisticas_pix']
+            self.pix_transacoes_list = list(estado['pix_transacoes_list'])
+            for posicao, transacao_pix in enumerate(self.pix_transacoes_list, start=self._pix_base):
+                self._indexar_pix(posicao, transacao_pix)
+                self._detector_pix.registrar(transacao_pix)
+        else:
+            for transacao_pix in estado['pix_transacoes_list']:
+                self._inserir_pix(transacao_pix)
+
+    # ===== ARQUIVO FRIO =====
+    def ativar_arquivo_frio(self, diretorio, janela_quente=JANELA_QUENTE_PADRAO, tamanho_segmento=50_000):
+        """Manter só `janela_quente` de histórico em memória e arquivar o resto em disco"""
+        self._frio_transacoes = ArquivoFrio(diretorio, 'transacoes', chaves=lambda t: (t['user_id'],))
+        self._frio_pix = ArquivoFrio(
+            diretorio, 'pix',
+            chaves=lambda p: (p['remetente_id'], p['destinatario_id']),
+            grupo=lambda p: p['servidor_id']
+        )
+        self.janela_quente = janela_quente
+        self.tamanho_segmento = tamanho_segmento
+        self.arquivar()
+        print(f"✅ Arquivo frio ativo: {len(self._frio_transacoes)} transações e {len(self._frio_pix)} PIX em disco")
+
+    async def consultar(self, metodo, *args, **kwargs):
+        """Rodar a consulta `metodo` num comando (o DatabaseMongo lê o histórico antigo numa thread)
+
+        Aqui o histórico antigo é o ArquivoFrio em disco local: a consulta roda direto.
+        """
+        return getattr(self, metodo)(*args, **kwargs)
+
+    def _verificar_arquivamento(self, data):
+        if self._proximo_arquivamento is not None and data >= self._proximo_arquivamento:
+            self.arquivar(data)
+
+    def arquivar(self, agora=None):
+        """Mover para o disco os registros anteriores à janela quente (em dias inteiros)"""
+        agora = agora or datetime.now()
+        corte = datetime.combine((agora - self.janela_quente).date(), time.min)
+        self._proximo_arquivamento = corte + timedelta(days=1) + self.janela_quente
+        
+        self._garantir_indice_transacoes()
+        # Transações: o que for anterior ao corte anterior já está em disco
+        # (ex: reaplicado do journal) e só é descartado
+        frio = self._frio_transacoes
+        ja_arquivado = frio.data_corte
+        corte_transacoes = max(corte, ja_arquivado) if ja_arquivado else corte
+        fim = self.transacoes.contar_anteriores(corte_transacoes)
+        inicio = self.transacoes.contar_anteriores(ja_arquivado) if ja_arquivado else 0
+        base = self.transacoes.base
+        frio.gravar(
+            [dict(self.transacoes[base + i], posicao=base + i) for i in range(inicio, fim)],
+            corte_transacoes, self.tamanho_segmento
+        )
+        self.transacoes.descartar_inicio(fim)
+        del self._anteriores[:fim]
+        base = self.transacoes.base
+        for user_id in list(self._indice_transacoes):
+            indice = self._indice_transacoes[user_id]
+            while indice and indice[0] < base:
+                indice.popleft()
+            if not indice:
+                del self._indice_transacoes[user_id]
+        
+        # PIX: as partições do dia ficam só com os totais
+        frio = self._frio_pix
+        ja_arquivado = frio.data_corte
+        corte_pix = max(corte, ja_arquivado) if ja_arquivado else corte
+        lista = self.pix_transacoes_list
+        fim = bisect.bisect_left(lista, corte_pix, key=lambda p: p['data'])
+        inicio = bisect.bisect_left(lista, ja_arquivado, key=lambda p: p['data']) if ja_arquivado else 0
+        # A posição global vai junto para a paginação continuar no arquivo frio
+        frio.gravar(
+            [dict(lista[i], posicao=self._pix_base + i) for i in range(inicio, fim)], corte_pix, self.tamanho_segmento
+        )
+        del lista[:fim]
+        self._pix_base += fim
+        for user_id in list(self._pix_por_usuario):
+            posicoes = self._pix_por_usuario[user_id]
+            del posicoes[:bisect.bisect_left(posicoes, self._pix_base)]
+            if not posicoes:
+                del self._pix_por_usuario[user_id]
+        self._pix_por_servidor.arquivar_ate(corte_pix.toordinal())
+
+    def _carregar_dia_pix(self, servidor_id, dia):
+        """PIX arquivados de um servidor em um dia (ordinal), em ordem cronológica"""
+        if self._frio_pix is None:
+            return []
+        inicio = datetime.fromordinal(dia)
+        return [
+            transacao_pix
+            for transacao_pix in self._frio_pix.iterar(inicio, inicio + timedelta(days=1), grupo=servidor_id)
+            if transacao_pix['servidor_id'] == servidor_id
+        ]
+
+    def _transacoes_frias(self, inicio=None, fim=None, user_id=None):
+        """Transações arquivadas no período (nada se o período está todo em memória)"""
+        frio = self._frio_transacoes
+        if frio is None or frio.corte is None or (inicio is not None and inicio >= frio.data_corte):
+            return
+        for transacao in frio.iterar(inicio, fim, chave=user_id):
+            if user_id is None or transacao['user_id'] == user_id:
+                yield transacao
+
     # ===== USUÁRIOS =====
     def criar_usuario(self, user_id, nome_usuario):
-        usuario = {
-            'user_id': user_id,
-            'nome': nome_usuario,
-            'saldo': 1000.00,
-            'xp': 0,
-            'experiencia': 0,  # Alias para compatibilidade
-            'nivel': 1,
-            'streak_daily': 0,
-            'data_criacao': datetime.now()
-        }
-        self.usuarios[user_id] = usuario
+        usuario = Usuario(user_id, nome_usuario)
+        self._inserir_usuario(usuario)
+        self._registrar_mutacao('usuario', dict(usuario))
         return usuario
 
+    def _inserir_usuario(self, usuario):
+        if not isinstance(usuario, Usuario):
+            usuario = Usuario.de_dict(usuario)
+        self.usuarios[usuario.user_id] = usuario
+        self._ranking_saldo.atualizar(usuario.user_id, usuario.saldo)
+        self._ranking_xp.atualizar(usuario.user_id, usuario.xp)
+
     def obter_usuario(self, user_id):
         if user_id not in self.usuarios:
             return self.criar_usuario(user_id, f"User{user_id}")
@@ -46,12 +491,27 @@ class Database:
             return self.criar_usuario(user_id, nome_usuario)
         return self.usuarios[user_id]
 
+    def consultar_usuario(self, user_id, nome_usuario=None):
+        """Usuário só para leitura: quem não tem conta recebe um UsuarioPadrao e nada é criado"""
+        if user_id not in self.usuarios:
+            return UsuarioPadrao(user_id, nome_usuario or f"User{user_id}")
+        return self.usuarios[user_id]
+
+    def atualizar_campos_usuario(self, user_id, campos):
+        """Definir campos avulsos do usuário (ex: ultima_recompensa_daily, streak_daily)"""
+        usuario = self.obter_usuario(user_id)
+        usuario.update(campos)
+        self._ranking_saldo.atualizar(user_id, usuario.saldo)
+        self._ranking_xp.atualizar(user_id, usuario.xp)
+        self._registrar_mutacao('atualizar_campos_usuario', user_id, dict(campos))
+
     def atualizar_saldo(self, user_id, valor, tipo=None, descricao=None, extra=None):
         """Atualizar saldo com suporte a múltiplos argumentos"""
         usuario = self.obter_usuario(user_id)
-        novo_saldo = usuario.get('saldo', 0) + valor
-        usuario['saldo'] = novo_saldo
-        
+        novo_saldo = usuario.saldo + valor
+        self._definir_saldo_interno(usuario, novo_saldo)
+        self._registrar_mutacao('atualizar_saldo', user_id, valor)
+            
         # Registrar transação se houver tipo
         if tipo:
             self.registrar_transacao(user_id, tipo, valor, descricao or "")
@@ -59,21 +519,32 @@ class Database:
         return novo_saldo
 
     def definir_saldo(self, user_id, valor):
-        usuario = self.obter_usuario(user_id)
-        usuario['saldo'] = valor
+        # Vira um ajuste no ledger para o histórico e a reconciliação continuarem batendo
+        ajuste = valor - self.obter_usuario(user_id).saldo
+        if ajuste:
+            self.atualizar_saldo(user_id, ajuste, 'ajuste_saldo', f'Saldo definido para {valor:.2f}')
+
+    def _definir_saldo_interno(self, usuario, valor):
+        usuario.saldo = valor
+        self._ranking_saldo.atualizar(usuario.user_id, valor)
+        self._reconciliar_pendentes.add(usuario.user_id)
 
     def obter_saldo(self, user_id):
-        usuario = self.obter_usuario(user_id)
-        return usuario.get('saldo', 0)
+        return self.consultar_usuario(user_id)['saldo']
 
     def adicionar_xp(self, user_id, xp):
+        self._adicionar_xp_interno(user_id, xp)
+        self._registrar_mutacao('adicionar_xp', user_id, xp)
+
+    def _adicionar_xp_interno(self, user_id, xp):
         usuario = self.obter_usuario(user_id)
-        usuario['xp'] = usuario.get('xp', 0) + xp
-        usuario['experiencia'] = usuario['xp']  # Manter sincronizado
+        usuario.xp += xp
+        self._ranking_xp.atualizar(user_id, usuario.xp)
 
     def adicionar_nivel(self, user_id):
         usuario = self.obter_usuario(user_id)
-        usuario['nivel'] = usuario.get('nivel', 1) + 1
+        usuario.nivel += 1
+        self._registrar_mutacao('adicionar_nivel', user_id)
 
     # ===== TRANSAÇÕES =====
     def registrar_transacao(self, user_id, tipo, valor, descricao=""):
@@ -82,34 +553,347 @@ class Database:
             'tipo': tipo,
             'valor': valor,
             'descricao': descricao,
-            'data': datetime.now()
+            'data': datetime.now(),
+            'saldo_posterior': self.consultar_usuario(user_id)['saldo']
         }
-        self.transacoes_list.append(transacao)
+        self._inserir_transacao(transacao)
+        self._registrar_mutacao('transacao', transacao)
         return transacao
 
+    def gravar_lote(self, variacoes, transacoes, experiencias=None, transacoes_pix=(), campos=None):
+        """Aplicar variações de saldo {user_id: valor}, xp {user_id: quantidade}, campos avulsos
+        {user_id: {campo: valor}}, transações e PIX já montados"""
+        for user_id, variacao in variacoes.items():
+            self.atualizar_saldo(user_id, variacao)
+        for user_id, quantidade in (experiencias or {}).items():
+            self.adicionar_xp(user_id, quantidade)
+        for user_id, campos_usuario in (campos or {}).items():
+            self.atualizar_campos_usuario(user_id, campos_usuario)
+        for transacao in transacoes:
+            self._inserir_transacao(transacao)
+            self._registrar_mutacao('transacao', transacao)
+        for transacao_pix in transacoes_pix:
+            self._inserir_pix(transacao_pix)
+            self._registrar_mutacao('pix', transacao_pix)
+
+    def _inserir_transacao(self, transacao):
+        posicao = self.transacoes.anexar(
+            transacao['user_id'], transacao['tipo'], transacao['valor'],
+            transacao['descricao'], transacao['data'], transacao.get('saldo_posterior')
+        )
+        if not self._indice_pendente:
+            self._indexar_transacao(posicao, transacao['user_id'])
+        self._verificar_arquivamento(transacao['data'])
+
+    def _indexar_transacao(self, posicao, user_id):
+        indice = self._indice_transacoes[user_id]
+        self._anteriores.append(indice[-1] if indice else -1)
+        indice.append(posicao)
+        centavos = self.transacoes.saldos[posicao - self.transacoes.base]
+        if centavos != SALDO_DESCONHECIDO:
+            checkpoints = self._checkpoints.get(user_id)
+            if checkpoints is None:
+                checkpoints = self._checkpoints[user_id] = CheckpointsUsuario()
+            checkpoints.registrar(posicao, self.transacoes.timestamps[posicao - self.transacoes.base], centavos)
+            self._reconciliar_pendentes.add(user_id)
+
+    def _montar_indice_transacoes(self):
+        """Remontar índice por usuário e checkpoints de saldo a partir do log em memória"""
+        self._indice_transacoes.clear()
+        self._checkpoints = {}
+        self._anteriores = array('q')
+        self._reconciliar_pendentes = set()
+        for posicao, user_id in enumerate(self.transacoes.user_ids, start=self.transacoes.base):
+            self._indexar_transacao(posicao, user_id)
+        self._indice_pendente = False
+
+    def _garantir_indice_transacoes(self):
+        """Montar o índice por usuário adiado no carregamento do snapshot mapeado"""
+        if self._indice_pendente:
+            self._montar_indice_transacoes()
+
+    def _ultimas_transacoes(self, user_id, limite):
+        """Últimas transações do usuário (mais antiga primeiro) em O(limite)"""
+        if limite <= 0:
+            return []
+        self._garantir_indice_transacoes()
+        indice = self._indice_transacoes.get(user_id) or ()
+        posicoes = list(islice(reversed(indice), limite))
+        transacoes = [self.transacoes[i] for i in reversed(posicoes)]
+        
+        # Completar com o arquivo frio, do segmento mais novo para o mais antigo
+        if len(transacoes) < limite and self._frio_transacoes is not None:
+            antigas = []
+            for transacao in self._frio_transacoes.iterar(chave=user_id, reverso=True):
+                if transacao['user_id'] == user_id:
+                    antigas.append(transacao)
+                    if len(antigas) + len(transacoes) >= limite:
+                        break
+            transacoes = antigas[::-1] + transacoes
+        return transacoes
+
     def obter_historico(self, user_id, limite=10):
-        return [t for t in self.transacoes_list if t['user_id'] == user_id][-limite:]
+        return self._ultimas_transacoes(user_id, limite)
 
     def obter_extrato(self, user_id, limite=50):
-        return [t for t in self.transacoes_list if t['user_id'] == user_id][-limite:]
+        return self._ultimas_transacoes(user_id, limite)
+
+    def obter_extrato_pagina(self, user_id, tamanho=10, cursor=None):
+        """Transações do usuário, mais recentes primeiro, logo antes de `cursor`
+
+        Retorna (transações, cursor da próxima página ou None). Em memória a
+        página segue o encadeamento por usuário do log (_anteriores), então
+        custa O(tamanho) em qualquer profundidade do histórico.
+        """
+        self._garantir_indice_transacoes()
+        transacoes = self.transacoes
+        base = transacoes.base
+        if cursor is None:
+            inicio = self._ultima_posicao_usuario(user_id)
+        else:
+            inicio = self._anteriores[cursor[1] - base] if cursor[1] >= base else -1
+        
+        pagina = []
+        for posicao in islice(self._posicoes_usuario(inicio, -1), tamanho + 1):
+            transacao = transacoes[posicao]
+            transacao['posicao'] = posicao
+            pagina.append(transacao)
+        
+        # Acabou a memória: continuar no arquivo frio (tudo lá é anterior à base)
+        if len(pagina) <= tamanho and self._frio_transacoes is not None:
+            cursor_frio = cursor if cursor is not None and cursor[1] < base else None
+            fim = None if cursor_frio is None else para_datetime(cursor_frio[0]) + timedelta(microseconds=1)
+            antigas = (
+                transacao
+                for transacao in self._frio_transacoes.iterar(fim=fim, chave=user_id, reverso=True)
+                if transacao['user_id'] == user_id
+            )
+            pagina.extend(islice(_antes_do_cursor(antigas, cursor_frio), tamanho + 1 - len(pagina)))
+        return fechar_pagina(pagina, tamanho)
+
+    def obter_totais_por_tipo(self, inicio=None, fim=None, user_id=None):
+        """Soma dos valores por tipo de transação no período [inicio, fim)"""
+        totais = self.transacoes.somar_por_tipo(inicio, fim, user_id)
+        for transacao in self._transacoes_frias(inicio, fim, user_id):
+            totais[transacao['tipo']] = totais.get(transacao['tipo'], 0) + transacao['valor']
+        return totais
+
+    def obter_totais_por_usuario(self, inicio=None, fim=None, tipo=None):
+        """Soma dos valores por usuário no período [inicio, fim)"""
+        totais = self.transacoes.somar_por_usuario(inicio, fim, tipo)
+        for transacao in self._transacoes_frias(inicio, fim):
+            if tipo is None or transacao['tipo'] == tipo:
+                totais[transacao['user_id']] = totais.get(transacao['user_id'], 0) + transacao['valor']
+        return totais
+
+    # ===== SALDO HISTÓRICO E RECONCILIAÇÃO =====
+    def _posicoes_usuario(self, posicao, ate):
+        """Posições do usuário de `posicao` para trás, enquanto > `ate` e ainda em memória"""
+        base = self.transacoes.base
+        while posicao > ate and posicao >= base:
+            yield posicao
+            posicao = self._anteriores[posicao - base]
+
+    def _ultima_posicao_usuario(self, user_id):
+        indice = self._indice_transacoes.get(user_id)
+        return indice[-1] if indice else -1
+
+    def obter_saldo_em(self, user_id, data):
+        """Saldo do usuário logo após sua última transação até `data` (None se não houver)"""
+        self._garantir_indice_transacoes()
+        transacoes = self.transacoes
+        timestamp = para_timestamp(data)
+        checkpoints = self._checkpoints.get(user_id)
+        i = checkpoints.anterior(timestamp) if checkpoints else -1
+        if i < 0:
+            # Antes do primeiro checkpoint em memória: só o arquivo frio pode responder
+            return self._saldo_frio(user_id, None, data)
+
+        # Do próximo checkpoint (ou da última transação) volta no máximo um intervalo
+        posicao, timestamp_checkpoint, centavos = checkpoints[i]
+        inicio = checkpoints[i + 1][0] if i + 1 < len(checkpoints) else self._ultima_posicao_usuario(user_id)
+        for p in self._posicoes_usuario(inicio, posicao):
+            if transacoes.timestamps[p - transacoes.base] <= timestamp and transacoes.saldo(p) is not None:
+                return transacoes.saldo(p)
+        if posicao + 1 < transacoes.base:
+            # O começo do intervalo já foi para o arquivo frio
+            saldo = self._saldo_frio(user_id, para_datetime(timestamp_checkpoint), data)
+            if saldo is not None:
+                return saldo
+        return centavos / 100
+
+    def _saldo_frio(self, user_id, inicio, data):
+        """Saldo posterior da última transação arquivada do usuário em [inicio, data]"""
+        if self._frio_transacoes is None:
+            return None
+        fim = data + timedelta(microseconds=1)
+        for transacao in self._frio_transacoes.iterar(inicio, fim, chave=user_id, reverso=True):
+            if transacao['user_id'] == user_id and transacao.get('saldo_posterior') is not None:
+                return transacao['saldo_posterior']
+        return None
+
+    def reconciliar(self, limite=1000):
+        """Conferir ledger x saldo de até `limite` usuários movimentados desde a última rodada
+
+        Cada intervalo entre checkpoints é conferido uma vez; o trecho depois
+        do último checkpoint é comparado com o saldo atual. Retorna as
+        divergências encontradas.
+        """
+        self._garantir_indice_transacoes()
+        pendentes = [self._reconciliar_pendentes.pop()
+                     for _ in range(min(limite, len(self._reconciliar_pendentes)))]
+
+        divergencias = []
+        for user_id in pendentes:
+            divergencias.extend(self._reconciliar_usuario(user_id))
+        return divergencias
+
+    def _reconciliar_usuario(self, user_id):
+        transacoes = self.transacoes
+        checkpoints = self._checkpoints.get(user_id)
+        if not checkpoints:
+            return []
+        divergencias = []
+
+        def conferir(de, ate, centavos_ate):
+            posicao, timestamp, centavos = checkpoints[de]
+            if posicao < transacoes.base:
+                return  # Intervalo começa no arquivo frio
+            soma = quantidade = 0
+            for p in self._posicoes_usuario(ate, posicao):
+                soma += transacoes.centavos[p - transacoes.base]
+                quantidade += 1
+            # Tolerância de 1 centavo por transação (arredondamento dos floats)
+            if abs(centavos + soma - centavos_ate) > quantidade:
+                divergencias.append({
+                    'user_id': user_id,
+                    'desde': para_datetime(timestamp),
+                    'esperado': (centavos + soma) / 100,
+                    'registrado': centavos_ate / 100
+                })
+
+        while checkpoints.verificados + 1 < len(checkpoints):
+            de = checkpoints.verificados
+            posicao, _, centavos = checkpoints[de + 1]
+            conferir(de, posicao, centavos)
+            checkpoints.verificados += 1
+
+        if user_id in self.usuarios:
+            conferir(len(checkpoints) - 1, self._ultima_posicao_usuario(user_id),
+                     round(self.usuarios[user_id].saldo * 100))
+        return divergencias
+
+    # ===== TRANSFERÊNCIAS =====
+    def movimentar(self, lancamentos):
+        """Aplicar lançamentos (user_id, valor, tipo, descricao) em várias contas: todos ou nenhum"""
+        lancamentos = [tuple(lancamento) for lancamento in lancamentos]
+        variacoes = self._validar_lancamentos(lancamentos)
+        data = datetime.now()
+        self._aplicar_lancamentos(lancamentos, data)
+        # Um único registro: no replay a movimentação volta inteira ou não volta
+        self._registrar_mutacao('movimentacao', lancamentos, data)
+        return {user_id: self.usuarios[user_id].saldo for user_id in variacoes}
+
+    def _validar_lancamentos(self, lancamentos):
+        """Conferir todos os saldos antes de alterar qualquer um; retorna a variação por usuário"""
+        variacoes = {}
+        for user_id, valor, _, _ in lancamentos:
+            variacoes[user_id] = variacoes.get(user_id, 0) + valor
+        for user_id, variacao in variacoes.items():
+            saldo = self.obter_usuario(user_id).saldo
+            if variacao < 0 and saldo + variacao < 0:
+                raise SaldoInsuficiente(user_id, saldo, -variacao)
+        return variacoes
+
+    def _aplicar_lancamentos(self, lancamentos, data):
+        for user_id, valor, tipo, descricao in lancamentos:
+            usuario = self.obter_usuario(user_id)
+            self._definir_saldo_interno(usuario, usuario.saldo + valor)
+            if tipo:
+                self._inserir_transacao({
+                    'user_id': user_id,
+                    'tipo': tipo,
+                    'valor': valor,
+                    'descricao': descricao or "",
+                    'data': data,
+                    'saldo_posterior': usuario.saldo
+                })
+
+    def transferir(self, origem, destino, valor, taxa=0.0, tipo_envio='transferencia_enviada',
+                   tipo_recebimento='transferencia_recebida', descricao_envio='', descricao_recebimento='',
+                   tipo_taxa='taxa'):
+        """Debitar `valor` da origem e creditar `valor - taxa` no destino atomicamente"""
+        if origem == destino:
+            raise ValueError('Origem e destino devem ser diferentes')
+        if valor <= 0 or not 0 <= taxa <= valor:
+            raise ValueError('Valor ou taxa inválidos')
+
+        valor_liquido = round(valor - taxa, 2)
+        lancamentos = [(origem, -valor_liquido, tipo_envio, descricao_envio)]
+        if taxa:
+            lancamentos.append((origem, -taxa, tipo_taxa, f'Taxa sobre transferência de {valor:.2f}'))
+        lancamentos.append((destino, valor_liquido, tipo_recebimento, descricao_recebimento))
+
+        saldos = self.movimentar(lancamentos)
+        return saldos[origem], saldos[destino]
+
+    # ===== LOTES =====
+    def aplicar_lote(self, operacoes):
+        """Aplicar Debito/Credito/Lancamento/Experiencia/RegistroPix como uma unidade
+
+        Os saldos são conferidos antes (SaldoInsuficiente e nada é aplicado)
+        e o lote vira um único registro no journal, gravado num só fsync.
+        Retorna {user_id: saldo} de todos os usuários do lote.
+        """
+        lancamentos, experiencias, pix = normalizar_lote(operacoes)
+        contas = {lancamento[0] for lancamento in lancamentos} | {user_id for user_id, _ in experiencias}
+        self._validar_lancamentos(lancamentos)
+        data = datetime.now()
+        transacoes_pix = [montar_pix(registro, data) for registro in pix]
+        self._aplicar_lote(lancamentos, experiencias, transacoes_pix, data)
+        self._registrar_mutacao('lote', lancamentos, experiencias, transacoes_pix, data)
+        return {user_id: self.usuarios[user_id].saldo for user_id in contas}
+
+    def _aplicar_lote(self, lancamentos, experiencias, transacoes_pix, data):
+        self._aplicar_lancamentos(lancamentos, data)
+        for user_id, quantidade in experiencias:
+            self._adicionar_xp_interno(user_id, quantidade)
+        for transacao_pix in transacoes_pix:
+            self._inserir_pix(transacao_pix)
+
+    @staticmethod
+    def _registros_lote(lancamentos, experiencias, transacoes_pix, data):
+        """O registro 'lote' desmembrado nos registros equivalentes (para backends que traduzem registros)"""
+        if lancamentos:
+            yield ('movimentacao', lancamentos, data)
+        for user_id, quantidade in experiencias:
+            yield ('adicionar_xp', user_id, quantidade)
+        for transacao_pix in transacoes_pix:
+            yield ('pix', transacao_pix)
 
     # ===== INVESTIMENTOS =====
     def obter_carteira(self, user_id):
+        # Leitura: não cria carteira vazia para quem nunca investiu
         if user_id not in self.investimentos:
-            self.investimentos[user_id] = {}
+            return {}
         return self.investimentos[user_id]
 
     def adicionar_acao(self, user_id, ticker, quantidade, preco_compra):
-        carteira = self.obter_carteira(user_id)
+        if user_id not in self.investimentos:
+            self.investimentos[user_id] = {}
+        carteira = self.investimentos[user_id]
         
         if ticker not in carteira:
             carteira[ticker] = {'quantidade': 0, 'preco_medio': 0}
+            if self._detentores is not None:
+                self._detentores[ticker.upper()] += 1
         
         acao = carteira[ticker]
         quantidade_total = acao['quantidade'] + quantidade
         preco_medio = ((acao['quantidade'] * acao['preco_medio']) + (quantidade * preco_compra)) / quantidade_total
         
         carteira[ticker] = {'quantidade': quantidade_total, 'preco_medio': preco_medio}
+        self._registrar_mutacao('adicionar_acao', user_id, ticker, quantidade, preco_compra)
 
     def vender_acao(self, user_id, ticker, quantidade):
         carteira = self.obter_carteira(user_id)
@@ -124,97 +908,212 @@ class Database:
         nova_quantidade = acao['quantidade'] - quantidade
         if nova_quantidade == 0:
             del carteira[ticker]
+            if self._detentores is not None:
+                self._detentores[ticker.upper()] -= 1
+                if not self._detentores[ticker.upper()]:
+                    del self._detentores[ticker.upper()]
         else:
             carteira[ticker]['quantidade'] = nova_quantidade
         
+        self._registrar_mutacao('vender_acao', user_id, ticker, quantidade)
         return True
 
+    def contar_detentores(self):
+        """{ticker: quantos usuários têm o ticker na carteira}, mantido a cada compra/venda"""
+        if self._detentores is None:
+            # Snapshot mapeado: percorrer as carteiras sem materializar todas
+            itens = getattr(self.investimentos, 'itens_sem_materializar', self.investimentos.items)
+            detentores = Counter()
+            for _, carteira in itens():
+                detentores.update({ticker.upper() for ticker in carteira})
+            self._detentores = detentores
+        return dict(self._detentores)
+
     # ===== PIX =====
     def registrar_transacao_pix(self, remetente_id, remetente_nome, destinatario_id, destinatario_nome, valor_bruto, taxa, valor_liquido, descricao, servidor_id, servidor_nome, canal_id, mensagem_id):
-        transacao_pix = {
-            'remetente_id': remetente_id,
-            'remetente_nome': remetente_nome,
-            'destinatario_id': destinatario_id,
-            'destinatario_nome': destinatario_nome,
-            'valor_bruto': valor_bruto,
-            'taxa': taxa,
-            'valor_liquido': valor_liquido,
-            'descricao': descricao,
-            'data': datetime.now(),
-            'servidor_id': servidor_id,
-            'servidor_nome': servidor_nome,
-            'canal_id': canal_id,
-            'mensagem_id': mensagem_id,
-            'status': 'concluido'
-        }
-        self.pix_transacoes_list.append(transacao_pix)
+        transacao_pix = montar_pix(RegistroPix(
+            remetente_id, remetente_nome, destinatario_id, destinatario_nome, valor_bruto, taxa,
+            valor_liquido, descricao, servidor_id, servidor_nome, canal_id, mensagem_id
+        ), datetime.now())
+        self._inserir_pix(transacao_pix)
+        self._registrar_mutacao('pix', transacao_pix)
         return transacao_pix
 
-    def obter_historico_pix(self, user_id, limite=10):
-        enviados = [p for p in self.pix_transacoes_list if p['remetente_id'] == user_id][-limite:]
-        recebidos = [p for p in self.pix_transacoes_list if p['destinatario_id'] == user_id][-limite:]
-        return {'enviados': enviados, 'recebidos': recebidos}
-
-    def obter_estatisticas_pix(self, user_id):
-        enviados = [p for p in self.pix_transacoes_list if p['remetente_id'] == user_id]
-        recebidos = [p for p in self.pix_transacoes_list if p['destinatario_id'] == user_id]
+    def _inserir_pix(self, transacao_pix):
+        self._indexar_pix(self._pix_base + len(self.pix_transacoes_list), transacao_pix)
+        self.pix_transacoes_list.append(transacao_pix)
+        self._pix_por_servidor.anexar(transacao_pix)
         
-        total_enviado = sum([p['valor_bruto'] for p in enviados])
-        total_recebido = sum([p['valor_liquido'] for p in recebidos])
-        total_taxas = sum([p['taxa'] for p in enviados])
+        remetente = self._estatisticas_pix.get(transacao_pix['remetente_id'])
+        if remetente is None:
+            remetente = self._estatisticas_pix[transacao_pix['remetente_id']] = EstatisticasPix()
+        remetente.enviados += 1
+        remetente.valor_enviado += transacao_pix['valor_bruto']
+        remetente.taxas += transacao_pix['taxa']
+        remetente.maior_enviado = max(remetente.maior_enviado, transacao_pix['valor_bruto'])
         
-        return {
-            'pix_enviados': len(enviados),
-            'pix_recebidos': len(recebidos),
-            'valor_total_enviado': total_enviado,
-            'valor_total_recebido': total_recebido,
-            'taxas_pagas': total_taxas,
-            'balanço_liquido': total_recebido - total_enviado
-        }
-
-    def obter_pix_suspeitos(self):
-        alto_valor = [p for p in self.pix_transacoes_list if p['valor_bruto'] > 10000]
+        destinatario = self._estatisticas_pix.get(transacao_pix['destinatario_id'])
+        if destinatario is None:
+            destinatario = self._estatisticas_pix[transacao_pix['destinatario_id']] = EstatisticasPix()
+        destinatario.recebidos += 1
+        destinatario.valor_recebido += transacao_pix['valor_liquido']
+        destinatario.maior_recebido = max(destinatario.maior_recebido, transacao_pix['valor_liquido'])
         
-        usuarios_ativos = defaultdict(int)
-        for pix in self.pix_transacoes_list:
-            usuarios_ativos[pix['remetente_id']] += 1
+        self._detector_pix.registrar(transacao_pix)
+        self._verificar_arquivamento(transacao_pix['data'])
+
+    def _indexar_pix(self, posicao, transacao_pix):
+        for user_id in {transacao_pix['remetente_id'], transacao_pix['destinatario_id']}:
+            posicoes = self._pix_por_usuario.get(user_id)
+            if posicoes is None:
+                posicoes = self._pix_por_usuario[user_id] = array('q')
+            posicoes.append(posicao)
+
+    def obter_historico_pix(self, user_id, limite=10):
+        """Últimos `limite` PIX enviados e recebidos (mais antigo primeiro), pelo índice por usuário"""
+        enviados, recebidos = [], []
+        for posicao in reversed(self._pix_por_usuario.get(user_id, ())):
+            if len(enviados) >= limite and len(recebidos) >= limite:
+                break
+            transacao_pix = self.pix_transacoes_list[posicao - self._pix_base]
+            if transacao_pix['remetente_id'] == user_id and len(enviados) < limite:
+                enviados.append(transacao_pix)
+            if transacao_pix['destinatario_id'] == user_id and len(recebidos) < limite:
+                recebidos.append(transacao_pix)
+        enviados.reverse()
+        recebidos.reverse()
         
-        hiperativos = [{'user_id': uid, 'count': count} for uid, count in usuarios_ativos.items() if count > 20]
+        if self._frio_pix is not None and (len(enviados) < limite or len(recebidos) < limite):
+            enviados_antigos, recebidos_antigos = [], []
+            for p in self._frio_pix.iterar(chave=user_id, reverso=True):
+                if p['remetente_id'] == user_id and len(enviados) + len(enviados_antigos) < limite:
+                    enviados_antigos.append(p)
+                if p['destinatario_id'] == user_id and len(recebidos) + len(recebidos_antigos) < limite:
+                    recebidos_antigos.append(p)
+                if len(enviados) + len(enviados_antigos) >= limite and len(recebidos) + len(recebidos_antigos) >= limite:
+                    break
+            enviados = enviados_antigos[::-1] + enviados
+            recebidos = recebidos_antigos[::-1] + recebidos
         
-        return {'alto_valor': alto_valor, 'usuarios_hiperativos': hiperativos}
+        return {'enviados': enviados, 'recebidos': recebidos}
 
-    def obter_relatorio_pix_servidor(self, dias=30):
-        transacoes = self.pix_transacoes_list
+    def obter_pix_pagina(self, user_id, tamanho=10, cursor=None):
+        """PIX enviados e recebidos pelo usuário, mais recentes primeiro, logo antes de `cursor`
+
+        Retorna (PIX, cursor da próxima página ou None); a posição é a ordem
+        global do PIX e o índice por usuário é buscado com bisect.
+        """
+        base = self._pix_base
+        posicoes = self._pix_por_usuario.get(user_id, ())
+        fim = len(posicoes) if cursor is None else bisect.bisect_left(posicoes, cursor[1])
+        pagina = [
+            dict(self.pix_transacoes_list[posicao - base], posicao=posicao)
+            for posicao in reversed(posicoes[max(fim - tamanho - 1, 0):fim])
+        ]
         
-        total_transacoes = len(transacoes)
-        volume_total = sum([p['valor_bruto'] for p in transacoes])
-        taxas_arrecadadas = sum([p['taxa'] for p in transacoes])
+        if len(pagina) <= tamanho and self._frio_pix is not None:
+            cursor_frio = cursor if cursor is not None and cursor[1] < base else None
+            fim = None if cursor_frio is None else para_datetime(cursor_frio[0]) + timedelta(microseconds=1)
+            antigos = (
+                transacao_pix
+                for transacao_pix in self._frio_pix.iterar(fim=fim, chave=user_id, reverso=True)
+                if user_id in (transacao_pix['remetente_id'], transacao_pix['destinatario_id'])
+            )
+            pagina.extend(islice(_antes_do_cursor(antigos, cursor_frio), tamanho + 1 - len(pagina)))
+        return fechar_pagina(pagina, tamanho)
+
+    def obter_pix_servidor(self, servidor_id, data_inicio=None, limite=None):
+        """PIX de um servidor (mais recentes primeiro), opcionalmente a partir de uma data"""
+        return self._pix_por_servidor.listar(servidor_id, data_inicio, limite, self._carregar_dia_pix)
+
+    def obter_estatisticas_pix(self, user_id):
+        """Estatísticas de PIX do usuário em O(1) (contadores mantidos em _inserir_pix)"""
+        estatisticas = self._estatisticas_pix.get(user_id)
+        return (estatisticas or EstatisticasPix()).como_dict()
+
+    def obter_pix_suspeitos(self, limite_valor=10000, limite_quantidade=20):
+        """Resultado do detector incremental (ver antilavagem.py), sem varrer o histórico
+
+        limite_valor só filtra os PIX de alto valor já retidos pelo detector
+        (a partir de DetectorPix.limite_alto_valor); limite_quantidade filtra
+        os remetentes mais ativos na maior janela.
+        """
+        detector = self._detector_pix
+        return {
+            'alto_valor': [p for p in reversed(detector.alto_valor) if p['valor_bruto'] > limite_valor],
+            'usuarios_frequentes': detector.mais_ativos(datetime.now(), limite_quantidade),
+            'alertas': list(reversed(detector.alertas))
+        }
+
+    def obter_relatorio_pix_servidor(self, servidor_id, data_inicio=None, data_fim=None):
+        """Totais de PIX do servidor no período [data_inicio, data_fim)"""
+        total_transacoes, volume_total, total_taxas = self._pix_por_servidor.resumo(
+            servidor_id, data_inicio, data_fim, self._carregar_dia_pix
+        )
         
         return {
             'total_transacoes': total_transacoes,
             'volume_total': volume_total,
-            'taxas_arrecadadas': taxas_arrecadadas,
-            'ticket_medio': volume_total / total_transacoes if total_transacoes > 0 else 0,
-            'transacoes': transacoes
+            'total_taxas': total_taxas,
+            'ticket_medio': volume_total / total_transacoes if total_transacoes > 0 else 0
         }
 
     def bloquear_usuario_pix(self, user_id, motivo):
         self.usuarios_bloqueados_pix.add(user_id)
+        self._registrar_mutacao('bloquear_usuario_pix', user_id, motivo)
 
     def desbloquear_usuario_pix(self, user_id):
         self.usuarios_bloqueados_pix.discard(user_id)
+        self._registrar_mutacao('desbloquear_usuario_pix', user_id)
 
     def verificar_bloqueio_pix(self, user_id):
         return user_id in self.usuarios_bloqueados_pix
 
+    # ===== APOSTAS =====
+    def criar_aposta(self, apostador_id, desafiado_id, valor, descricao):
+        aposta = {
+            '_id': uuid.uuid4().hex[:12],
+            'apostador': apostador_id,
+            'desafiado': desafiado_id,
+            'valor': valor,
+            'descricao': descricao,
+            'status': 'pendente',
+            'vencedor': None,
+            'data': datetime.now()
+        }
+        self.apostas[aposta['_id']] = aposta
+        self._registrar_mutacao('aposta', dict(aposta))
+        return aposta['_id']
+
+    def obter_aposta(self, aposta_id):
+        return self.apostas.get(aposta_id)
+
+    def obter_apostas_pendentes(self, user_id):
+        return [
+            a for a in self.apostas.values()
+            if a['status'] == 'pendente' and user_id in (a['apostador'], a['desafiado'])
+        ]
+
+    def finalizar_aposta(self, aposta_id, vencedor_id):
+        aposta = self.apostas[aposta_id]
+        aposta['status'] = 'finalizada'
+        aposta['vencedor'] = vencedor_id
+        self._registrar_mutacao('finalizar_aposta', aposta_id, vencedor_id)
+
     # ===== RANKING =====
-    def obter_ranking(self, limite=10):
-        usuarios = sorted(self.usuarios.values(), key=lambda x: x['saldo'], reverse=True)
-        return usuarios[:limite]
+    def obter_ranking(self, limite=10, inicio=0):
+        """Usuários mais ricos a partir da posição `inicio` (O(log n + limite))"""
+        return [self.usuarios[uid] for uid, _ in self._ranking_saldo.top(limite, inicio)]
+
+    def obter_top_xp(self, limite=10, inicio=0):
+        return [self.usuarios[uid] for uid, _ in self._ranking_xp.top(limite, inicio)]
+
+    def obter_posicao_ranking(self, user_id):
+        """Posição do usuário no ranking de saldo (1 = mais rico) ou None"""
+        return self._ranking_saldo.posicao(user_id)
 
-    def obter_top_xp(self, limite=10):
-        usuarios = sorted(self.usuarios.values(), key=lambda x: x['xp'], reverse=True)
-        return usuarios[:limite]
+    def contar_usuarios(self):
+        return len(self.usuarios)
 
 # Instância global
 db = Database()
@@ -0,0 +1,423 @@
+# ============================================================================
+# DATABASE MONGODB - ESTADO EM MEMÓRIA + PERSISTÊNCIA ASSÍNCRONA (MOTOR)
+# ============================================================================
+#
+# Os cogs continuam chamando a API síncrona do Database: leituras e escritas
+# acontecem em memória e cada mutação vira uma operação Mongo enfileirada.
+# Uma task do event loop envia a fila em bulk_write a cada intervalo, então
+# nenhum comando espera pela rede. No startup, `await db.conectar()` cria os
+# índices e carrega as coleções.
+#
+# Toda operação da fila é idempotente, então reenviar uma que já tinha sido
+# aplicada (bulk_write que falhou no meio) não muda o resultado:
+#   transações/PIX  ReplaceOne com upsert pela posição no log (campo `posicao`)
+#   saldo, xp, nível $set do valor final em memória, nunca $inc
+#   apostas         ReplaceOne com upsert pelo _id gerado no bot
+#
+# Só a janela quente (janela_quente, em dias inteiros) de transações e PIX é
+# carregada em memória. O histórico anterior fica no Mongo e é lido por um
+# HistoricoMongo, que faz o papel do ArquivoFrio; os agregados de PIX
+# (estatísticas por usuário, totais por servidor/dia) desse histórico são
+# somados pelo próprio Mongo no startup. Os comandos que podem passar da
+# janela quente (extrato, históricos de PIX, relatórios do servidor) usam
+# `await db.consultar(...)`: o que falta do Mongo é lido numa thread, nunca
+# no event loop.
+
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, time
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database import JANELA_QUENTE_PADRAO, Database, EstatisticasPix
+from transacoes_colunares import para_datetime, para_timestamp
+
+# Coleções de log: cada documento tem a posição global dele (ordem de inserção)
+COLECOES_LOG = ('transacoes', 'pix_transacoes')
+DUPLICADA = 11000  # Código de erro do Mongo para chave única repetida
+LOTE_LEITURA = 200  # Documentos por ida ao servidor nas leituras do histórico
+
+
+class HistoricoPendente(Exception):
+    """A consulta precisa de registros do Mongo que ainda não foram buscados (ver DatabaseMongo.consultar)"""
+
+    def __init__(self, historico, leitura, filtro, ordem, quantidade):
+        super().__init__(leitura)
+        self.historico = historico
+        self.leitura = leitura        # Chave da leitura em `lidos`
+        self.filtro = filtro
+        self.ordem = ordem
+        self.quantidade = quantidade  # Documentos a buscar (o dobro a cada vez que não bastar)
+
+
+class HistoricoMongo:
+    """Registros de uma coleção de log anteriores à memória, com a interface de leitura do ArquivoFrio
+
+    Dentro de DatabaseMongo.consultar (comandos) `iterar` só serve o que já
+    foi buscado numa thread e levanta HistoricoPendente para o resto; fora
+    dele (scripts, testes) lê direto, de forma síncrona.
+    """
+
+    def __init__(self, colecao, base, chaves, grupo=None):
+        self.colecao = colecao  # Coleção pymongo (síncrona)
+        self.base = base        # Função: primeira posição ainda em memória
+        self.chaves = chaves    # Campos comparados com `chave` em iterar
+        self.grupo = grupo      # Campo comparado com `grupo` em iterar
+        self.corte = None       # timestamp (µs): registros anteriores não estão mais em memória
+        self.lidos = None       # leitura -> (documentos, completo) durante DatabaseMongo.consultar
+
+    @property
+    def data_corte(self):
+        return None if self.corte is None else para_datetime(self.corte)
+
+    def gravar(self, registros, corte, tamanho_segmento=None):
+        """Os registros já estão no Mongo: só avançar o corte"""
+        self.corte = para_timestamp(corte)
+
+    def iterar(self, inicio=None, fim=None, chave=None, grupo=None, reverso=False):
+        """Registros com data em [inicio, fim), em ordem de posição (do fim com `reverso`)"""
+        base = self.base()
+        filtro = {'posicao': {'$lt': base}}
+        if inicio is not None or fim is not None:
+            filtro['data'] = {}
+            if inicio is not None:
+                filtro['data']['$gte'] = inicio
+            if fim is not None:
+                filtro['data']['$lt'] = fim
+        if chave is not None:
+            filtro['$or'] = [{campo: chave} for campo in self.chaves]
+        if grupo is not None:
+            filtro[self.grupo] = grupo
+        ordem = DESCENDING if reverso else ASCENDING
+
+        if self.lidos is None:
+            yield from self.colecao.find(filtro, {'_id': 0}).sort('posicao', ordem).batch_size(LOTE_LEITURA)
+            return
+        leitura = (base, inicio, fim, chave, grupo, reverso)
+        documentos, completo = self.lidos.get(leitura, ((), False))
+        yield from documentos
+        if not completo:
+            raise HistoricoPendente(self, leitura, filtro, ordem, max(LOTE_LEITURA, 2 * len(documentos)))
+
+    async def buscar(self, pendente, lidos):
+        """Buscar numa thread os documentos que faltaram à consulta, sem bloquear o event loop"""
+        def ler():
+            cursor = self.colecao.find(pendente.filtro, {'_id': 0}).sort('posicao', pendente.ordem)
+            return list(cursor.limit(pendente.quantidade))
+        documentos = await asyncio.get_running_loop().run_in_executor(None, ler)
+        lidos[pendente.leitura] = (documentos, len(documentos) < pendente.quantidade)
+
+
+class DatabaseMongo(Database):
+    """Database em memória persistido no MongoDB em segundo plano"""
+
+    def __init__(self, uri=None, nome_banco='economia_b3', cliente=None, cliente_sincrono=None,
+                 intervalo_persistencia=0.5, max_pool=50, janela_quente=JANELA_QUENTE_PADRAO):
+        super().__init__()
+        if cliente is None:
+            # Import tardio: o motor só é necessário quando este backend é usado
+            from motor.motor_asyncio import AsyncIOMotorClient
+            cliente = AsyncIOMotorClient(uri, maxPoolSize=max_pool, minPoolSize=1)
+        if cliente_sincrono is None and uri is not None:
+            # Leituras do histórico fora da janela quente, numa thread (ver consultar)
+            cliente_sincrono = MongoClient(uri, maxPoolSize=max_pool)
+
+        self.cliente = cliente
+        self.banco = cliente[nome_banco]
+        # Sem cliente síncrono não há como ler o histórico sob demanda: carregar tudo
+        self.banco_sincrono = None if cliente_sincrono is None else cliente_sincrono[nome_banco]
+        self.janela_quente = janela_quente
+        self.intervalo_persistencia = intervalo_persistencia
+
+        self._fila = []  # (nome da coleção, operação pymongo)
+        self._task = None
+        self._carregando = False  # Inserções vindas do próprio Mongo não voltam para a fila
+
+    # ===== CONEXÃO =====
+    async def conectar(self):
+        """Criar índices, carregar o estado e iniciar a persistência"""
+        await self._numerar_legado()
+        await self._criar_indices()
+        self._carregando = True
+        try:
+            await self._carregar()
+        finally:
+            self._carregando = False
+        self._task = asyncio.create_task(self._loop_persistencia())
+        print(f"✅ MongoDB conectado: {len(self.usuarios)} usuários, "
+              f"{len(self.transacoes)} transações e {len(self.pix_transacoes_list)} PIX em memória")
+
+    async def fechar(self):
+        """Enviar o que estiver pendente e encerrar a task de persistência"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.persistir()
+
+    async def _numerar_legado(self):
+        """Dar `posicao` aos documentos gravados antes do campo existir (só na primeira vez)"""
+        for nome in COLECOES_LOG:
+            colecao = self.banco[nome]
+            ultimo = await colecao.find_one({'posicao': {'$exists': True}}, sort=[('posicao', DESCENDING)])
+            proxima = ultimo['posicao'] + 1 if ultimo else 0
+            operacoes = []
+            legado = colecao.find({'posicao': {'$exists': False}}, {'_id': 1}).sort([('data', ASCENDING), ('_id', ASCENDING)])
+            async for documento in legado:
+                operacoes.append(UpdateOne({'_id': documento['_id']}, {'$set': {'posicao': proxima}}))
+                proxima += 1
+            if operacoes:
+                await colecao.bulk_write(operacoes, ordered=False)
+                print(f"⚠️ MongoDB: {len(operacoes)} documentos antigos de {nome} numerados")
+
+    async def _criar_indices(self):
+        await self.banco.usuarios.create_index([('user_id', ASCENDING)], unique=True)
+        for nome in COLECOES_LOG:
+            await self.banco[nome].create_index([('posicao', ASCENDING)], unique=True)
+        await self.banco.transacoes.create_index([('user_id', ASCENDING), ('data', DESCENDING)])
+        await self.banco.transacoes.create_index([('data', DESCENDING)])
+        await self.banco.transacoes.create_index([('user_id', ASCENDING), ('posicao', ASCENDING)])
+        await self.banco.investimentos.create_index([('user_id', ASCENDING), ('ticker', ASCENDING)], unique=True)
+        await self.banco.pix_transacoes.create_index([('remetente_id', ASCENDING), ('data', DESCENDING)])
+        await self.banco.pix_transacoes.create_index([('destinatario_id', ASCENDING), ('data', DESCENDING)])
+        await self.banco.pix_transacoes.create_index([('servidor_id', ASCENDING), ('data', DESCENDING)])
+        await self.banco.pix_transacoes.create_index([('data', DESCENDING)])
+        await self.banco.pix_transacoes.create_index([('remetente_id', ASCENDING), ('posicao', ASCENDING)])
+        await self.banco.pix_transacoes.create_index([('destinatario_id', ASCENDING), ('posicao', ASCENDING)])
+        await self.banco.apostas.create_index([('status', ASCENDING), ('apostador', ASCENDING)])
+        await self.banco.apostas.create_index([('status', ASCENDING), ('desafiado', ASCENDING)])
+
+    async def _carregar(self):
+        async for usuario in self.banco.usuarios.find({}, {'_id': 0}):
+            if usuario.pop('pix_bloqueado', False):
+                self.usuarios_bloqueados_pix.add(usuario['user_id'])
+            usuario.pop('pix_bloqueio_motivo', None)
+            self._inserir_usuario(usuario)
+
+        corte = None
+        if self.banco_sincrono is not None:
+            corte = datetime.combine((datetime.now() - self.janela_quente).date(), time.min)
+
+        self.transacoes.base = await self._primeira_posicao_quente('transacoes', corte)
+        quentes = self.banco.transacoes.find({'posicao': {'$gte': self.transacoes.base}}, {'_id': 0})
+        async for transacao in quentes.sort('posicao', ASCENDING):
+            self._inserir_transacao(transacao)
+
+        async for posicao in self.banco.investimentos.find({}, {'_id': 0}):
+            self.investimentos.setdefault(posicao['user_id'], {})[posicao['ticker']] = {
+                'quantidade': posicao['quantidade'],
+                'preco_medio': posicao['preco_medio']
+            }
+
+        self._pix_base = await self._primeira_posicao_quente('pix_transacoes', corte)
+        if self._pix_base:
+            await self._carregar_agregados_pix()
+        quentes = self.banco.pix_transacoes.find({'posicao': {'$gte': self._pix_base}}, {'_id': 0, 'posicao': 0})
+        async for transacao_pix in quentes.sort('posicao', ASCENDING):
+            self._inserir_pix(transacao_pix)
+
+        async for aposta in self.banco.apostas.find({}):
+            self.apostas[aposta['_id']] = aposta
+
+        if corte is not None:
+            self._frio_transacoes = HistoricoMongo(
+                self.banco_sincrono.transacoes, lambda: self.transacoes.base, ('user_id',)
+            )
+            self._frio_pix = HistoricoMongo(
+                self.banco_sincrono.pix_transacoes, lambda: self._pix_base,
+                ('remetente_id', 'destinatario_id'), grupo='servidor_id'
+            )
+            # Descarta o que veio fora de ordem antes do corte e agenda os próximos
+            self.arquivar()
+
+    async def _primeira_posicao_quente(self, nome, corte):
+        """Posição do primeiro registro com data >= corte (todos com corte None)"""
+        colecao = self.banco[nome]
+        if corte is None:
+            return 0
+        primeiro = await colecao.find_one({'data': {'$gte': corte}}, sort=[('posicao', ASCENDING)])
+        if primeiro is not None:
+            return primeiro['posicao']
+        ultimo = await colecao.find_one({}, sort=[('posicao', DESCENDING)])
+        return 0 if ultimo is None else ultimo['posicao'] + 1
+
+    async def _carregar_agregados_pix(self):
+        """Estatísticas por usuário e totais por servidor/dia dos PIX que ficaram no Mongo"""
+        antigos = {'$match': {'posicao': {'$lt': self._pix_base}}}
+
+        enviados = {'$group': {
+            '_id': '$remetente_id', 'quantidade': {'$sum': 1}, 'valor': {'$sum': '$valor_bruto'},
+            'taxas': {'$sum': '$taxa'}, 'maior': {'$max': '$valor_bruto'}
+        }}
+        async for linha in self.banco.pix_transacoes.aggregate([antigos, enviados]):
+            estatisticas = self._estatisticas_pix.setdefault(linha['_id'], EstatisticasPix())
+            estatisticas.enviados += linha['quantidade']
+            estatisticas.valor_enviado += linha['valor']
+            estatisticas.taxas += linha['taxas']
+            estatisticas.maior_enviado = max(estatisticas.maior_enviado, linha['maior'])
+
+        recebidos = {'$group': {
+            '_id': '$destinatario_id', 'quantidade': {'$sum': 1},
+            'valor': {'$sum': '$valor_liquido'}, 'maior': {'$max': '$valor_liquido'}
+        }}
+        async for linha in self.banco.pix_transacoes.aggregate([antigos, recebidos]):
+            estatisticas = self._estatisticas_pix.setdefault(linha['_id'], EstatisticasPix())
+            estatisticas.recebidos += linha['quantidade']
+            estatisticas.valor_recebido += linha['valor']
+            estatisticas.maior_recebido = max(estatisticas.maior_recebido, linha['maior'])
+
+        por_dia = {'$group': {
+            '_id': {'servidor_id': '$servidor_id', 'ano': {'$year': '$data'},
+                    'mes': {'$month': '$data'}, 'dia': {'$dayOfMonth': '$data'}},
+            'quantidade': {'$sum': 1}, 'volume': {'$sum': '$valor_bruto'}, 'taxas': {'$sum': '$taxa'}
+        }}
+        async for linha in self.banco.pix_transacoes.aggregate([antigos, por_dia]):
+            chave = linha['_id']
+            self._pix_por_servidor.anexar_totais(
+                chave['servidor_id'], date(chave['ano'], chave['mes'], chave['dia']).toordinal(),
+                linha['quantidade'], linha['volume'], linha['taxas']
+            )
+
+    # ===== CONSULTAS DO HISTÓRICO =====
+    async def consultar(self, metodo, *args, **kwargs):
+        """Rodar a consulta `metodo` sem ler o Mongo no event loop
+
+        A consulta roda em memória; se ela passar da janela quente, os
+        documentos que faltaram são buscados numa thread e ela roda de novo
+        (o que já foi buscado fica para a próxima rodada).
+        """
+        historicos = [h for h in (self._frio_transacoes, self._frio_pix) if h is not None]
+        lidos = {}
+        while True:
+            for historico in historicos:
+                historico.lidos = lidos
+            try:
+                return getattr(self, metodo)(*args, **kwargs)
+            except HistoricoPendente as erro:
+                pendente = erro
+            finally:
+                for historico in historicos:
+                    historico.lidos = None
+            await pendente.historico.buscar(pendente, lidos)
+
+    # ===== PERSISTÊNCIA =====
+    def _inserir_transacao(self, transacao):
+        posicao = self.transacoes.base + len(self.transacoes)
+        super()._inserir_transacao(transacao)
+        if not self._carregando:
+            self._gravar_no_log('transacoes', posicao, transacao)
+
+    def _inserir_pix(self, transacao_pix):
+        posicao = self._pix_base + len(self.pix_transacoes_list)
+        super()._inserir_pix(transacao_pix)
+        if not self._carregando:
+            self._gravar_no_log('pix_transacoes', posicao, transacao_pix)
+
+    def _gravar_no_log(self, colecao, posicao, documento):
+        self._enfileirar(colecao, ReplaceOne({'posicao': posicao}, dict(documento, posicao=posicao), upsert=True))
+
+    def _salvar_usuario(self, user_id, *campos):
+        """$set dos valores atuais em memória (reenviar não soma de novo, como faria um $inc)"""
+        usuario = self.usuarios[user_id]
+        self._enfileirar('usuarios', UpdateOne(
+            {'user_id': user_id}, {'$set': {campo: usuario[campo] for campo in campos}}
+        ))
+
+    def _registrar_mutacao(self, *registro):
+        """Traduzir a mutação (já aplicada em memória) para uma operação Mongo"""
+        operacao, args = registro[0], registro[1:]
+
+        if operacao == 'usuario':
+            usuario = args[0]
+            self._enfileirar('usuarios', UpdateOne(
+                {'user_id': usuario['user_id']}, {'$setOnInsert': usuario}, upsert=True
+            ))
+        elif operacao in ('atualizar_saldo', 'definir_saldo'):
+            self._salvar_usuario(args[0], 'saldo')
+        elif operacao == 'adicionar_xp':
+            self._salvar_usuario(args[0], 'xp', 'experiencia')
+        elif operacao == 'adicionar_nivel':
+            self._salvar_usuario(args[0], 'nivel')
+        elif operacao == 'atualizar_campos_usuario':
+            self._enfileirar('usuarios', UpdateOne({'user_id': args[0]}, {'$set': args[1]}))
+        elif operacao == 'movimentacao':
+            # As transações de cada perna já foram para a fila em _inserir_transacao
+            for user_id in dict.fromkeys(lancamento[0] for lancamento in args[0]):
+                self._salvar_usuario(user_id, 'saldo')
+        elif operacao == 'lote':
+            for parte in self._registros_lote(*args):
+                self._registrar_mutacao(*parte)
+        elif operacao in ('adicionar_acao', 'vender_acao'):
+            user_id, ticker = args[0], args[1]
+            filtro = {'user_id': user_id, 'ticker': ticker}
+            posicao = self.obter_carteira(user_id).get(ticker)
+            if posicao is None:
+                self._enfileirar('investimentos', DeleteOne(filtro))
+            else:
+                self._enfileirar('investimentos', UpdateOne(filtro, {'$set': dict(posicao)}, upsert=True))
+        elif operacao == 'bloquear_usuario_pix':
+            self._enfileirar('usuarios', UpdateOne(
+                {'user_id': args[0]}, {'$set': {'pix_bloqueado': True, 'pix_bloqueio_motivo': args[1]}}
+            ))
+        elif operacao == 'desbloquear_usuario_pix':
+            self._enfileirar('usuarios', UpdateOne(
+                {'user_id': args[0]}, {'$set': {'pix_bloqueado': False}, '$unset': {'pix_bloqueio_motivo': ''}}
+            ))
+        elif operacao == 'aposta':
+            aposta = args[0]
+            self._enfileirar('apostas', ReplaceOne({'_id': aposta['_id']}, dict(aposta), upsert=True))
+        elif operacao == 'finalizar_aposta':
+            self._enfileirar('apostas', UpdateOne(
+                {'_id': args[0]}, {'$set': {'status': 'finalizada', 'vencedor': args[1]}}
+            ))
+
+    def _enfileirar(self, colecao, operacao):
+        self._fila.append((colecao, operacao))
+
+    async def _loop_persistencia(self):
+        while True:
+            await asyncio.sleep(self.intervalo_persistencia)
+            try:
+                await self.persistir()
+            except Exception as e:
+                print(f'Erro ao persistir no MongoDB: {e}')
+
+    async def persistir(self):
+        """Enviar a fila atual em um bulk_write ordenado por coleção
+
+        Se um bulk_write falhar, voltam para a fila só as operações a partir
+        da que falhou (as anteriores já foram aplicadas) e as das coleções
+        que ainda não foram enviadas, na mesma ordem.
+        """
+        if not self._fila:
+            return
+        fila, self._fila = self._fila, []
+
+        por_colecao = defaultdict(list)
+        for colecao, operacao in fila:
+            por_colecao[colecao].append(operacao)
+
+        pendentes = list(por_colecao.items())
+        while pendentes:
+            colecao, operacoes = pendentes[0]
+            try:
+                await self.banco[colecao].bulk_write(operacoes, ordered=True)
+            except BulkWriteError as e:
+                erro = (e.details.get('writeErrors') or [{'index': 0}])[0]
+                # Chave única repetida: o documento já está lá, seguir a partir da próxima
+                inicio = erro['index'] + 1 if erro.get('code') == DUPLICADA else erro['index']
+                pendentes[0] = (colecao, operacoes[inicio:])
+                self._devolver(pendentes)
+                raise
+            except Exception:
+                self._devolver(pendentes)
+                raise
+            pendentes.pop(0)
+
+    def _devolver(self, pendentes):
+        """Recolocar no início da fila as operações não confirmadas"""
+        self._fila[:0] = [(colecao, operacao) for colecao, operacoes in pendentes for operacao in operacoes]
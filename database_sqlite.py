@@ -0,0 +1,721 @@
+# ============================================================================
+# DATABASE SQLITE - MESMA API DO DATABASE EM MEMÓRIA, PERSISTIDO EM DISCO
+# ============================================================================
+#
+# Escritas entram num lote e o commit sai a cada `commit_a_cada` escritas ou
+# `intervalo_commit` segundos. Com o bot rodando (iniciar) uma task do event
+# loop fecha o lote que ficou parado esperando a próxima escrita.
+
+import asyncio
+import atexit
+import heapq
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from cache_lru import CacheLRU
+from database import RegistroPix, SaldoInsuficiente, UsuarioPadrao, fechar_pagina, montar_pix, normalizar_lote
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    user_id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    saldo REAL NOT NULL DEFAULT 1000.0,
+    xp INTEGER NOT NULL DEFAULT 0,
+    nivel INTEGER NOT NULL DEFAULT 1,
+    streak_daily INTEGER NOT NULL DEFAULT 0,
+    data_criacao TEXT NOT NULL,
+    extras TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_saldo ON usuarios (saldo DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_usuarios_xp ON usuarios (xp DESC, user_id);
+
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    valor REAL NOT NULL,
+    descricao TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    saldo_posterior REAL
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_usuario ON transacoes (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_transacoes_data ON transacoes (data);
+CREATE INDEX IF NOT EXISTS idx_transacoes_usuario_data ON transacoes (user_id, data);
+
+CREATE TABLE IF NOT EXISTS investimentos (
+    user_id INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    preco_medio REAL NOT NULL,
+    PRIMARY KEY (user_id, ticker)
+);
+
+CREATE TABLE IF NOT EXISTS pix_transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    remetente_id INTEGER NOT NULL,
+    remetente_nome TEXT,
+    destinatario_id INTEGER NOT NULL,
+    destinatario_nome TEXT,
+    valor_bruto REAL NOT NULL,
+    taxa REAL NOT NULL,
+    valor_liquido REAL NOT NULL,
+    descricao TEXT,
+    data TEXT NOT NULL,
+    servidor_id INTEGER,
+    servidor_nome TEXT,
+    canal_id INTEGER,
+    mensagem_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'concluido'
+);
+CREATE INDEX IF NOT EXISTS idx_pix_remetente ON pix_transacoes (remetente_id, id);
+CREATE INDEX IF NOT EXISTS idx_pix_destinatario ON pix_transacoes (destinatario_id, id);
+CREATE INDEX IF NOT EXISTS idx_pix_servidor_data ON pix_transacoes (servidor_id, data);
+CREATE INDEX IF NOT EXISTS idx_pix_valor ON pix_transacoes (valor_bruto);
+CREATE INDEX IF NOT EXISTS idx_pix_data ON pix_transacoes (data);
+
+CREATE TABLE IF NOT EXISTS pix_bloqueios (
+    user_id INTEGER PRIMARY KEY,
+    motivo TEXT
+);
+
+CREATE TABLE IF NOT EXISTS apostas (
+    id TEXT PRIMARY KEY,
+    apostador INTEGER NOT NULL,
+    desafiado INTEGER NOT NULL,
+    valor REAL NOT NULL,
+    descricao TEXT,
+    status TEXT NOT NULL DEFAULT 'pendente',
+    vencedor INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_apostas_apostador ON apostas (status, apostador);
+CREATE INDEX IF NOT EXISTS idx_apostas_desafiado ON apostas (status, desafiado);
+"""
+
+COLUNAS_USUARIO = ('nome', 'saldo', 'xp', 'nivel', 'streak_daily')
+
+SEM_CURSOR = (1 << 63) - 1  # Maior id possível: primeira página da paginação
+
+COLUNAS_PIX = (
+    'remetente_id, remetente_nome, destinatario_id, destinatario_nome, valor_bruto, taxa, '
+    'valor_liquido, descricao, data, servidor_id, servidor_nome, canal_id, mensagem_id, status'
+)
+
+
+class DatabaseSQLite:
+    """Database em SQLite (WAL) com a mesma interface do Database em memória"""
+
+    def __init__(self, caminho='economia.db', commit_a_cada=200, intervalo_commit=1.0, capacidade_cache=10_000):
+        self.caminho = caminho
+        self.commit_a_cada = commit_a_cada
+        self.intervalo_commit = intervalo_commit
+
+        self.conexao = sqlite3.connect(caminho, cached_statements=256)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute('PRAGMA synchronous=NORMAL')
+        self.conexao.executescript(ESQUEMA)
+        colunas = {linha[1] for linha in self.conexao.execute('PRAGMA table_info(transacoes)')}
+        if 'saldo_posterior' not in colunas:  # Banco criado antes da coluna
+            self.conexao.execute('ALTER TABLE transacoes ADD COLUMN saldo_posterior REAL')
+        self.conexao.commit()
+
+        self._escritas_pendentes = 0
+        self._ultimo_commit = time.monotonic()
+        self._task = None
+        # Usuários ativos já convertidos; toda escrita em `usuarios` passa por aqui e mantém o cache
+        self.cache_usuarios = CacheLRU(capacidade_cache)
+        atexit.register(self.fechar)
+
+        print(f"✅ Database SQLite inicializado em {caminho}!")
+
+    # ===== COMMITS EM LOTE =====
+    def iniciar(self):
+        """Iniciar o commit periódico (chamar com o event loop rodando)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop_commit())
+
+    async def _loop_commit(self):
+        # Sem isso o último lote só iria para o disco na próxima escrita ou no atexit
+        while True:
+            await asyncio.sleep(self.intervalo_commit)
+            if self.conexao.in_transaction and time.monotonic() - self._ultimo_commit >= self.intervalo_commit:
+                try:
+                    self.commit()
+                except sqlite3.Error as e:
+                    print(f'❌ Erro no commit periódico: {e}')
+
+    def _escrita(self):
+        """Contabilizar uma escrita e fazer commit quando o lote fechar"""
+        self._escritas_pendentes += 1
+        if (self._escritas_pendentes >= self.commit_a_cada
+                or time.monotonic() - self._ultimo_commit >= self.intervalo_commit):
+            self.commit()
+
+    def commit(self):
+        self.conexao.commit()
+        self._escritas_pendentes = 0
+        self._ultimo_commit = time.monotonic()
+
+    @contextmanager
+    def _savepoint(self, nome):
+        """Desfazer só o bloco em caso de erro, sem perder as escritas de outros métodos que aguardam commit"""
+        if not self.conexao.in_transaction:
+            # Sem transação aberta, o RELEASE do savepoint viraria um COMMIT fora do lote
+            self.conexao.execute('BEGIN')
+        self.conexao.execute(f'SAVEPOINT {nome}')
+        try:
+            yield
+        except Exception:
+            self.conexao.execute(f'ROLLBACK TO {nome}')
+            self.conexao.execute(f'RELEASE {nome}')
+            self.cache_usuarios.limpar()  # O cache pode ter visto saldos do bloco desfeito
+            raise
+        self.conexao.execute(f'RELEASE {nome}')
+
+    def fechar(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            self.commit()
+            self.conexao.close()
+        except sqlite3.ProgrammingError:
+            pass  # Conexão já fechada
+
+    # ===== CONVERSÕES =====
+    @staticmethod
+    def _usuario(linha):
+        usuario = dict(linha)
+        usuario.update(json.loads(usuario.pop('extras')))
+        usuario['experiencia'] = usuario['xp']  # Alias para compatibilidade
+        usuario['data_criacao'] = datetime.fromisoformat(usuario['data_criacao'])
+        return usuario
+
+    @staticmethod
+    def _aposta(linha):
+        aposta = dict(linha)
+        aposta['_id'] = aposta.pop('id')
+        aposta['data'] = datetime.fromisoformat(aposta['data'])
+        return aposta
+
+    @staticmethod
+    def _com_data(linha):
+        registro = dict(linha)
+        registro['data'] = datetime.fromisoformat(registro['data'])
+        return registro
+
+    # ===== USUÁRIOS =====
+    def _buscar_usuario(self, user_id):
+        """Usuário pelo cache LRU ou pelo banco (None se não existir; ausências não ficam no cache)"""
+        usuario = self.cache_usuarios.obter(user_id)
+        if usuario is None:
+            linha = self.conexao.execute(
+                'SELECT * FROM usuarios WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            if linha is None:
+                return None
+            usuario = self._usuario(linha)
+            self.cache_usuarios.guardar(user_id, usuario)
+        return dict(usuario)  # Cópia: quem chama pode alterar sem sujar o cache
+
+    def _atualizar_cache(self, user_id, **campos):
+        usuario = self.cache_usuarios.espiar(user_id)
+        if usuario is not None:
+            usuario.update(campos)
+
+    def criar_usuario(self, user_id, nome_usuario):
+        self.conexao.execute(
+            'INSERT OR IGNORE INTO usuarios (user_id, nome, data_criacao) VALUES (?, ?, ?)',
+            (user_id, nome_usuario, datetime.now().isoformat())
+        )
+        self._escrita()
+        return self.obter_usuario(user_id)
+
+    def obter_usuario(self, user_id):
+        usuario = self._buscar_usuario(user_id)
+        if usuario is None:
+            return self.criar_usuario(user_id, f"User{user_id}")
+        return usuario
+
+    def obter_ou_criar_usuario(self, user_id, nome_usuario):
+        """Alias para compatibilidade com cogs"""
+        usuario = self._buscar_usuario(user_id)
+        if usuario is None:
+            return self.criar_usuario(user_id, nome_usuario)
+        return usuario
+
+    def consultar_usuario(self, user_id, nome_usuario=None):
+        """Usuário só para leitura: quem não tem conta recebe um UsuarioPadrao e nada é criado"""
+        usuario = self._buscar_usuario(user_id)
+        if usuario is None:
+            return UsuarioPadrao(user_id, nome_usuario or f"User{user_id}")
+        return usuario
+
+    def atualizar_campos_usuario(self, user_id, campos):
+        """Definir campos avulsos do usuário (ex: ultima_recompensa_daily, streak_daily)"""
+        self._atualizar_campos(user_id, campos)
+        self._escrita()
+
+    def _atualizar_campos(self, user_id, campos):
+        self.obter_usuario(user_id)
+        colunas = {k: v for k, v in campos.items() if k in COLUNAS_USUARIO}
+        extras = json.loads(self.conexao.execute(
+            'SELECT extras FROM usuarios WHERE user_id = ?', (user_id,)
+        ).fetchone()[0])
+        extras.update({k: v for k, v in campos.items() if k not in COLUNAS_USUARIO})
+
+        atribuicoes = ''.join(f'{coluna} = ?, ' for coluna in colunas)
+        self.conexao.execute(
+            f'UPDATE usuarios SET {atribuicoes}extras = ? WHERE user_id = ?',
+            (*colunas.values(), json.dumps(extras), user_id)
+        )
+        self.cache_usuarios.descartar(user_id)
+
+    def atualizar_saldo(self, user_id, valor, tipo=None, descricao=None, extra=None):
+        """Atualizar saldo com suporte a múltiplos argumentos"""
+        self.obter_usuario(user_id)
+        novo_saldo = self.conexao.execute(
+            'UPDATE usuarios SET saldo = saldo + ? WHERE user_id = ? RETURNING saldo',
+            (valor, user_id)
+        ).fetchone()[0]
+        self._atualizar_cache(user_id, saldo=novo_saldo)
+        self._escrita()
+
+        if tipo:
+            self._inserir_transacao(user_id, tipo, valor, descricao or "", datetime.now(), novo_saldo)
+
+        return novo_saldo
+
+    def definir_saldo(self, user_id, valor):
+        # Vira um ajuste no ledger, como no Database em memória
+        ajuste = valor - self.obter_usuario(user_id)['saldo']
+        if ajuste:
+            self.atualizar_saldo(user_id, ajuste, 'ajuste_saldo', f'Saldo definido para {valor:.2f}')
+
+    def obter_saldo(self, user_id):
+        return self.consultar_usuario(user_id)['saldo']
+
+    def adicionar_xp(self, user_id, xp):
+        self.obter_usuario(user_id)
+        self.conexao.execute('UPDATE usuarios SET xp = xp + ? WHERE user_id = ?', (xp, user_id))
+        self.cache_usuarios.descartar(user_id)
+        self._escrita()
+
+    def adicionar_nivel(self, user_id):
+        self.obter_usuario(user_id)
+        self.conexao.execute('UPDATE usuarios SET nivel = nivel + 1 WHERE user_id = ?', (user_id,))
+        self.cache_usuarios.descartar(user_id)
+        self._escrita()
+
+    # ===== TRANSAÇÕES =====
+    def registrar_transacao(self, user_id, tipo, valor, descricao=""):
+        return self._inserir_transacao(
+            user_id, tipo, valor, descricao, datetime.now(), self.consultar_usuario(user_id)['saldo']
+        )
+
+    def _inserir_transacao(self, user_id, tipo, valor, descricao, data, saldo_posterior):
+        transacao = {
+            'user_id': user_id,
+            'tipo': tipo,
+            'valor': valor,
+            'descricao': descricao,
+            'data': data,
+            'saldo_posterior': saldo_posterior
+        }
+        self.conexao.execute(
+            'INSERT INTO transacoes (user_id, tipo, valor, descricao, data, saldo_posterior) VALUES (?, ?, ?, ?, ?, ?)',
+            (user_id, tipo, valor, descricao, data.isoformat(), saldo_posterior)
+        )
+        self._escrita()
+        return transacao
+
+    def gravar_lote(self, variacoes, transacoes, experiencias=None, transacoes_pix=(), campos=None):
+        """Aplicar variações de saldo {user_id: valor}, xp {user_id: quantidade}, campos avulsos
+        {user_id: {campo: valor}}, transações e PIX em um commit"""
+        experiencias = experiencias or {}
+        with self._savepoint('gravar_lote'):
+            self.conexao.executemany(
+                'UPDATE usuarios SET saldo = saldo + ? WHERE user_id = ?',
+                [(variacao, user_id) for user_id, variacao in variacoes.items()]
+            )
+            self.conexao.executemany(
+                'UPDATE usuarios SET xp = xp + ? WHERE user_id = ?',
+                [(quantidade, user_id) for user_id, quantidade in experiencias.items()]
+            )
+            self.conexao.executemany(
+                'INSERT INTO transacoes (user_id, tipo, valor, descricao, data, saldo_posterior) VALUES (?, ?, ?, ?, ?, ?)',
+                [(t['user_id'], t['tipo'], t['valor'], t['descricao'], t['data'].isoformat(), t.get('saldo_posterior'))
+                 for t in transacoes]
+            )
+            self._inserir_pix(transacoes_pix)
+            for user_id, campos_usuario in (campos or {}).items():
+                self._atualizar_campos(user_id, campos_usuario)
+        self.commit()
+        for user_id, variacao in variacoes.items():
+            usuario = self.cache_usuarios.espiar(user_id)
+            if usuario is not None:
+                usuario['saldo'] += variacao
+        for user_id in experiencias:
+            self.cache_usuarios.descartar(user_id)
+
+    async def consultar(self, metodo, *args, **kwargs):
+        """Rodar a consulta `metodo` num comando (mesma interface do Database; o arquivo é local)"""
+        return getattr(self, metodo)(*args, **kwargs)
+
+    def obter_historico(self, user_id, limite=10):
+        linhas = self.conexao.execute(
+            'SELECT user_id, tipo, valor, descricao, data, saldo_posterior FROM transacoes '
+            'WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+            (user_id, limite)
+        ).fetchall()
+        return [self._com_data(linha) for linha in reversed(linhas)]
+
+    def obter_extrato(self, user_id, limite=50):
+        return self.obter_historico(user_id, limite)
+
+    def obter_extrato_pagina(self, user_id, tamanho=10, cursor=None):
+        """Transações mais recentes primeiro logo antes de `cursor` (ver Database.obter_extrato_pagina)"""
+        # O id é a sequência do cursor e já segue a ordem cronológica: basta o índice (user_id, id)
+        linhas = self.conexao.execute(
+            'SELECT id AS posicao, user_id, tipo, valor, descricao, data, saldo_posterior FROM transacoes '
+            'WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?',
+            (user_id, SEM_CURSOR if cursor is None else cursor[1], tamanho + 1)
+        ).fetchall()
+        return fechar_pagina([self._com_data(linha) for linha in linhas], tamanho)
+
+    def obter_totais_por_tipo(self, inicio=None, fim=None, user_id=None):
+        """Soma dos valores por tipo de transação no período [inicio, fim)"""
+        condicao, parametros = self._filtro_periodo(inicio, fim)
+        if user_id is not None:
+            condicao += ' AND user_id = ?'
+            parametros.append(user_id)
+        return dict(self.conexao.execute(
+            f'SELECT tipo, SUM(valor) FROM transacoes WHERE {condicao} GROUP BY tipo', parametros
+        ).fetchall())
+
+    def obter_totais_por_usuario(self, inicio=None, fim=None, tipo=None):
+        """Soma dos valores por usuário no período [inicio, fim)"""
+        condicao, parametros = self._filtro_periodo(inicio, fim)
+        if tipo is not None:
+            condicao += ' AND tipo = ?'
+            parametros.append(tipo)
+        return dict(self.conexao.execute(
+            f'SELECT user_id, SUM(valor) FROM transacoes WHERE {condicao} GROUP BY user_id', parametros
+        ).fetchall())
+
+    def obter_saldo_em(self, user_id, data):
+        """Saldo do usuário logo após sua última transação até `data` (None se não houver)"""
+        linha = self.conexao.execute(
+            'SELECT saldo_posterior FROM transacoes WHERE user_id = ? AND data <= ? '
+            'AND saldo_posterior IS NOT NULL ORDER BY data DESC, id DESC LIMIT 1',
+            (user_id, data.isoformat())
+        ).fetchone()
+        return None if linha is None else linha[0]
+
+    @staticmethod
+    def _filtro_periodo(inicio, fim):
+        condicao, parametros = '1', []
+        if inicio is not None:
+            condicao += ' AND data >= ?'
+            parametros.append(inicio.isoformat())
+        if fim is not None:
+            condicao += ' AND data < ?'
+            parametros.append(fim.isoformat())
+        return condicao, parametros
+
+    # ===== TRANSFERÊNCIAS =====
+    def movimentar(self, lancamentos):
+        """Aplicar lançamentos (user_id, valor, tipo, descricao) em várias contas: todos ou nenhum"""
+        with self._savepoint('movimentacao'):
+            saldos = self._movimentar([tuple(lancamento) for lancamento in lancamentos], datetime.now())
+        self._escrita()
+        return saldos
+
+    def _movimentar(self, lancamentos, data):
+        """Conferir e aplicar os lançamentos sem commit (SaldoInsuficiente antes de qualquer UPDATE)"""
+        variacoes = {}
+        for user_id, valor, _, _ in lancamentos:
+            variacoes[user_id] = variacoes.get(user_id, 0) + valor
+        for user_id, variacao in variacoes.items():
+            saldo = self.obter_usuario(user_id)['saldo']
+            if variacao < 0 and saldo + variacao < 0:
+                raise SaldoInsuficiente(user_id, saldo, -variacao)
+
+        # Todas as pernas entram no mesmo lote de commit (nenhum commit no meio)
+        saldos = {}
+        for user_id, variacao in variacoes.items():
+            saldos[user_id] = float(self.conexao.execute(
+                'UPDATE usuarios SET saldo = saldo + ? WHERE user_id = ? RETURNING saldo',
+                (variacao, user_id)
+            ).fetchone()[0])
+            self._atualizar_cache(user_id, saldo=saldos[user_id])
+
+        # Saldo depois de cada perna: parte do saldo inicial e vai somando na ordem dos lançamentos
+        correntes = {user_id: saldos[user_id] - variacao for user_id, variacao in variacoes.items()}
+        linhas = []
+        for user_id, valor, tipo, descricao in lancamentos:
+            correntes[user_id] += valor
+            if tipo:
+                linhas.append((user_id, tipo, valor, descricao or "", data.isoformat(), correntes[user_id]))
+        self.conexao.executemany(
+            'INSERT INTO transacoes (user_id, tipo, valor, descricao, data, saldo_posterior) VALUES (?, ?, ?, ?, ?, ?)',
+            linhas
+        )
+        return saldos
+
+    def transferir(self, origem, destino, valor, taxa=0.0, tipo_envio='transferencia_enviada',
+                   tipo_recebimento='transferencia_recebida', descricao_envio='', descricao_recebimento='',
+                   tipo_taxa='taxa'):
+        """Debitar `valor` da origem e creditar `valor - taxa` no destino atomicamente"""
+        if origem == destino:
+            raise ValueError('Origem e destino devem ser diferentes')
+        if valor <= 0 or not 0 <= taxa <= valor:
+            raise ValueError('Valor ou taxa inválidos')
+
+        valor_liquido = round(valor - taxa, 2)
+        lancamentos = [(origem, -valor_liquido, tipo_envio, descricao_envio)]
+        if taxa:
+            lancamentos.append((origem, -taxa, tipo_taxa, f'Taxa sobre transferência de {valor:.2f}'))
+        lancamentos.append((destino, valor_liquido, tipo_recebimento, descricao_recebimento))
+
+        saldos = self.movimentar(lancamentos)
+        return saldos[origem], saldos[destino]
+
+    # ===== LOTES =====
+    def aplicar_lote(self, operacoes):
+        """Aplicar Debito/Credito/Lancamento/Experiencia/RegistroPix numa única transação SQL e um commit"""
+        lancamentos, experiencias, pix = normalizar_lote(operacoes)
+        data = datetime.now()
+        transacoes_pix = [montar_pix(registro, data) for registro in pix]
+
+        with self._savepoint('lote'):
+            saldos = self._movimentar(lancamentos, data)
+            for user_id, _ in experiencias:
+                self.obter_usuario(user_id)
+            self.conexao.executemany(
+                'UPDATE usuarios SET xp = xp + ? WHERE user_id = ?',
+                [(quantidade, user_id) for user_id, quantidade in experiencias]
+            )
+            self._inserir_pix(transacoes_pix)
+        self.commit()
+
+        for user_id, _ in experiencias:
+            self.cache_usuarios.descartar(user_id)
+            if user_id not in saldos:
+                saldos[user_id] = self.obter_usuario(user_id)['saldo']
+        return saldos
+
+    # ===== INVESTIMENTOS =====
+    def obter_carteira(self, user_id):
+        linhas = self.conexao.execute(
+            'SELECT ticker, quantidade, preco_medio FROM investimentos WHERE user_id = ?', (user_id,)
+        ).fetchall()
+        return {l['ticker']: {'quantidade': l['quantidade'], 'preco_medio': l['preco_medio']} for l in linhas}
+
+    def adicionar_acao(self, user_id, ticker, quantidade, preco_compra):
+        self.conexao.execute(
+            'INSERT INTO investimentos (user_id, ticker, quantidade, preco_medio) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (user_id, ticker) DO UPDATE SET '
+            'preco_medio = (quantidade * preco_medio + excluded.quantidade * excluded.preco_medio) '
+            '/ (quantidade + excluded.quantidade), '
+            'quantidade = quantidade + excluded.quantidade',
+            (user_id, ticker, quantidade, preco_compra)
+        )
+        self._escrita()
+
+    def vender_acao(self, user_id, ticker, quantidade):
+        atualizado = self.conexao.execute(
+            'UPDATE investimentos SET quantidade = quantidade - ? '
+            'WHERE user_id = ? AND ticker = ? AND quantidade >= ?',
+            (quantidade, user_id, ticker, quantidade)
+        ).rowcount
+        if not atualizado:
+            return False
+
+        self.conexao.execute(
+            'DELETE FROM investimentos WHERE user_id = ? AND ticker = ? AND quantidade = 0',
+            (user_id, ticker)
+        )
+        self._escrita()
+        return True
+
+    def contar_detentores(self):
+        """{ticker: quantos usuários têm o ticker na carteira}"""
+        return dict(self.conexao.execute(
+            'SELECT UPPER(ticker), COUNT(DISTINCT user_id) FROM investimentos GROUP BY UPPER(ticker)'
+        ).fetchall())
+
+    # ===== PIX =====
+    def registrar_transacao_pix(self, remetente_id, remetente_nome, destinatario_id, destinatario_nome, valor_bruto, taxa, valor_liquido, descricao, servidor_id, servidor_nome, canal_id, mensagem_id):
+        transacao_pix = montar_pix(RegistroPix(
+            remetente_id, remetente_nome, destinatario_id, destinatario_nome, valor_bruto, taxa,
+            valor_liquido, descricao, servidor_id, servidor_nome, canal_id, mensagem_id
+        ), datetime.now())
+        self._inserir_pix([transacao_pix])
+        self._escrita()
+        return transacao_pix
+
+    def _inserir_pix(self, transacoes_pix):
+        self.conexao.executemany(
+            f'INSERT INTO pix_transacoes ({COLUNAS_PIX}) VALUES '
+            '(:remetente_id, :remetente_nome, :destinatario_id, :destinatario_nome, :valor_bruto, :taxa, '
+            ':valor_liquido, :descricao, :data, :servidor_id, :servidor_nome, :canal_id, :mensagem_id, :status)',
+            [dict(transacao_pix, data=transacao_pix['data'].isoformat()) for transacao_pix in transacoes_pix]
+        )
+
+    def _buscar_pix(self, condicao, parametros, limite=None):
+        """Buscar PIX mais recentes primeiro usando os índices da tabela"""
+        sql = f'SELECT id AS posicao, {COLUNAS_PIX} FROM pix_transacoes WHERE {condicao} ORDER BY id DESC'
+        if limite is not None:
+            sql += ' LIMIT ?'
+            parametros = (*parametros, limite)
+        return [self._com_data(linha) for linha in self.conexao.execute(sql, parametros)]
+
+    def obter_historico_pix(self, user_id, limite=10):
+        enviados = self._buscar_pix('remetente_id = ?', (user_id,), limite)
+        recebidos = self._buscar_pix('destinatario_id = ?', (user_id,), limite)
+        return {'enviados': enviados[::-1], 'recebidos': recebidos[::-1]}
+
+    def obter_pix_pagina(self, user_id, tamanho=10, cursor=None):
+        """PIX enviados e recebidos, mais recentes primeiro, logo antes de `cursor`"""
+        antes = SEM_CURSOR if cursor is None else cursor[1]
+        # Duas buscas indexadas (remetente e destinatário) unidas em ordem de id
+        enviados = self._buscar_pix('remetente_id = ? AND id < ?', (user_id, antes), tamanho + 1)
+        recebidos = self._buscar_pix('destinatario_id = ? AND id < ?', (user_id, antes), tamanho + 1)
+        pagina = heapq.merge(enviados, recebidos, key=lambda transacao_pix: transacao_pix['posicao'], reverse=True)
+        return fechar_pagina(list(islice(pagina, tamanho + 1)), tamanho)
+
+    def obter_pix_servidor(self, servidor_id, data_inicio=None, limite=None):
+        """PIX de um servidor (mais recentes primeiro), opcionalmente a partir de uma data"""
+        if data_inicio is None:
+            return self._buscar_pix('servidor_id = ?', (servidor_id,), limite)
+        return self._buscar_pix(
+            'servidor_id = ? AND data >= ?', (servidor_id, data_inicio.isoformat()), limite
+        )
+
+    def obter_estatisticas_pix(self, user_id):
+        enviados = self.conexao.execute(
+            'SELECT COUNT(*), COALESCE(SUM(valor_bruto), 0), COALESCE(SUM(taxa), 0), COALESCE(MAX(valor_bruto), 0) '
+            'FROM pix_transacoes WHERE remetente_id = ?', (user_id,)
+        ).fetchone()
+        recebidos = self.conexao.execute(
+            'SELECT COUNT(*), COALESCE(SUM(valor_liquido), 0), COALESCE(MAX(valor_liquido), 0) '
+            'FROM pix_transacoes WHERE destinatario_id = ?', (user_id,)
+        ).fetchone()
+
+        return {
+            'total_enviados': enviados[0],
+            'total_recebidos': recebidos[0],
+            'valor_total_enviado': enviados[1],
+            'valor_total_recebido': recebidos[1],
+            'total_taxas': enviados[2],
+            'balanco': recebidos[1] - enviados[1],
+            'maior_pix_enviado': enviados[3],
+            'maior_pix_recebido': recebidos[2]
+        }
+
+    def obter_pix_suspeitos(self, limite_valor=10000, limite_quantidade=20):
+        """PIX de alto valor e remetentes com mais de limite_quantidade PIX nas últimas 24h"""
+        alto_valor = self._buscar_pix('valor_bruto > ?', (limite_valor,), 200)
+        desde = (datetime.now() - timedelta(days=1)).isoformat()
+        frequentes = [
+            {'_id': linha[0], 'total': linha[1], 'valor_total': linha[2]}
+            for linha in self.conexao.execute(
+                'SELECT remetente_id, COUNT(*), SUM(valor_bruto) FROM pix_transacoes WHERE data >= ? '
+                'GROUP BY remetente_id HAVING COUNT(*) > ? ORDER BY COUNT(*) DESC',
+                (desde, limite_quantidade)
+            )
+        ]
+        return {'alto_valor': alto_valor, 'usuarios_frequentes': frequentes, 'alertas': []}
+
+    def obter_relatorio_pix_servidor(self, servidor_id, data_inicio=None, data_fim=None):
+        """Totais de PIX do servidor no período [data_inicio, data_fim)"""
+        condicao, parametros = self._filtro_periodo(data_inicio, data_fim)
+        total_transacoes, volume_total, total_taxas = self.conexao.execute(
+            'SELECT COUNT(*), COALESCE(SUM(valor_bruto), 0), COALESCE(SUM(taxa), 0) '
+            f'FROM pix_transacoes WHERE servidor_id = ? AND {condicao}',
+            (servidor_id, *parametros)
+        ).fetchone()
+
+        return {
+            'total_transacoes': total_transacoes,
+            'volume_total': volume_total,
+            'total_taxas': total_taxas,
+            'ticket_medio': volume_total / total_transacoes if total_transacoes > 0 else 0
+        }
+
+    def bloquear_usuario_pix(self, user_id, motivo):
+        self.conexao.execute(
+            'INSERT OR REPLACE INTO pix_bloqueios (user_id, motivo) VALUES (?, ?)', (user_id, motivo)
+        )
+        self._escrita()
+
+    def desbloquear_usuario_pix(self, user_id):
+        self.conexao.execute('DELETE FROM pix_bloqueios WHERE user_id = ?', (user_id,))
+        self._escrita()
+
+    def verificar_bloqueio_pix(self, user_id):
+        return self.conexao.execute(
+            'SELECT 1 FROM pix_bloqueios WHERE user_id = ?', (user_id,)
+        ).fetchone() is not None
+
+    # ===== APOSTAS =====
+    def criar_aposta(self, apostador_id, desafiado_id, valor, descricao):
+        aposta_id = uuid.uuid4().hex[:12]
+        self.conexao.execute(
+            'INSERT INTO apostas (id, apostador, desafiado, valor, descricao, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (aposta_id, apostador_id, desafiado_id, valor, descricao, datetime.now().isoformat())
+        )
+        self._escrita()
+        return aposta_id
+
+    def obter_aposta(self, aposta_id):
+        linha = self.conexao.execute('SELECT * FROM apostas WHERE id = ?', (aposta_id,)).fetchone()
+        return self._aposta(linha) if linha else None
+
+    def obter_apostas_pendentes(self, user_id):
+        linhas = self.conexao.execute(
+            "SELECT * FROM apostas WHERE status = 'pendente' AND apostador = ? "
+            "UNION ALL "
+            "SELECT * FROM apostas WHERE status = 'pendente' AND desafiado = ? AND apostador != ?",
+            (user_id, user_id, user_id)
+        ).fetchall()
+        return [self._aposta(linha) for linha in linhas]
+
+    def finalizar_aposta(self, aposta_id, vencedor_id):
+        self.conexao.execute(
+            "UPDATE apostas SET status = 'finalizada', vencedor = ? WHERE id = ?", (vencedor_id, aposta_id)
+        )
+        self._escrita()
+
+    # ===== RANKING =====
+    def obter_ranking(self, limite=10, inicio=0):
+        linhas = self.conexao.execute(
+            'SELECT * FROM usuarios ORDER BY saldo DESC, user_id LIMIT ? OFFSET ?', (limite, inicio)
+        ).fetchall()
+        return [self._usuario(linha) for linha in linhas]
+
+    def obter_top_xp(self, limite=10, inicio=0):
+        linhas = self.conexao.execute(
+            'SELECT * FROM usuarios ORDER BY xp DESC, user_id LIMIT ? OFFSET ?', (limite, inicio)
+        ).fetchall()
+        return [self._usuario(linha) for linha in linhas]
+
+    def obter_posicao_ranking(self, user_id):
+        """Posição do usuário no ranking de saldo (1 = mais rico) ou None"""
+        linha = self.conexao.execute('SELECT saldo FROM usuarios WHERE user_id = ?', (user_id,)).fetchone()
+        if linha is None:
+            return None
+        return self.conexao.execute(
+            'SELECT COUNT(*) + 1 FROM usuarios WHERE saldo > ? OR (saldo = ? AND user_id < ?)',
+            (linha[0], linha[0], user_id)
+        ).fetchone()[0]
+
+    def contar_usuarios(self):
+        return self.conexao.execute('SELECT COUNT(*) FROM usuarios').fetchone()[0]
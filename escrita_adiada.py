@@ -0,0 +1,291 @@
+# ============================================================================
+# ESCRITA ADIADA - CAMADA WRITE-BEHIND PARA SALDOS E TRANSAÇÕES
+# ============================================================================
+#
+# Fica na frente de um backend persistente (ex: DatabaseSQLite) com a mesma
+# API. `atualizar_saldo`, `registrar_transacao`, `movimentar` (cassino,
+# apostas, compra e venda), `aplicar_lote` (daily, PIX) e
+# `atualizar_campos_usuario` (streak do daily) não vão ao banco: a variação
+# de saldo e de xp é somada por usuário, campos avulsos ficam no último valor
+# e transações e PIX entram em listas. Saldos são conferidos aqui, contra o saldo do backend mais o
+# pendente, antes de qualquer coisa entrar na fila. O lote é gravado de uma
+# vez (`gravar_lote` do backend, um commit) quando:
+#   - passam `intervalo` segundos (task do event loop e também na próxima escrita)
+#   - acumulam `operacoes_por_lote` operações
+#   - outro método do backend é chamado (mantém a ordem das escritas); só as
+#     leituras de LEITURAS_INDEPENDENTES, que não veem nada do que é adiado,
+#     vão direto
+#   (`python -m benchmarks.escrita_adiada` mostra comandos e commits por cenário)
+#   - o bot é encerrado (fechar / atexit)
+# Se o backend falhar, o lote continua na fila. Com `maximo_pendentes`
+# operações na fila, a próxima escrita tenta gravar na hora e, se não der, é
+# recusada com FilaCheia antes de entrar na fila (backpressure): escrita que
+# entrou na fila nunca levanta erro, porque ainda vai ser gravada.
+# Leituras de usuário somam a variação pendente ao saldo e ao xp do backend
+# e aplicam os campos pendentes.
+# Sem lock, como o Database: comandos, a task de gravação e o backend rodam
+# todos no event loop do bot, e o atexit só roda depois que ele parou.
+
+import asyncio
+import atexit
+import time
+from datetime import datetime
+
+from database import SaldoInsuficiente, montar_pix, normalizar_lote
+
+# Leituras que não dependem de saldos, xp, campos, transações ou PIX pendentes
+LEITURAS_INDEPENDENTES = frozenset({
+    'obter_carteira', 'contar_detentores', 'verificar_bloqueio_pix', 'obter_aposta', 'obter_apostas_pendentes'
+})
+
+
+class FilaCheia(Exception):
+    """Escrita recusada sem ser aplicada: a fila está no limite e o backend não está gravando"""
+
+    def __init__(self, pendentes):
+        self.pendentes = pendentes
+        super().__init__(f'{pendentes} operações aguardando gravação; escrita recusada')
+
+
+class EscritaAdiada:
+    """Acumula variações de saldo e xp, campos avulsos, transações e PIX e grava em lote no backend"""
+
+    def __init__(self, backend, intervalo=0.05, operacoes_por_lote=500, maximo_pendentes=20_000):
+        self.backend = backend
+        self.intervalo = intervalo
+        self.operacoes_por_lote = operacoes_por_lote
+        self.maximo_pendentes = maximo_pendentes
+
+        self._variacoes = {}    # user_id -> soma das variações ainda não gravadas
+        self._saldos_base = {}  # user_id -> saldo já gravado no backend (cache)
+        self._experiencias = {}  # user_id -> xp ainda não gravado
+        self._campos = {}       # user_id -> {campo: valor} ainda não gravados
+        self._transacoes = []
+        self._pix = []
+        self._operacoes = 0
+        self._ultimo_envio = time.monotonic()
+        self._task = None
+
+        self.lotes_gravados = 0
+        self.operacoes_gravadas = 0
+        self.recusadas = 0
+        atexit.register(self.fechar)
+
+    # ===== CICLO DE VIDA =====
+    def iniciar(self):
+        """Iniciar a gravação periódica (chamar com o event loop rodando)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop_gravacao())
+        if hasattr(self.backend, 'iniciar'):
+            self.backend.iniciar()  # Commit periódico das escritas que vão direto ao backend
+
+    async def _loop_gravacao(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f'❌ Erro ao gravar lote pendente: {e}')
+
+    def fechar(self):
+        """Gravar tudo que estiver pendente e fechar o backend"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.descarregar()
+        if hasattr(self.backend, 'fechar'):
+            self.backend.fechar()
+
+    # ===== GRAVAÇÃO =====
+    def descarregar(self):
+        """Gravar o lote pendente no backend (um único commit)"""
+        if not self._operacoes:
+            self._ultimo_envio = time.monotonic()
+            return
+        self.backend.gravar_lote(self._variacoes, self._transacoes, self._experiencias, self._pix, self._campos)
+
+        self.lotes_gravados += 1
+        self.operacoes_gravadas += self._operacoes
+        if len(self._saldos_base) > self.maximo_pendentes:
+            self._saldos_base = {}
+        else:
+            for user_id, variacao in self._variacoes.items():
+                self._saldos_base[user_id] += variacao
+        self._variacoes = {}
+        self._experiencias = {}
+        self._campos = {}
+        self._transacoes = []
+        self._pix = []
+        self._operacoes = 0
+        self._ultimo_envio = time.monotonic()
+
+    def _reservar(self, operacoes):
+        """Backpressure: com a fila no limite, gravar agora ou recusar a escrita antes de aplicá-la"""
+        if self._operacoes + operacoes <= self.maximo_pendentes:
+            return
+        try:
+            self.descarregar()
+        except Exception as e:
+            self.recusadas += 1
+            raise FilaCheia(self._operacoes) from e
+
+    def _apos_escrita(self, operacoes=1):
+        """Contar operações já na fila e gravar o lote quando fechar (erros não sobem: a escrita vale)"""
+        self._operacoes += operacoes
+        if (self._operacoes >= self.operacoes_por_lote
+                or time.monotonic() - self._ultimo_envio >= self.intervalo):
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f'⚠️ Lote mantido na fila ({self._operacoes} operações): {e}')
+
+    # ===== ESCRITAS ACUMULADAS =====
+    def _saldo(self, user_id):
+        """Saldo atual: o do backend (criando o usuário se preciso) mais a variação pendente"""
+        if user_id not in self._saldos_base:
+            self._saldos_base[user_id] = self.backend.obter_usuario(user_id)['saldo']
+        return self._saldos_base[user_id] + self._variacoes.get(user_id, 0)
+
+    def atualizar_saldo(self, user_id, valor, tipo=None, descricao=None, extra=None):
+        """Atualizar saldo com suporte a múltiplos argumentos"""
+        self._reservar(1)
+        novo_saldo = self._saldo(user_id) + valor
+        self._variacoes[user_id] = self._variacoes.get(user_id, 0) + valor
+        if tipo:
+            self._anexar_transacao(user_id, tipo, valor, descricao or "", novo_saldo, datetime.now())
+        self._apos_escrita()
+        return novo_saldo
+
+    def registrar_transacao(self, user_id, tipo, valor, descricao=""):
+        self._reservar(1)
+        saldo = self._saldos_base.get(user_id)
+        if saldo is not None:
+            saldo += self._variacoes.get(user_id, 0)
+        transacao = self._anexar_transacao(user_id, tipo, valor, descricao, saldo, datetime.now())
+        self._apos_escrita()
+        return transacao
+
+    def _anexar_transacao(self, user_id, tipo, valor, descricao, saldo_posterior, data):
+        transacao = {
+            'user_id': user_id,
+            'tipo': tipo,
+            'valor': valor,
+            'descricao': descricao,
+            'data': data,
+            'saldo_posterior': saldo_posterior
+        }
+        self._transacoes.append(transacao)
+        return transacao
+
+    def _lancar(self, lancamentos, data):
+        """Conferir todos os saldos e só então enfileirar os lançamentos (todos ou nenhum)"""
+        variacoes = {}
+        for user_id, valor, _, _ in lancamentos:
+            variacoes[user_id] = variacoes.get(user_id, 0) + valor
+        for user_id, variacao in variacoes.items():
+            saldo = self._saldo(user_id)
+            if variacao < 0 and saldo + variacao < 0:
+                raise SaldoInsuficiente(user_id, saldo, -variacao)
+
+        for user_id, valor, tipo, descricao in lancamentos:
+            saldo = self._saldo(user_id) + valor
+            self._variacoes[user_id] = self._variacoes.get(user_id, 0) + valor
+            if tipo:
+                self._anexar_transacao(user_id, tipo, valor, descricao or "", saldo, data)
+        return variacoes
+
+    def movimentar(self, lancamentos):
+        """Aplicar lançamentos (user_id, valor, tipo, descricao) em várias contas: todos ou nenhum"""
+        lancamentos = [tuple(lancamento) for lancamento in lancamentos]
+        self._reservar(len(lancamentos))
+        variacoes = self._lancar(lancamentos, datetime.now())
+        self._apos_escrita(len(lancamentos))
+        return {user_id: self._saldo(user_id) for user_id in variacoes}
+
+    def transferir(self, origem, destino, valor, taxa=0.0, tipo_envio='transferencia_enviada',
+                   tipo_recebimento='transferencia_recebida', descricao_envio='', descricao_recebimento='',
+                   tipo_taxa='taxa'):
+        """Mesma regra do backend, com os lançamentos adiados"""
+        if origem == destino:
+            raise ValueError('Origem e destino devem ser diferentes')
+        if valor <= 0 or not 0 <= taxa <= valor:
+            raise ValueError('Valor ou taxa inválidos')
+
+        valor_liquido = round(valor - taxa, 2)
+        lancamentos = [(origem, -valor_liquido, tipo_envio, descricao_envio)]
+        if taxa:
+            lancamentos.append((origem, -taxa, tipo_taxa, f'Taxa sobre transferência de {valor:.2f}'))
+        lancamentos.append((destino, valor_liquido, tipo_recebimento, descricao_recebimento))
+
+        saldos = self.movimentar(lancamentos)
+        return saldos[origem], saldos[destino]
+
+    def aplicar_lote(self, operacoes):
+        """Debito/Credito/Lancamento/Experiencia/RegistroPix adiados como uma unidade (vão no mesmo commit)"""
+        lancamentos, experiencias, pix = normalizar_lote(operacoes)
+        self._reservar(len(lancamentos) + len(experiencias) + len(pix))
+        data = datetime.now()
+        contas = {lancamento[0] for lancamento in lancamentos} | {user_id for user_id, _ in experiencias}
+        for user_id in contas:
+            self._saldo(user_id)  # Cria quem ainda não existe no backend
+        self._lancar(lancamentos, data)
+        for user_id, quantidade in experiencias:
+            self._experiencias[user_id] = self._experiencias.get(user_id, 0) + quantidade
+        self._pix.extend(montar_pix(registro, data) for registro in pix)
+        self._apos_escrita(len(lancamentos) + len(experiencias) + len(pix))
+        return {user_id: self._saldo(user_id) for user_id in contas}
+
+    def atualizar_campos_usuario(self, user_id, campos):
+        """Campos avulsos entram no lote; saldo e xp definidos na mão passam pelo backend, na ordem"""
+        if 'saldo' in campos or 'xp' in campos:
+            return self._pelo_backend(self.backend.atualizar_campos_usuario, user_id, campos)
+        self._reservar(1)
+        self._saldo(user_id)  # Cria quem ainda não existe no backend
+        self._campos.setdefault(user_id, {}).update(campos)
+        self._apos_escrita()
+
+    # ===== LEITURAS COM ESCRITAS PENDENTES =====
+    def _com_pendentes(self, usuario):
+        variacao = self._variacoes.get(usuario['user_id'])
+        experiencia = self._experiencias.get(usuario['user_id'])
+        campos = self._campos.get(usuario['user_id'])
+        if not variacao and not experiencia and not campos:
+            return usuario
+        usuario = dict(usuario, **(campos or {}))
+        usuario['saldo'] += variacao or 0
+        if experiencia:
+            usuario['xp'] += experiencia
+            usuario['experiencia'] = usuario['xp']
+        return usuario
+
+    def obter_usuario(self, user_id):
+        return self._com_pendentes(self.backend.obter_usuario(user_id))
+
+    def obter_ou_criar_usuario(self, user_id, nome_usuario):
+        return self._com_pendentes(self.backend.obter_ou_criar_usuario(user_id, nome_usuario))
+
+    def consultar_usuario(self, user_id, nome_usuario=None):
+        return self._com_pendentes(self.backend.consultar_usuario(user_id, nome_usuario))
+
+    def obter_saldo(self, user_id):
+        return self.consultar_usuario(user_id)['saldo']
+
+    async def consultar(self, metodo, *args, **kwargs):
+        """Consulta de comando (ver Database.consultar), vendo o que está pendente"""
+        return getattr(self, metodo)(*args, **kwargs)
+
+    def __getattr__(self, nome):
+        atributo = getattr(self.backend, nome)
+        if not callable(atributo) or nome in LEITURAS_INDEPENDENTES:
+            return atributo
+
+        def chamar(*args, **kwargs):
+            return self._pelo_backend(atributo, *args, **kwargs)
+        return chamar
+
+    def _pelo_backend(self, metodo, *args, **kwargs):
+        """Demais métodos: gravar o pendente antes, para o backend ver tudo na ordem"""
+        self.descarregar()
+        # O backend pode alterar saldos por conta própria (definir_saldo...)
+        self._saldos_base.clear()
+        return metodo(*args, **kwargs)
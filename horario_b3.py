@@ -0,0 +1,82 @@
+# ============================================================================
+# HORÁRIO DA B3 - PREGÃO, FERIADOS E VALIDADE DAS COTAÇÕES
+# ============================================================================
+#
+# Cotação só muda com o pregão aberto. Durante o pregão ela vale por
+# VALIDADE_PREGAO; fora dele (noite, fim de semana, feriado) vale até a
+# próxima abertura, então o bot não consulta a brapi.dev à toa.
+#
+# Feriados da B3: os fixos nacionais, Carnaval, Sexta-feira Santa e Corpus
+# Christi (calculados a partir da Páscoa), véspera de Natal e o último dia
+# útil do ano.
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+
+FUSO_B3 = timezone(timedelta(hours=-3))  # Brasília (sem horário de verão desde 2019)
+ABERTURA = time(10, 0)
+FECHAMENTO = time(18, 0)  # Cobre o fechamento às 18h quando os EUA estão no horário de verão
+VALIDADE_PREGAO = 120     # Segundos
+VALIDADE_MINIMA = 60
+
+FERIADOS_FIXOS = ((1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 24), (12, 25))
+
+
+def _pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=8)
+def feriados(ano):
+    """Dias sem pregão na B3 além dos fins de semana"""
+    pascoa = _pascoa(ano)
+    dias = {date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS}
+    dias.update(pascoa + timedelta(days=delta) for delta in (-48, -47, -2, 60))
+
+    ultimo = date(ano, 12, 31)
+    while ultimo.weekday() >= 5 or ultimo in dias:
+        ultimo -= timedelta(days=1)
+    dias.add(ultimo)
+    return frozenset(dias)
+
+
+def dia_de_pregao(dia):
+    return dia.weekday() < 5 and dia not in feriados(dia.year)
+
+
+def agora_b3():
+    return datetime.now(FUSO_B3)
+
+
+def pregao_aberto(agora=None):
+    agora = agora or agora_b3()
+    return dia_de_pregao(agora.date()) and ABERTURA <= agora.time() < FECHAMENTO
+
+
+def proxima_abertura(agora=None):
+    """Início do próximo pregão (o de hoje, se ainda não abriu)"""
+    agora = agora or agora_b3()
+    dia = agora.date()
+    if agora.time() >= ABERTURA:
+        dia += timedelta(days=1)
+    while not dia_de_pregao(dia):
+        dia += timedelta(days=1)
+    return datetime.combine(dia, ABERTURA, tzinfo=agora.tzinfo)
+
+
+def validade_cotacao(agora=None):
+    """Segundos que uma cotação buscada agora continua valendo"""
+    agora = agora or agora_b3()
+    if pregao_aberto(agora):
+        return VALIDADE_PREGAO
+    return max(VALIDADE_MINIMA, (proxima_abertura(agora) - agora).total_seconds())
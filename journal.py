@@ -0,0 +1,290 @@
+# ============================================================================
+# JOURNAL - LOG DE MUTAÇÕES (WRITE-AHEAD) COM SNAPSHOTS PERIÓDICOS
+# ============================================================================
+#
+# Layout do diretório:
+#   snapshot-000000000003.pkl   estado completo no início da geração 3
+#                               (.bin com formato_snapshot=snapshot_binario)
+#   journal-000000000003.log    mutações aplicadas depois desse snapshot
+#
+# Cada escrita no journal é um "frame": <tamanho:uint32><crc32:uint32><pickle>
+# com um lote inteiro de registros (group commit). Um frame truncado ou com
+# CRC inválido no fim do arquivo é descartado no replay (escrita interrompida)
+# e cortado do arquivo antes de reabri-lo para escrita: sem isso as escritas
+# seguintes ficariam depois do lixo e o próximo replay também as descartaria.
+#
+# Snapshot sem pausar o bot: solicitar_snapshot faz os.fork e o processo
+# filho, com uma cópia copy-on-write da memória, serializa e grava o
+# snapshot da geração seguinte. A thread de commit passa para o journal
+# dessa geração no ponto exato do pedido e só apaga a geração antiga quando
+# o filho termina bem. Se o bot cair antes, o replay parte do snapshot
+# anterior e lê os dois journals em ordem.
+
+import atexit
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+CABECALHO_FRAME = struct.Struct('<II')
+
+
+class _PedidoSnapshot:
+    """Marcador no fluxo de registros: o snapshot vale exatamente neste ponto"""
+
+    def __init__(self, geracao, pid=None, dados=None):
+        self.geracao = geracao
+        self.pid = pid      # Processo filho gravando o snapshot
+        self.dados = dados  # Snapshot já serializado (sistemas sem fork)
+
+
+class Journal:
+    """Journal append-only com fsync em lote feito por uma thread de fundo"""
+
+    def __init__(self, diretorio, intervalo_commit=0.05, registros_por_snapshot=500_000, formato_snapshot=None):
+        self.diretorio = diretorio
+        # Módulo com EXTENSAO, serializar(estado) e abrir(caminho); None = pickle
+        self.formato_snapshot = formato_snapshot
+        self.intervalo_commit = intervalo_commit
+        self.registros_por_snapshot = registros_por_snapshot
+        self.registros_desde_snapshot = 0
+        self._fim_valido = {}  # geração -> fim do último frame válido (visto no replay)
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.geracao = self._ultima_geracao()
+
+        self._pendentes = []
+        self._lock = threading.Lock()
+        self._arquivo = None
+        self._parar = threading.Event()
+        self._thread = None
+        self._geracao_pedida = self.geracao  # Última geração com snapshot pedido
+        self._snapshot_em_andamento = False
+        self._filho = None  # (pid, geração antiga) enquanto o filho grava o snapshot
+
+    # ===== ARQUIVOS =====
+    def _caminho(self, prefixo, geracao, extensao):
+        return os.path.join(self.diretorio, f'{prefixo}-{geracao:012d}.{extensao}')
+
+    def _geracoes(self, prefixo):
+        geracoes = []
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith(prefixo + '-') and not nome.endswith('.tmp'):
+                try:
+                    geracoes.append(int(nome[len(prefixo) + 1:].split('.')[0]))
+                except ValueError:
+                    continue
+        return sorted(geracoes)
+
+    def _ultima_geracao(self):
+        snapshots = self._geracoes('snapshot')
+        return snapshots[-1] if snapshots else 0
+
+    # ===== LEITURA =====
+    def carregar(self):
+        """Retorna (estado do último snapshot ou None, iterador de registros)"""
+        estado = None
+        caminho_snapshot = self._caminho('snapshot', self.geracao, 'pkl')
+        if self.formato_snapshot is not None:
+            caminho_formato = self._caminho('snapshot', self.geracao, self.formato_snapshot.EXTENSAO)
+            if os.path.exists(caminho_formato):
+                return self.formato_snapshot.abrir(caminho_formato), self._registros(self.geracao)
+        if os.path.exists(caminho_snapshot):
+            with open(caminho_snapshot, 'rb') as f:
+                estado = pickle.load(f)
+
+        return estado, self._registros(self.geracao)
+
+    def _registros(self, geracao_inicial):
+        for geracao in self._geracoes('journal'):
+            if geracao < geracao_inicial:
+                continue
+            with open(self._caminho('journal', geracao, 'log'), 'rb') as f:
+                dados = f.read()
+
+            fim = 0
+            for payload, fim in self._frames(dados):
+                yield from pickle.loads(payload)
+            if fim < len(dados):
+                print(f'⚠️ Journal {geracao}: frame incompleto descartado')
+            self._fim_valido[geracao] = fim
+
+    @staticmethod
+    def _frames(dados):
+        """(payload, fim do frame) de cada frame válido, parando no primeiro incompleto ou corrompido"""
+        posicao = 0
+        while posicao + CABECALHO_FRAME.size <= len(dados):
+            tamanho, crc = CABECALHO_FRAME.unpack_from(dados, posicao)
+            inicio = posicao + CABECALHO_FRAME.size
+            payload = dados[inicio:inicio + tamanho]
+            if len(payload) < tamanho or zlib.crc32(payload) != crc:
+                return
+            posicao = inicio + tamanho
+            yield payload, posicao
+
+    def _cortar_cauda(self, caminho, geracao):
+        """Truncar o journal no fim do último frame válido (restos de uma escrita interrompida)"""
+        if not os.path.exists(caminho):
+            return
+        fim = self._fim_valido.get(geracao)
+        if fim is None:
+            # iniciar() sem replay antes: procurar o fim válido agora
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+            fim = 0
+            for _, fim in self._frames(dados):
+                pass
+        tamanho = os.path.getsize(caminho)
+        if fim < tamanho:
+            with open(caminho, 'r+b') as f:
+                f.truncate(fim)
+                f.flush()
+                os.fsync(f.fileno())
+            print(f'⚠️ Journal {geracao}: {tamanho - fim} bytes inválidos cortados do fim')
+
+    # ===== ESCRITA =====
+    def iniciar(self):
+        """Abrir o journal da geração atual e iniciar a thread de commit"""
+        # Um snapshot interrompido deixa o journal da geração seguinte: continuar nele
+        self.geracao = max([self.geracao] + self._geracoes('journal'))
+        self._geracao_pedida = self.geracao
+        caminho = self._caminho('journal', self.geracao, 'log')
+        self._cortar_cauda(caminho, self.geracao)
+        self._arquivo = open(caminho, 'ab')
+        self._thread = threading.Thread(target=self._loop_commit, name='journal-commit', daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def registrar(self, registro):
+        """Enfileirar um registro (não bloqueia: o fsync acontece em lote)"""
+        with self._lock:
+            self._pendentes.append(registro)
+        self.registros_desde_snapshot += 1
+
+    def precisa_snapshot(self):
+        return (self.registros_desde_snapshot >= self.registros_por_snapshot
+                and not self._snapshot_em_andamento)
+
+    def solicitar_snapshot(self, estado):
+        """Gravar o estado como snapshot num processo filho (o fork custa só a cópia das tabelas de página)"""
+        if self._snapshot_em_andamento:
+            return
+        self._snapshot_em_andamento = True
+        self._geracao_pedida += 1
+        geracao = self._geracao_pedida
+
+        if hasattr(os, 'fork'):
+            pid = os.fork()
+            if pid == 0:
+                self._gravar_no_filho(estado, geracao)
+            pedido = _PedidoSnapshot(geracao, pid=pid)
+        else:
+            pedido = _PedidoSnapshot(geracao, dados=self._serializar(estado))
+        with self._lock:
+            self._pendentes.append(pedido)
+        self.registros_desde_snapshot = 0
+
+    def _serializar(self, estado):
+        if self.formato_snapshot is not None:
+            return self.formato_snapshot.serializar(estado)
+        return pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _caminho_snapshot(self, geracao):
+        extensao = self.formato_snapshot.EXTENSAO if self.formato_snapshot is not None else 'pkl'
+        return self._caminho('snapshot', geracao, extensao)
+
+    @staticmethod
+    def _gravar_arquivo(caminho, dados):
+        with open(caminho + '.tmp', 'wb') as f:
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho + '.tmp', caminho)
+
+    def _gravar_no_filho(self, estado, geracao):
+        """Corpo do processo filho: gravar o snapshot e sair sem passar pelo atexit do bot"""
+        try:
+            self._gravar_arquivo(self._caminho_snapshot(geracao), self._serializar(estado))
+        except BaseException as e:
+            # os.write: o lock do sys.stdout pode ter sido copiado travado por outra thread
+            os.write(2, f'❌ Erro ao gravar snapshot {geracao}: {e!r}\n'.encode())
+            os._exit(1)
+        os._exit(0)
+
+    def _loop_commit(self):
+        while not self._parar.wait(self.intervalo_commit):
+            self._commit()
+            self._conferir_filho()
+        self._commit()
+        self._conferir_filho(esperar=True)
+
+    def _commit(self):
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, []
+        if not pendentes:
+            return
+
+        lote = []
+        for item in pendentes:
+            if isinstance(item, _PedidoSnapshot):
+                self._escrever_frame(lote)
+                lote = []
+                self._rotacionar(item)
+            else:
+                lote.append(item)
+        self._escrever_frame(lote)
+
+    def _escrever_frame(self, registros):
+        if not registros:
+            return
+        payload = pickle.dumps(registros, protocol=pickle.HIGHEST_PROTOCOL)
+        self._arquivo.write(CABECALHO_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def _rotacionar(self, pedido):
+        """Passar a escrever no journal da geração do snapshot pedido"""
+        if pedido.dados is not None:
+            self._gravar_arquivo(self._caminho_snapshot(pedido.geracao), pedido.dados)
+
+        self._arquivo.close()
+        self._arquivo = open(self._caminho('journal', pedido.geracao, 'log'), 'ab')
+        geracao_antiga, self.geracao = self.geracao, pedido.geracao
+
+        if pedido.pid is None:
+            self._apagar_ate(geracao_antiga)
+            self._snapshot_em_andamento = False
+        else:
+            self._filho = (pedido.pid, geracao_antiga)
+
+    def _conferir_filho(self, esperar=False):
+        """Quando o filho terminar: apagar a geração antiga se o snapshot foi gravado"""
+        if self._filho is None:
+            return
+        pid, geracao_antiga = self._filho
+        terminado, status = os.waitpid(pid, 0 if esperar else os.WNOHANG)
+        if not terminado:
+            return
+        self._filho = None
+        if os.waitstatus_to_exitcode(status) == 0:
+            self._apagar_ate(geracao_antiga)
+        else:
+            print(f'❌ Snapshot {self.geracao} não foi gravado; journals anteriores mantidos')
+        self._snapshot_em_andamento = False
+
+    def _apagar_ate(self, geracao_antiga):
+        for nome in os.listdir(self.diretorio):
+            prefixo, _, resto = nome.partition('-')
+            if prefixo in ('snapshot', 'journal') and resto.split('.')[0].isdigit():
+                if int(resto.split('.')[0]) <= geracao_antiga:
+                    os.remove(os.path.join(self.diretorio, nome))
+
+    def fechar(self):
+        """Gravar tudo que estiver pendente e parar a thread de commit"""
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join()
+        self._thread = None
+        self._arquivo.close()
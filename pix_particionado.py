@@ -0,0 +1,172 @@
+# ============================================================================
+# PIX PARTICIONADO - LOG DE PIX POR SERVIDOR E POR DIA
+# ============================================================================
+#
+# Cada servidor tem uma partição por dia. Dentro do dia as transações ficam
+# em ordem cronológica com um array de timestamps para busca binária, e a
+# partição mantém os totais do dia. Uma consulta "últimos N dias" soma os
+# totais dos dias inteiros e só percorre as bordas do período.
+# Dias arquivados (ver arquivo_frio.py) guardam só os totais; as transações
+# desses dias são lidas do disco pela função `carregar_dia` quando preciso.
+
+import bisect
+from array import array
+from datetime import time
+
+from transacoes_colunares import para_timestamp
+
+
+class ParticaoDia:
+    """PIX de um servidor em um único dia"""
+    __slots__ = ('transacoes', 'timestamps', 'quantidade', 'volume', 'taxas')
+
+    def __init__(self):
+        self.transacoes = []
+        self.timestamps = array('q')
+        self.quantidade = 0
+        self.volume = 0.0
+        self.taxas = 0.0
+
+    def __setstate__(self, estado):
+        # Snapshots anteriores não tinham `quantidade`
+        _, slots = estado
+        for nome, valor in slots.items():
+            setattr(self, nome, valor)
+        if 'quantidade' not in slots:
+            self.quantidade = len(self.transacoes)
+
+    def anexar(self, transacao_pix):
+        if self.transacoes is not None:
+            self.transacoes.append(transacao_pix)
+            self.timestamps.append(para_timestamp(transacao_pix['data']))
+        self.quantidade += 1
+        self.volume += transacao_pix['valor_bruto']
+        self.taxas += transacao_pix['taxa']
+
+    @property
+    def arquivada(self):
+        return self.transacoes is None
+
+    def arquivar(self):
+        """Liberar as transações do dia, mantendo só os totais"""
+        self.transacoes = None
+        self.timestamps = None
+
+    def intervalo(self, inicio, fim):
+        """Posições [a, b) com data em [inicio, fim)"""
+        a = 0 if inicio is None else bisect.bisect_left(self.timestamps, para_timestamp(inicio))
+        b = len(self.timestamps) if fim is None else bisect.bisect_left(self.timestamps, para_timestamp(fim))
+        return a, b
+
+
+def _meia_noite(data):
+    return data.time() == time.min
+
+
+def _filtrar_periodo(transacoes, inicio, fim):
+    return [
+        transacao_pix for transacao_pix in transacoes
+        if (inicio is None or transacao_pix['data'] >= inicio) and (fim is None or transacao_pix['data'] < fim)
+    ]
+
+
+class PixParticionado:
+    """Índice de PIX particionado por servidor_id e por dia"""
+
+    def __init__(self):
+        self._servidores = {}  # servidor_id -> {dia (ordinal): ParticaoDia}
+        self._dias = {}        # servidor_id -> lista ordenada de dias
+        self.dia_arquivado = None  # Dias anteriores a este só têm os totais em memória
+
+    def _particao(self, servidor_id, dia):
+        particoes = self._servidores.setdefault(servidor_id, {})
+        particao = particoes.get(dia)
+        if particao is None:
+            particao = particoes[dia] = ParticaoDia()
+            bisect.insort(self._dias.setdefault(servidor_id, []), dia)
+        return particao
+
+    def anexar(self, transacao_pix):
+        self._particao(transacao_pix['servidor_id'], transacao_pix['data'].toordinal()).anexar(transacao_pix)
+
+    def anexar_totais(self, servidor_id, dia, quantidade, volume, taxas):
+        """Dia arquivado conhecido só pelos totais (ex: somados direto no banco)"""
+        particao = self._particao(servidor_id, dia)
+        particao.arquivar()
+        particao.quantidade += quantidade
+        particao.volume += volume
+        particao.taxas += taxas
+
+    def arquivar_ate(self, dia_corte):
+        """Manter só os totais dos dias anteriores a `dia_corte` (ordinal)"""
+        for servidor_id, dias in self._dias.items():
+            particoes = self._servidores[servidor_id]
+            a = 0 if self.dia_arquivado is None else bisect.bisect_left(dias, self.dia_arquivado)
+            for dia in dias[a:bisect.bisect_left(dias, dia_corte)]:
+                particoes[dia].arquivar()
+        self.dia_arquivado = max(dia_corte, self.dia_arquivado or dia_corte)
+
+    def _dias_no_periodo(self, servidor_id, inicio, fim):
+        dias = self._dias.get(servidor_id, [])
+        a = 0 if inicio is None else bisect.bisect_left(dias, inicio.toordinal())
+        if fim is None:
+            b = len(dias)
+        elif _meia_noite(fim):
+            b = bisect.bisect_left(dias, fim.toordinal())  # O dia do fim fica todo fora
+        else:
+            b = bisect.bisect_right(dias, fim.toordinal())
+        return dias[a:b]
+
+    def resumo(self, servidor_id, inicio=None, fim=None, carregar_dia=None):
+        """(quantidade, volume, taxas) do servidor no período [inicio, fim)"""
+        particoes = self._servidores.get(servidor_id, {})
+        quantidade, volume, taxas = 0, 0.0, 0.0
+
+        for dia in self._dias_no_periodo(servidor_id, inicio, fim):
+            particao = particoes[dia]
+            # Começar à meia-noite não corta o dia: usa os totais, sem ler o disco
+            borda_inicio = inicio is not None and dia == inicio.toordinal() and not _meia_noite(inicio)
+            borda_fim = fim is not None and dia == fim.toordinal()
+
+            if not borda_inicio and not borda_fim:
+                # Dia inteiro dentro do período: usar os totais da partição
+                quantidade += particao.quantidade
+                volume += particao.volume
+                taxas += particao.taxas
+                continue
+
+            if particao.arquivada:
+                transacoes = _filtrar_periodo(
+                    carregar_dia(servidor_id, dia), inicio if borda_inicio else None, fim if borda_fim else None
+                )
+            else:
+                a, b = particao.intervalo(inicio if borda_inicio else None, fim if borda_fim else None)
+                transacoes = particao.transacoes[a:b]
+            for transacao_pix in transacoes:
+                volume += transacao_pix['valor_bruto']
+                taxas += transacao_pix['taxa']
+            quantidade += len(transacoes)
+
+        return quantidade, volume, taxas
+
+    def listar(self, servidor_id, inicio=None, limite=None, carregar_dia=None):
+        """PIX do servidor a partir de `inicio`, mais recentes primeiro"""
+        particoes = self._servidores.get(servidor_id, {})
+        resultado = []
+
+        for dia in reversed(self._dias_no_periodo(servidor_id, inicio, None)):
+            particao = particoes[dia]
+            cortado = inicio is not None and dia == inicio.toordinal() and not _meia_noite(inicio)
+            borda_inicio = inicio if cortado else None
+            if particao.arquivada:
+                transacoes = _filtrar_periodo(carregar_dia(servidor_id, dia), borda_inicio, None)
+            else:
+                a, _ = particao.intervalo(borda_inicio, None)
+                transacoes = particao.transacoes[a:]
+
+            for posicao in range(len(transacoes) - 1, -1, -1):
+                if limite is not None and len(resultado) >= limite:
+                    return resultado
+                resultado.append(transacoes[posicao])
+
+        return resultado
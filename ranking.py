@@ -0,0 +1,213 @@
+# ============================================================================
+# RANKING - PLACAR ORDENADO MANTIDO INCREMENTALMENTE
+# ============================================================================
+#
+# Skip list indexável: cada ponteiro guarda quantos elementos ele pula
+# ("largura"), o que permite descobrir a posição de uma chave e acessar o
+# i-ésimo elemento em O(log n). Inserção e remoção também são O(log n).
+
+import random
+
+NIVEL_MAXIMO = 24  # Suficiente para ~16 milhões de usuários
+
+
+class _No:
+    __slots__ = ('chave', 'proximos', 'larguras')
+
+    def __init__(self, chave, niveis):
+        self.chave = chave
+        self.proximos = [None] * niveis
+        self.larguras = [1] * niveis
+
+
+class ListaIndexada:
+    """Skip list ordenada com acesso por posição"""
+
+    def __init__(self):
+        self.cabeca = _No(None, NIVEL_MAXIMO)
+        self.tamanho = 0
+        self.nivel = 1  # Níveis em uso; acima disso a cabeça não aponta para ninguém
+
+    def __len__(self):
+        return self.tamanho
+
+    @staticmethod
+    def _sortear_niveis():
+        niveis = 1
+        while niveis < NIVEL_MAXIMO and random.random() < 0.5:
+            niveis += 1
+        return niveis
+
+    @classmethod
+    def de_ordenadas(cls, chaves):
+        """Montar a lista a partir de chaves já ordenadas em O(n)"""
+        lista = cls()
+        ultimos = [lista.cabeca] * NIVEL_MAXIMO
+        posicoes = [0] * NIVEL_MAXIMO
+        for posicao, chave in enumerate(chaves, 1):
+            niveis = cls._sortear_niveis()
+            no = _No(chave, niveis)
+            for i in range(niveis):
+                ultimos[i].proximos[i] = no
+                ultimos[i].larguras[i] = posicao - posicoes[i]
+                ultimos[i] = no
+                posicoes[i] = posicao
+            lista.nivel = max(lista.nivel, niveis)
+            lista.tamanho = posicao
+
+        # Último nó de cada nível aponta para o fim
+        for i in range(lista.nivel):
+            ultimos[i].larguras[i] = lista.tamanho + 1 - posicoes[i]
+        return lista
+
+    def inserir(self, chave):
+        niveis = self._sortear_niveis()
+        if niveis > self.nivel:
+            for i in range(self.nivel, niveis):
+                self.cabeca.larguras[i] = self.tamanho + 1
+            self.nivel = niveis
+
+        anteriores = [None] * self.nivel
+        posicoes = [0] * self.nivel
+        no, posicao = self.cabeca, 0
+        for i in reversed(range(self.nivel)):
+            while no.proximos[i] is not None and no.proximos[i].chave < chave:
+                posicao += no.larguras[i]
+                no = no.proximos[i]
+            anteriores[i] = no
+            posicoes[i] = posicao
+
+        novo = _No(chave, niveis)
+        for i in range(self.nivel):
+            anterior = anteriores[i]
+            if i < niveis:
+                pulados = posicao - posicoes[i]
+                novo.proximos[i] = anterior.proximos[i]
+                novo.larguras[i] = anterior.larguras[i] - pulados
+                anterior.proximos[i] = novo
+                anterior.larguras[i] = pulados + 1
+            else:
+                anterior.larguras[i] += 1
+        self.tamanho += 1
+
+    def remover(self, chave):
+        anteriores = [None] * self.nivel
+        no = self.cabeca
+        for i in reversed(range(self.nivel)):
+            while no.proximos[i] is not None and no.proximos[i].chave < chave:
+                no = no.proximos[i]
+            anteriores[i] = no
+
+        alvo = anteriores[0].proximos[0]
+        if alvo is None or alvo.chave != chave:
+            raise KeyError(chave)
+
+        for i in range(self.nivel):
+            anterior = anteriores[i]
+            if anterior.proximos[i] is alvo:
+                anterior.larguras[i] += alvo.larguras[i] - 1
+                anterior.proximos[i] = alvo.proximos[i]
+            else:
+                anterior.larguras[i] -= 1
+        self.tamanho -= 1
+
+    def indice(self, chave):
+        """Posição (a partir de 0) da chave, ou None se não existir"""
+        no, posicao = self.cabeca, 0
+        for i in reversed(range(self.nivel)):
+            while no.proximos[i] is not None and no.proximos[i].chave < chave:
+                posicao += no.larguras[i]
+                no = no.proximos[i]
+
+        alvo = no.proximos[0]
+        if alvo is None or alvo.chave != chave:
+            return None
+        return posicao
+
+    def fatia(self, inicio, quantidade):
+        """Chaves nas posições [inicio, inicio + quantidade) em O(log n + quantidade)"""
+        if inicio < 0 or quantidade <= 0 or inicio >= self.tamanho:
+            return []
+
+        no, posicao = self.cabeca, 0
+        for i in reversed(range(self.nivel)):
+            while no.proximos[i] is not None and posicao + no.larguras[i] <= inicio:
+                posicao += no.larguras[i]
+                no = no.proximos[i]
+
+        chaves = []
+        no = no.proximos[0]
+        while no is not None and len(chaves) < quantidade:
+            chaves.append(no.chave)
+            no = no.proximos[0]
+        return chaves
+
+
+class Ranking:
+    """Placar de usuários por valor (maior primeiro, empate pelo menor user_id)"""
+
+    def __init__(self):
+        self._lista = ListaIndexada()
+        self._chaves = {}
+        self._fonte = None      # Montagem adiada (ver carregar_depois)
+        self._pendentes = None  # user_id -> valor (None = remover) enquanto adiada
+
+    def __len__(self):
+        self._montar()
+        return len(self._lista)
+
+    def carregar_depois(self, fonte):
+        """Adiar a montagem: fonte() devolve pares (user_id, valor) lidos só na primeira consulta"""
+        self._lista = ListaIndexada()
+        self._chaves = {}
+        self._fonte = fonte
+        self._pendentes = {}
+
+    def _montar(self):
+        if self._fonte is None:
+            return
+        fonte, pendentes = self._fonte, self._pendentes
+        self._fonte = self._pendentes = None
+
+        chaves = {user_id: (-valor, user_id) for user_id, valor in fonte()}
+        for user_id, valor in pendentes.items():
+            if valor is None:
+                chaves.pop(user_id, None)
+            else:
+                chaves[user_id] = (-valor, user_id)
+        self._chaves = chaves
+        self._lista = ListaIndexada.de_ordenadas(sorted(chaves.values()))
+
+    def atualizar(self, user_id, valor):
+        if self._fonte is not None:
+            self._pendentes[user_id] = valor
+            return
+        chave_antiga = self._chaves.get(user_id)
+        chave = (-valor, user_id)
+        if chave_antiga == chave:
+            return
+        if chave_antiga is not None:
+            self._lista.remover(chave_antiga)
+        self._lista.inserir(chave)
+        self._chaves[user_id] = chave
+
+    def remover(self, user_id):
+        if self._fonte is not None:
+            self._pendentes[user_id] = None
+            return
+        chave = self._chaves.pop(user_id, None)
+        if chave is not None:
+            self._lista.remover(chave)
+
+    def posicao(self, user_id):
+        """Posição no ranking (1 = primeiro) ou None"""
+        self._montar()
+        chave = self._chaves.get(user_id)
+        if chave is None:
+            return None
+        return self._lista.indice(chave) + 1
+
+    def top(self, limite, inicio=0):
+        """Lista de (user_id, valor) a partir da posição `inicio` (0 = primeiro)"""
+        self._montar()
+        return [(user_id, -valor) for valor, user_id in self._lista.fatia(inicio, limite)]
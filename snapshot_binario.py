@@ -0,0 +1,339 @@
+# ============================================================================
+# SNAPSHOT BINÁRIO - LAYOUT FIXO ABERTO COM MMAP
+# ============================================================================
+#
+# Formato de snapshot do journal (ver Journal(formato_snapshot=...)). Em vez
+# de desserializar o estado inteiro no startup, o arquivo é mapeado com mmap
+# e os usuários/carteiras só viram objetos quando alguém os acessa.
+#
+# Layout (little-endian):
+#   cabeçalho   MAGICO, versão, usuários com carteira e (offset, tamanho) de cada seção
+#   usuarios    registros de 80 bytes ordenados por user_id:
+#               user_id q, saldo d, xp q, nivel q, streak q, criacao d,
+#               nome (offset q, tamanho q), extras (offset q, tamanho q)
+#   carteiras   registros de 40 bytes ordenados por user_id:
+#               user_id q, ticker (offset q, tamanho q), quantidade q, preco_medio d
+#   textos      nomes, tickers e extras (pickle) referenciados pelos registros
+#   transacoes  colunas do TransacoesColunares copiadas byte a byte
+#   estatisticas_pix
+#               registros de 64 bytes ordenados por user_id:
+#               user_id q, enviados q, recebidos q, valor_enviado d,
+#               valor_recebido d, taxas d, maior_enviado d, maior_recebido d
+#   resto       pickle do restante: PIX da janela quente, partições por
+#               servidor, apostas e bloqueios. Cresce com a janela quente
+#               (o que é mais antigo vai para o arquivo frio), não com o
+#               total de usuários; ver benchmarks/snapshot_resto.py
+
+import bisect
+import mmap
+import pickle
+import struct
+from array import array
+from collections.abc import MutableMapping
+
+from transacoes_colunares import SALDO_DESCONHECIDO, TransacoesColunares
+
+EXTENSAO = 'bin'
+MAGICO = b'ECOSNAP1'
+VERSAO = 3  # 2: coluna de saldos nas transações; 3: estatísticas de PIX fora do pickle
+SECOES = ('usuarios', 'carteiras', 'textos', 'transacoes', 'estatisticas_pix', 'resto')
+SECOES_ANTIGAS = ('usuarios', 'carteiras', 'textos', 'transacoes', 'resto')  # Versões 1 e 2
+
+INICIO_CABECALHO = struct.Struct('<8sIQ')  # MAGICO, versão, usuários com carteira
+CABECALHO = struct.Struct(INICIO_CABECALHO.format + 'QQ' * len(SECOES))  # ... (offset, tamanho) das seções
+REGISTRO_USUARIO = struct.Struct('<qdqqqdqqqq')
+REGISTRO_CARTEIRA = struct.Struct('<qqqqd')
+REGISTRO_ESTATISTICAS = struct.Struct('<qqqddddd')
+CABECALHO_TRANSACOES = struct.Struct('<qq')  # quantidade de linhas, base
+COLUNAS_TRANSACOES = (('user_ids', 'q'), ('timestamps', 'q'), ('centavos', 'q'), ('tipos', 'H'), ('descricoes', 'i'),
+                      ('saldos', 'q'))
+
+
+# ===== ESCRITA =====
+def _itens(mapa):
+    # MapaPreguicoso não precisa materializar o que nunca foi tocado
+    return mapa.itens_sem_materializar() if isinstance(mapa, MapaPreguicoso) else mapa.items()
+
+
+def serializar(estado):
+    """Converter o estado do Database (ver Database._estado) em bytes"""
+    textos = bytearray()
+
+    def texto(dados):
+        posicao = len(textos)
+        textos.extend(dados)
+        return posicao, len(dados)
+
+    usuarios = bytearray()
+    for user_id, usuario in sorted(_itens(estado['usuarios']), key=lambda item: item[0]):
+        nome = texto(usuario['nome'].encode())
+        extras = b''
+        if usuario.ultima_recompensa_daily is not None or usuario.extras:
+            extras = pickle.dumps((usuario.ultima_recompensa_daily, usuario.extras), protocol=pickle.HIGHEST_PROTOCOL)
+        usuarios += REGISTRO_USUARIO.pack(
+            user_id, usuario.saldo, usuario.xp, usuario.nivel, usuario.streak_daily,
+            usuario.timestamp_criacao, *nome, *texto(extras)
+        )
+
+    carteiras = bytearray()
+    com_carteira = 0
+    for user_id, carteira in sorted(_itens(estado['investimentos']), key=lambda item: item[0]):
+        com_carteira += bool(carteira)
+        for ticker, posicao in carteira.items():
+            carteiras += REGISTRO_CARTEIRA.pack(
+                user_id, *texto(ticker.encode()), posicao['quantidade'], posicao['preco_medio']
+            )
+
+    transacoes = estado['transacoes']
+    secao_transacoes = bytearray(CABECALHO_TRANSACOES.pack(len(transacoes), transacoes.base))
+    for nome, _ in COLUNAS_TRANSACOES:
+        secao_transacoes += getattr(transacoes, nome).tobytes()
+    secao_transacoes += pickle.dumps((transacoes.nomes_tipo, transacoes.textos), protocol=pickle.HIGHEST_PROTOCOL)
+
+    estatisticas = bytearray()
+    for user_id, e in sorted(_itens(estado['estatisticas_pix']), key=lambda item: item[0]):
+        estatisticas += REGISTRO_ESTATISTICAS.pack(
+            user_id, e.enviados, e.recebidos, e.valor_enviado, e.valor_recebido,
+            e.taxas, e.maior_enviado, e.maior_recebido
+        )
+
+    resto = {chave: valor for chave, valor in estado.items()
+             if chave not in ('usuarios', 'investimentos', 'transacoes', 'estatisticas_pix')}
+    secoes = [usuarios, carteiras, textos, secao_transacoes, estatisticas,
+              pickle.dumps(resto, protocol=pickle.HIGHEST_PROTOCOL)]
+
+    posicao = CABECALHO.size
+    indice = []
+    for secao in secoes:
+        indice += [posicao, len(secao)]
+        posicao += len(secao)
+    return b''.join([CABECALHO.pack(MAGICO, VERSAO, com_carteira, *indice), *secoes])
+
+
+# ===== LEITURA =====
+class SnapshotMapeado:
+    """Acesso direto aos registros de um snapshot mapeado em memória"""
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        memoria = memoryview(self._mmap)
+
+        magico, self.versao, self.com_carteira = INICIO_CABECALHO.unpack_from(memoria)
+        if magico != MAGICO or not 1 <= self.versao <= VERSAO:
+            raise ValueError(f'Snapshot inválido: {caminho}')
+        secoes = SECOES if self.versao >= 3 else SECOES_ANTIGAS
+        indice = struct.unpack_from('<' + 'QQ' * len(secoes), memoria, INICIO_CABECALHO.size)
+        self._secoes = {
+            nome: memoria[indice[2 * i]:indice[2 * i] + indice[2 * i + 1]]
+            for i, nome in enumerate(secoes)
+        }
+
+        # Colunas de user_id lidas direto do mapeamento (busca binária sem cópia)
+        self._usuarios = self._secoes['usuarios']
+        self._ids_usuarios = self._usuarios.cast('q')[::REGISTRO_USUARIO.size // 8]
+        self._saldos = self._usuarios.cast('d')[1::REGISTRO_USUARIO.size // 8]
+        self._xps = self._usuarios.cast('q')[2::REGISTRO_USUARIO.size // 8]
+        self._carteiras = self._secoes['carteiras']
+        self._ids_carteiras = self._carteiras.cast('q')[::REGISTRO_CARTEIRA.size // 8]
+        self._estatisticas = self._secoes.get('estatisticas_pix')
+        if self._estatisticas is not None:
+            self._ids_estatisticas = self._estatisticas.cast('q')[::REGISTRO_ESTATISTICAS.size // 8]
+
+    def _texto(self, posicao, tamanho):
+        return self._secoes['textos'][posicao:posicao + tamanho]
+
+    # ----- usuários -----
+    def contar_usuarios(self):
+        return len(self._ids_usuarios)
+
+    def ids_usuarios(self):
+        return iter(self._ids_usuarios)
+
+    def valores(self, campo):
+        """(user_id, saldo|xp) de todos os usuários, para montar rankings"""
+        coluna = self._saldos if campo == 'saldo' else self._xps
+        return zip(self._ids_usuarios, coluna)
+
+    @staticmethod
+    def _posicao(ids, user_id):
+        i = bisect.bisect_left(ids, user_id)
+        if i < len(ids) and ids[i] == user_id:
+            return i
+        return None
+
+    def _posicao_usuario(self, user_id):
+        return self._posicao(self._ids_usuarios, user_id)
+
+    def contem_usuario(self, user_id):
+        return self._posicao_usuario(user_id) is not None
+
+    def carregar_usuario(self, user_id):
+        """Materializar um Usuario a partir do registro, ou None"""
+        from database import Usuario  # Import tardio: database importa este módulo
+
+        i = self._posicao_usuario(user_id)
+        if i is None:
+            return None
+        (_, saldo, xp, nivel, streak, criacao,
+         pos_nome, tam_nome, pos_extras, tam_extras) = REGISTRO_USUARIO.unpack_from(self._usuarios, i * REGISTRO_USUARIO.size)
+
+        usuario = Usuario(user_id, str(self._texto(pos_nome, tam_nome), 'utf-8'), saldo, xp, nivel, streak, criacao)
+        if tam_extras:
+            usuario.ultima_recompensa_daily, usuario.extras = pickle.loads(self._texto(pos_extras, tam_extras))
+        return usuario
+
+    # ----- carteiras -----
+    def ids_carteiras(self):
+        ids = self._ids_carteiras
+        return (ids[i] for i in range(len(ids)) if i == 0 or ids[i] != ids[i - 1])
+
+    def contem_carteira(self, user_id):
+        i = bisect.bisect_left(self._ids_carteiras, user_id)
+        return i < len(self._ids_carteiras) and self._ids_carteiras[i] == user_id
+
+    def carregar_carteira(self, user_id):
+        a = bisect.bisect_left(self._ids_carteiras, user_id)
+        b = bisect.bisect_right(self._ids_carteiras, user_id)
+        if a == b:
+            return None
+        carteira = {}
+        for i in range(a, b):
+            _, pos_ticker, tam_ticker, quantidade, preco_medio = REGISTRO_CARTEIRA.unpack_from(
+                self._carteiras, i * REGISTRO_CARTEIRA.size
+            )
+            carteira[str(self._texto(pos_ticker, tam_ticker), 'utf-8')] = {
+                'quantidade': quantidade, 'preco_medio': preco_medio
+            }
+        return carteira
+
+    # ----- estatísticas de PIX -----
+    def contar_estatisticas(self):
+        return len(self._ids_estatisticas)
+
+    def ids_estatisticas(self):
+        return iter(self._ids_estatisticas)
+
+    def contem_estatisticas(self, user_id):
+        return self._posicao(self._ids_estatisticas, user_id) is not None
+
+    def carregar_estatisticas(self, user_id):
+        """Materializar as EstatisticasPix de um usuário a partir do registro, ou None"""
+        from database import EstatisticasPix
+
+        i = self._posicao(self._ids_estatisticas, user_id)
+        if i is None:
+            return None
+        estatisticas = EstatisticasPix()
+        (_, estatisticas.enviados, estatisticas.recebidos, estatisticas.valor_enviado,
+         estatisticas.valor_recebido, estatisticas.taxas, estatisticas.maior_enviado,
+         estatisticas.maior_recebido) = REGISTRO_ESTATISTICAS.unpack_from(
+            self._estatisticas, i * REGISTRO_ESTATISTICAS.size
+        )
+        return estatisticas
+
+    # ----- transações e resto -----
+    def transacoes(self):
+        """Colunas de transações (cópia direta dos bytes, sem reconstruir linha a linha)"""
+        secao = self._secoes['transacoes']
+        quantidade, base = CABECALHO_TRANSACOES.unpack_from(secao)
+        transacoes = TransacoesColunares()
+        transacoes.base = base
+
+        posicao = CABECALHO_TRANSACOES.size
+        colunas = COLUNAS_TRANSACOES if self.versao >= 2 else COLUNAS_TRANSACOES[:-1]
+        transacoes.saldos = array('q', [SALDO_DESCONHECIDO]) * quantidade
+        for nome, tipo in colunas:
+            coluna = array(tipo)
+            tamanho = quantidade * coluna.itemsize
+            coluna.frombytes(secao[posicao:posicao + tamanho])
+            setattr(transacoes, nome, coluna)
+            posicao += tamanho
+
+        transacoes.nomes_tipo, transacoes.textos = pickle.loads(secao[posicao:])
+        transacoes._codigos_tipo = {nome: codigo for codigo, nome in enumerate(transacoes.nomes_tipo)}
+        transacoes._codigos_texto = None  # Montado na primeira transação nova
+        return transacoes
+
+    def resto(self):
+        return pickle.loads(self._secoes['resto'])
+
+
+class MapaPreguicoso(MutableMapping):
+    """Dict de objetos vivos na frente de um snapshot: cada chave é materializada no primeiro acesso"""
+
+    def __init__(self, contem, carregar, chaves, total):
+        self._vivos = {}
+        self._removidos = set()
+        self._contem = contem      # chave -> bool (no snapshot)
+        self._carregar = carregar  # chave -> objeto ou None
+        self._chaves = chaves      # () -> iterador das chaves do snapshot
+        self._no_snapshot = total
+        self._materializados = 0   # Chaves do snapshot que já estão em _vivos
+
+    def __getitem__(self, chave):
+        valor = self._vivos.get(chave)
+        if valor is not None:
+            return valor
+        if chave in self._removidos:
+            raise KeyError(chave)
+        valor = self._carregar(chave)
+        if valor is None:
+            raise KeyError(chave)
+        self._vivos[chave] = valor
+        self._materializados += 1
+        return valor
+
+    def __setitem__(self, chave, valor):
+        if chave not in self._vivos and chave not in self._removidos and self._contem(chave):
+            self._materializados += 1
+        self._vivos[chave] = valor
+
+    def __delitem__(self, chave):
+        if chave not in self:
+            raise KeyError(chave)
+        if self._contem(chave):
+            if chave in self._vivos:
+                self._materializados -= 1
+            self._removidos.add(chave)
+            self._no_snapshot -= 1
+        self._vivos.pop(chave, None)
+
+    def __contains__(self, chave):
+        return chave in self._vivos or (chave not in self._removidos and self._contem(chave))
+
+    def __len__(self):
+        return len(self._vivos) - self._materializados + self._no_snapshot
+
+    def __iter__(self):
+        yield from self._vivos
+        for chave in self._chaves():
+            if chave not in self._vivos and chave not in self._removidos:
+                yield chave
+
+    def itens_sem_materializar(self):
+        """(chave, valor) de tudo, sem guardar em _vivos o que ainda não foi tocado"""
+        yield from self._vivos.items()
+        for chave in self._chaves():
+            if chave not in self._vivos and chave not in self._removidos:
+                yield chave, self._carregar(chave)
+
+
+def abrir(caminho):
+    """Abrir um snapshot como estado para Database._carregar_estado"""
+    snapshot = SnapshotMapeado(caminho)
+    estado = snapshot.resto()
+    estado['usuarios'] = MapaPreguicoso(
+        snapshot.contem_usuario, snapshot.carregar_usuario, snapshot.ids_usuarios, snapshot.contar_usuarios()
+    )
+    estado['investimentos'] = MapaPreguicoso(
+        snapshot.contem_carteira, snapshot.carregar_carteira, snapshot.ids_carteiras, snapshot.com_carteira
+    )
+    if snapshot.versao >= 3:
+        estado['estatisticas_pix'] = MapaPreguicoso(
+            snapshot.contem_estatisticas, snapshot.carregar_estatisticas,
+            snapshot.ids_estatisticas, snapshot.contar_estatisticas()
+        )
+    estado['transacoes'] = snapshot.transacoes()
+    estado['snapshot'] = snapshot
+    return estado
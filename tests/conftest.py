@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Os módulos do bot ficam na raiz do repositório (sem pacote instalável)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sem cache em disco no cliente global do brapi_client (senão os testes criam brapi_cache.db)
+os.environ.setdefault('BRAPI_CACHE_PATH', '')
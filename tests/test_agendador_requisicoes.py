@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from agendador_requisicoes import (AgendadorRequisicoes, LimiteDeTaxa, PRIORIDADE_FUNDO,
+                                   PRIORIDADE_INTERATIVA, ler_retry_after)
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 100.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_rajada_e_depois_uma_ficha_por_intervalo():
+    relogio = Relogio()
+    agendador = AgendadorRequisicoes(taxa=1.0, rajada=2, relogio=relogio)
+
+    async def pedir(prazo):
+        await agendador.vaga(PRIORIDADE_INTERATIVA, prazo)
+
+    asyncio.run(pedir(0))
+    asyncio.run(pedir(0))
+    with pytest.raises(LimiteDeTaxa):
+        asyncio.run(pedir(0.5))  # A próxima ficha só entra daqui a 1s
+    relogio.agora += 1
+    asyncio.run(pedir(0))
+    assert (agendador.liberadas, agendador.expiradas) == (3, 1)
+
+
+def test_429_pausa_com_backoff_exponencial():
+    relogio = Relogio()
+    agendador = AgendadorRequisicoes(taxa=100.0, rajada=5, relogio=relogio)
+
+    assert agendador.limitado() == 2 and agendador.limitado() == 4
+    with pytest.raises(LimiteDeTaxa) as erro:
+        asyncio.run(agendador.vaga(PRIORIDADE_INTERATIVA, 1))
+    assert erro.value.espera == 4
+    relogio.agora += 4
+    asyncio.run(agendador.vaga(PRIORIDADE_INTERATIVA, 0))
+
+    agendador.sucesso()
+    assert agendador.limitado(retry_after=30) == 30 and agendador.limitado() == 2
+    assert agendador.estatisticas()['pausado_por'] == 30
+
+
+def test_comando_passa_na_frente_e_tira_o_fundo_da_fila_cheia():
+    relogio = Relogio()
+    agendador = AgendadorRequisicoes(taxa=100.0, rajada=1, tamanho_fila=2, relogio=relogio)
+    liberados = []
+
+    async def pedir(nome, prioridade):
+        try:
+            await agendador.vaga(prioridade, prazo=5)
+            liberados.append(nome)
+        except LimiteDeTaxa:
+            liberados.append(f'{nome} recusado')
+
+    async def cenario():
+        await agendador.vaga()  # Gasta a única ficha
+        tarefas = [asyncio.create_task(pedir(nome, prioridade)) for nome, prioridade in
+                   (('fundo 1', PRIORIDADE_FUNDO), ('fundo 2', PRIORIDADE_FUNDO),
+                    ('comando', PRIORIDADE_INTERATIVA))]
+        await asyncio.sleep(0)
+        while not all(tarefa.done() for tarefa in tarefas):
+            relogio.agora += 0.01  # Uma ficha por volta do despachante
+            await asyncio.sleep(0.005)
+
+    asyncio.run(cenario())
+    assert liberados == ['fundo 2 recusado', 'comando', 'fundo 1']
+    assert agendador.recusadas == 1
+
+
+def test_retry_after_em_segundos_ou_data_http():
+    assert ler_retry_after('12') == 12.0
+    assert ler_retry_after('-3') == 0.0
+    assert ler_retry_after(None) is None and ler_retry_after('amanhã') is None
+    daqui_a_pouco = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 80 < ler_retry_after(daqui_a_pouco) <= 90
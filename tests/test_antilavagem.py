@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from antilavagem import DetectorPix
+
+
+def pix(remetente_id, data, valor=100.0):
+    return {'remetente_id': remetente_id, 'valor_bruto': valor, 'data': data}
+
+
+def test_remetente_novo_entra_no_top_contra_contagens_velhas():
+    detector = DetectorPix()
+    agora = datetime(2024, 6, 10, 12, 0)
+    dois_dias_atras = agora - timedelta(days=2)
+    for user_id in range(20):
+        for i in range(30):
+            detector.registrar(pix(user_id, dois_dias_atras + timedelta(seconds=user_id * 30 + i)))
+
+    for i in range(25):
+        detector.registrar(pix(999, agora - timedelta(minutes=59) + timedelta(seconds=i)))
+
+    ativos = detector.mais_ativos(agora, 20)
+    assert [item['_id'] for item in ativos] == [999]
+    assert ativos[0]['total'] == 25
+
+
+def test_quem_saiu_do_top_volta_quando_os_outros_expiram():
+    detector = DetectorPix(tamanho_top=2)
+    inicio = datetime(2024, 6, 10, 0, 0)
+    for i in range(5):
+        detector.registrar(pix(1, inicio + timedelta(hours=1, seconds=i)))
+    for user_id in (2, 3):
+        for i in range(10):
+            detector.registrar(pix(user_id, inicio + timedelta(seconds=i)))
+
+    # 2 e 3 expiram antes de 1, que tinha sido deixado de fora do top
+    ativos = detector.mais_ativos(inicio + timedelta(hours=24, minutes=30))
+    assert [(item['_id'], item['total']) for item in ativos] == [(1, 5)]
+
+
+def test_janelas_vazias_sao_apagadas():
+    detector = DetectorPix()
+    inicio = datetime(2024, 6, 10, 0, 0)
+    for user_id in range(100):
+        detector.registrar(pix(user_id, inicio + timedelta(seconds=user_id)))
+
+    detector.registrar(pix(500, inicio + timedelta(days=2)))
+    assert list(detector._por_usuario) == [500]
+
+
+def test_alerta_so_na_transacao_que_cruza_o_limite():
+    detector = DetectorPix()
+    inicio = datetime(2024, 6, 10, 0, 0)
+    for i in range(12):
+        detector.registrar(pix(1, inicio + timedelta(minutes=i)))
+
+    alertas = [(a['tipo'], a['janela']) for a in detector.alertas]
+    assert alertas == [('quantidade', '1h')]
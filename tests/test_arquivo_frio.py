@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from arquivo_frio import ArquivoFrio
+from database import Database, RegistroPix, montar_pix
+
+
+def registros(inicio, quantidade):
+    return [{'user_id': i % 10, 'servidor_id': 100 + i // 50, 'data': inicio + timedelta(minutes=i), 'valor': i}
+            for i in range(quantidade)]
+
+
+# ===== SEGMENTOS =====
+def test_consulta_pula_segmentos_pelo_indice(tmp_path, monkeypatch):
+    inicio = datetime(2024, 1, 1)
+    todos = registros(inicio, 200)
+    frio = ArquivoFrio(str(tmp_path), 'teste', chaves=lambda r: (r['user_id'],), grupo=lambda r: r['servidor_id'])
+    frio.gravar(todos, inicio + timedelta(days=1), tamanho_segmento=50)
+
+    lidos = []
+    ler = frio._ler
+    monkeypatch.setattr(frio, '_ler', lambda segmento: lidos.append(segmento['numero']) or ler(segmento))
+
+    periodo = list(frio.iterar(inicio + timedelta(minutes=60), inicio + timedelta(minutes=90)))
+    assert [r['valor'] for r in periodo] == list(range(60, 90))
+    assert lidos == [1]
+
+    lidos.clear()
+    assert [r['valor'] for r in frio.iterar(grupo=102)] == list(range(100, 150))
+    assert lidos == [2]
+
+    lidos.clear()
+    assert list(frio.iterar(chave=12345)) == []
+    assert len(lidos) <= 1  # Filtro de Bloom: no máximo um falso positivo entre 4 segmentos
+
+
+def test_indice_reaberto_mantem_corte_e_segmentos(tmp_path):
+    inicio = datetime(2024, 1, 1)
+    frio = ArquivoFrio(str(tmp_path), 'teste', chaves=lambda r: (r['user_id'],))
+    frio.gravar(registros(inicio, 120), inicio + timedelta(days=1), tamanho_segmento=50)
+
+    reaberto = ArquivoFrio(str(tmp_path), 'teste', chaves=lambda r: (r['user_id'],))
+    assert len(reaberto) == 120
+    assert reaberto.data_corte == inicio + timedelta(days=1)
+    recentes = [r['valor'] for r in reaberto.iterar(chave=3, reverso=True) if r['user_id'] == 3]
+    assert recentes == list(range(113, -1, -10))
+
+
+# ===== DATABASE =====
+def test_arquivar_nao_muda_o_que_os_comandos_veem(tmp_path):
+    agora = datetime.now()
+    db = Database()
+    db.criar_usuario(1, 'Ana')
+    for dias in range(60, -1, -5):
+        data = agora - timedelta(days=dias)
+        db._inserir_transacao({'user_id': 1, 'tipo': 'daily', 'valor': float(dias), 'descricao': '',
+                               'data': data, 'saldo_posterior': None})
+        db._inserir_pix(montar_pix(RegistroPix(1, 'Ana', 2, 'Bia', 10.0, 0.5, 9.5, '', 7, 'Servidor', 8, dias), data))
+
+    def visto(transacoes):
+        # Registros arquivados trazem também a 'posicao' no log
+        return [{chave: valor for chave, valor in t.items() if chave != 'posicao'} for t in transacoes]
+
+    def paginas():
+        resultado, cursor = [], None
+        while True:
+            pagina, cursor = db.obter_extrato_pagina(1, tamanho=4, cursor=cursor)
+            resultado.append(visto(pagina))
+            if cursor is None:
+                return resultado
+
+    extrato, extrato_paginado = visto(db.obter_extrato(1, limite=100)), paginas()
+    relatorio = db.obter_relatorio_pix_servidor(7)
+    estatisticas = db.obter_estatisticas_pix(1)
+
+    db.ativar_arquivo_frio(str(tmp_path), janela_quente=timedelta(days=30))
+    assert len(db.transacoes) < 13 and len(db.pix_transacoes_list) < 13
+
+    assert visto(db.obter_extrato(1, limite=100)) == extrato
+    assert paginas() == extrato_paginado
+    assert db.obter_relatorio_pix_servidor(7) == relatorio
+    assert db.obter_estatisticas_pix(1) == estatisticas
@@ -0,0 +1,212 @@
+import asyncio
+
+import pytest
+
+from agendador_requisicoes import LimiteDeTaxa, PRIORIDADE_FUNDO
+from brapi_client import BRAPI_URL, BrapiAPI
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def api():
+    api = BrapiAPI(caminho_cache=None)
+    api.cache.relogio = Relogio()
+    api.respostas = []  # Uma por requisição: dict, None (falha) ou exceção
+
+    async def requisicao(endpoint, params=None, prioridade=None):
+        resposta = api.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+    api._fazer_requisicao = requisicao
+    return api
+
+
+def cotacao(preco):
+    return {'stocks': [{'stock': 'PETR4', 'regularMarketPrice': preco}]}
+
+
+def vencer(api):
+    """Guardar PETR4 a 30.0 e avançar o relógio para depois da validade (ainda na tolerância)"""
+    api.cache.guardar_ate('cotacao_PETR4', {'stock': 'PETR4', 'regularMarketPrice': 30.0}, api.cache.relogio() + 60)
+    api.cache.relogio.agora += 120
+
+
+def test_vencida_e_servida_na_hora_para_consultas(api):
+    vencer(api)
+    api.respostas.append(cotacao(31.0))
+
+    async def consultar():
+        resultado = await api.obter_cotacao_async('petr4')
+        await asyncio.sleep(0)  # Deixar a revalidação em segundo plano rodar
+        return resultado
+    resultado = asyncio.run(consultar())
+
+    assert resultado['regularMarketPrice'] == 30.0
+    assert 'desatualizada' not in resultado
+
+
+def test_negociacao_busca_a_cotacao_atual(api):
+    vencer(api)
+    api.respostas.append(cotacao(31.0))
+    resultado = asyncio.run(api.obter_cotacao_async('PETR4', permitir_velha=False))
+    assert resultado['regularMarketPrice'] == 31.0
+    assert 'desatualizada' not in resultado
+
+
+@pytest.mark.parametrize('falha', [LimiteDeTaxa(5), None])
+def test_negociacao_sem_cotacao_atual_recebe_a_vencida_marcada(api, falha):
+    vencer(api)
+    api.respostas.append(falha)
+    resultado = asyncio.run(api.obter_cotacao_async('PETR4', permitir_velha=False))
+    assert resultado['regularMarketPrice'] == 30.0
+    assert resultado['desatualizada'] is True
+
+
+def test_sem_nenhuma_cotacao_o_limite_chega_a_quem_pediu(api):
+    api.respostas.append(LimiteDeTaxa(5))
+    with pytest.raises(LimiteDeTaxa):
+        asyncio.run(api.obter_cotacao_async('PETR4', permitir_velha=False))
+
+
+# ===== HTTP =====
+class RespostaFalsa:
+    def __init__(self, dados):
+        self.dados = dados
+        self.status = 200
+        self.headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *erro):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        await asyncio.sleep(0.01)  # A resposta demora: dá tempo de outros pedidos chegarem
+        return self.dados
+
+
+class SessaoFalsa:
+    """aiohttp.ClientSession que responde com `responder(endpoint, params)` e anota as chamadas"""
+
+    closed = False
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.chamadas = []
+
+    def get(self, url, params=None):
+        endpoint = url.removeprefix(BRAPI_URL)
+        self.chamadas.append((endpoint, params))
+        return RespostaFalsa(self.responder(endpoint, params))
+
+    async def close(self):
+        self.closed = True
+
+
+def usar_sessao(api, sessao):
+    """Pôr a sessão falsa no lugar da aiohttp (chamar com o event loop rodando)"""
+    api._sessao = sessao
+    api._limite = asyncio.Semaphore(api.max_conexoes)
+    api._loop_sessao = asyncio.get_running_loop()
+
+
+def responder_cotacoes(endpoint, params):
+    if endpoint == '/quote/list':
+        return {'stocks': [{'stock': params['search'], 'close': 10.0}]}
+    tickers = endpoint.removeprefix('/quote/').split(',')
+    return {'results': [{'symbol': ticker, 'close': 10.0} for ticker in tickers if not ticker.startswith('X')]}
+
+
+def test_pedidos_iguais_simultaneos_viram_uma_requisicao():
+    api = BrapiAPI(caminho_cache=None)
+    sessao = SessaoFalsa(responder_cotacoes)
+
+    async def comandos():
+        usar_sessao(api, sessao)
+        return await asyncio.gather(*(api.obter_cotacao_async('PETR4') for _ in range(10)))
+    resultados = asyncio.run(comandos())
+
+    assert len(sessao.chamadas) == 1
+    assert all(resultado == {'stock': 'PETR4', 'close': 10.0} for resultado in resultados)
+    assert (api.requisicoes_emitidas, api.requisicoes_coalescidas) == (1, 9)
+    assert api.estatisticas()['em_andamento'] == 0
+
+
+def test_comando_nao_espera_atras_do_segundo_plano():
+    api = BrapiAPI(caminho_cache=None, requisicoes_por_minuto=600, rajada=1)  # Uma vaga a cada 0,1s
+    sessao = SessaoFalsa(responder_cotacoes)
+
+    async def cenario():
+        usar_sessao(api, sessao)
+        await api.agendador.vaga()  # Gasta a vaga da rajada
+        fundo = [asyncio.create_task(api._fazer_requisicao(f'/quote/{ticker}', prioridade=PRIORIDADE_FUNDO))
+                 for ticker in ('VALE3', 'ITUB4', 'PETR4')]
+        await asyncio.sleep(0)
+        comando = await api._fazer_requisicao('/quote/PETR4')
+        await asyncio.gather(*fundo)
+        return comando
+    comando = asyncio.run(cenario())
+
+    assert comando == {'results': [{'symbol': 'PETR4', 'close': 10.0}]}
+    # O comando saiu na primeira vaga; a de segundo plano do mesmo ticker continuou na fila
+    enviados = [endpoint for endpoint, _ in sessao.chamadas]
+    assert enviados == ['/quote/PETR4', '/quote/VALE3', '/quote/ITUB4', '/quote/PETR4']
+    assert api.estatisticas()['em_andamento'] == 0
+
+
+def test_carteira_busca_so_o_que_falta_em_lotes():
+    api = BrapiAPI(caminho_cache=None, tickers_por_requisicao=10)
+    sessao = SessaoFalsa(responder_cotacoes)
+    carteira = [f'ACAO{i}' for i in range(12)] + ['XPTO3', 'XYZW4', 'acao12']  # 15 tickers
+    for ticker in ('ACAO0', 'ACAO1', 'ACAO2'):
+        api.cache.guardar(f'cotacao_{ticker}', {'stock': ticker, 'close': 9.0}, 3600)
+
+    async def comandos():
+        usar_sessao(api, sessao)
+        primeira = await api.obter_cotacoes_async(carteira)
+        segunda = await api.obter_cotacoes_async(carteira)
+        return primeira, segunda
+    primeira, segunda = asyncio.run(comandos())
+
+    # 3 em cache; 12 faltando em 2 requisições (10 + 2), todas de uma vez
+    assert len(sessao.chamadas) == 2
+    assert sorted(len(endpoint.removeprefix('/quote/').split(',')) for endpoint, _ in sessao.chamadas) == [2, 10]
+    assert primeira['ACAO0'] == {'stock': 'ACAO0', 'close': 9.0}
+    assert primeira['ACAO12'] == {'symbol': 'ACAO12', 'stock': 'ACAO12', 'close': 10.0}
+    assert primeira['XPTO3'] is None and primeira['XYZW4'] is None
+    assert len(primeira) == 15
+
+    # Tudo em cache, inclusive os tickers inexistentes (cache negativo)
+    assert segunda == primeira
+    assert len(sessao.chamadas) == 2
+
+
+def test_pre_aquecimento_renova_os_que_vencem_na_ordem_dada():
+    api = BrapiAPI(caminho_cache=None)
+    api.cache.relogio = Relogio()
+    sessao = SessaoFalsa(responder_cotacoes)
+    for ticker, validade in (('PETR4', 30), ('VALE3', 300), ('BBAS3', 10), ('WEGE3', 5)):
+        api.cache.guardar(f'cotacao_{ticker}', {'stock': ticker}, validade)
+    api._revalidando.add('WEGE3')  # Já sendo revalidada: fica de fora
+
+    async def rodadas():
+        usar_sessao(api, sessao)
+        primeira = await api.atualizar_cotacoes_async(['PETR4', 'VALE3', 'WEGE3', 'ITUB4', 'BBAS3'], 60, maximo=2)
+        segunda = await api.atualizar_cotacoes_async(['PETR4', 'VALE3', 'WEGE3', 'ITUB4', 'BBAS3'], 60, maximo=2)
+        return primeira, segunda
+
+    # VALE3 ainda vale mais que a antecedência; com maximo=2, BBAS3 fica para a próxima rodada
+    assert asyncio.run(rodadas()) == (2, 1)
+    assert [endpoint for endpoint, _ in sessao.chamadas] == ['/quote/PETR4,ITUB4', '/quote/BBAS3']
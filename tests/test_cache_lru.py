@@ -0,0 +1,71 @@
+import pytest
+
+from cache_lru import CacheExpiravel, CacheLRU
+from database_sqlite import DatabaseSQLite
+
+
+def test_despeja_o_usado_ha_mais_tempo():
+    cache = CacheLRU(capacidade=3)
+    for chave in 'abc':
+        cache.guardar(chave, chave.upper())
+    assert cache.obter('a') == 'A'  # 'a' passa a ser o mais recente
+    cache.guardar('d', 'D')
+
+    assert 'b' not in cache and len(cache) == 3
+    assert cache.espiar('c') == 'C'
+    cache.guardar('e', 'E')  # espiar não conta como uso: 'c' sai
+    assert 'c' not in cache
+    assert cache.obter('b', 'ausente') == 'ausente'
+    assert cache.estatisticas() == {'tamanho': 3, 'capacidade': 3, 'acertos': 1, 'falhas': 1,
+                                    'despejos': 2, 'taxa_acerto': 0.5}
+
+
+def test_capacidade_invalida():
+    with pytest.raises(ValueError):
+        CacheLRU(capacidade=0)
+
+
+def test_sqlite_consulta_sem_criar_e_cache_acompanha_escritas(tmp_path):
+    db = DatabaseSQLite(str(tmp_path / 'economia.db'), capacidade_cache=2)
+    assert db.consultar_usuario(9)['saldo'] == 1000.00
+    assert db.conexao.execute('SELECT COUNT(*) FROM usuarios').fetchone()[0] == 0
+
+    for user_id in (1, 2, 3):
+        db.obter_usuario(user_id)
+    assert len(db.cache_usuarios) == 2  # Só o conjunto de trabalho fica em memória
+
+    db.atualizar_saldo(1, 50.0)  # Usuário fora do cache
+    db.adicionar_xp(3, 5)
+    db.atualizar_campos_usuario(2, {'streak_daily': 4})
+    assert db.obter_saldo(1) == 1050.0
+    assert db.obter_usuario(3)['xp'] == db.obter_usuario(3)['experiencia'] == 5
+    assert db.obter_usuario(2)['streak_daily'] == 4
+    db.fechar()
+
+
+# ===== VALIDADE =====
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_expiravel_serve_velho_dentro_da_tolerancia():
+    relogio = Relogio()
+    cache = CacheExpiravel(capacidade=10, tolerancia_velho=50, relogio=relogio)
+    cache.guardar('PETR4', {'preco': 30.0}, validade=10)
+    cache.guardar('XXXX9', None, validade=100)  # Cache negativo: ticker inexistente
+
+    assert cache.consultar('PETR4') == ({'preco': 30.0}, True)
+    assert cache.consultar('XXXX9') == (None, True)
+    relogio.agora += 30
+    assert cache.consultar('PETR4') == ({'preco': 30.0}, False)
+    assert cache.obter('PETR4', 'vencido') == 'vencido'
+    relogio.agora += 40
+    assert cache.consultar('PETR4') is None and 'PETR4' not in cache  # Além da tolerância sai do cache
+    assert cache.expira_em('XXXX9') == 1100.0
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['velhos'], estatisticas['negativos']) == (2, 2, 1)
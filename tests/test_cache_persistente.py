@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import brapi_client
+from brapi_client import BrapiAPI
+from cache_persistente import CachePersistente
+
+
+def test_vencidos_alem_da_tolerancia_somem_ao_reabrir(tmp_path):
+    caminho = str(tmp_path / 'cache.db')
+    cache = CachePersistente(caminho, tolerancia_velho=60)
+    agora = time.time()
+    cache.gravar([('cotacao_PETR4', 'cotacao', {'preco': 30.0}, agora + 100),
+                  ('cotacao_VALE3', 'cotacao', {'preco': 60.0}, agora - 30),     # Velha, ainda serve
+                  ('cotacao_XXXX9', 'negativo', None, agora - 3600)])
+    cache.fechar()
+
+    reaberto = CachePersistente(caminho, tolerancia_velho=60)
+    assert reaberto.ler('cotacao_PETR4') == ({'preco': 30.0}, agora + 100)
+    assert reaberto.ler('cotacao_VALE3')[0] == {'preco': 60.0}
+    assert reaberto.ler('cotacao_XXXX9') is None
+    assert reaberto.estatisticas() == {'leituras': 3, 'acertos': 2, 'gravacoes': 0, 'pendentes': 0,
+                                       'por_tipo': {'cotacao': 2}}
+    reaberto.fechar()
+
+
+def test_bot_reiniciado_usa_o_disco_antes_da_api(tmp_path):
+    caminho = str(tmp_path / 'cache.db')
+    chamadas = []
+
+    async def fazer_requisicao(endpoint, params=None, prioridade=None):
+        chamadas.append(params['search'])
+        return {'stocks': [{'stock': 'PETR4', 'close': 30.0}]} if params['search'] == 'PETR4' else {'stocks': []}
+
+    api = BrapiAPI(caminho_cache=caminho)
+    api._fazer_requisicao = fazer_requisicao
+    assert asyncio.run(api.obter_cotacao_async('petr4')) == {'stock': 'PETR4', 'close': 30.0}
+    assert asyncio.run(api.obter_cotacao_async('XXXX9')) is None
+    api.cache_disco.fechar()
+
+    reiniciada = BrapiAPI(caminho_cache=caminho)
+    reiniciada._fazer_requisicao = fazer_requisicao
+    assert asyncio.run(reiniciada.obter_cotacao_async('PETR4')) == {'stock': 'PETR4', 'close': 30.0}
+    assert asyncio.run(reiniciada.obter_cotacao_async('XXXX9')) is None  # Cache negativo também persiste
+    assert chamadas == ['PETR4', 'XXXX9']
+    reiniciada.cache_disco.fechar()
+
+
+def test_gravacao_em_lote_fora_do_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(brapi_client, 'INTERVALO_CACHE_DISCO', 0.01)
+    api = BrapiAPI(caminho_cache=str(tmp_path / 'cache.db'))
+    threads = []
+    gravar_no_disco = api.cache_disco._gravar_no_disco
+    monkeypatch.setattr(api.cache_disco, '_gravar_no_disco',
+                        lambda lote: threads.append(threading.get_ident()) or gravar_no_disco(lote))
+
+    async def fazer_requisicao(endpoint, params=None, prioridade=None):
+        return {'stocks': [{'stock': params['search']}]}
+    api._fazer_requisicao = fazer_requisicao
+
+    async def comandos():
+        for ticker in ('PETR4', 'VALE3', 'ITUB4'):
+            await api.obter_cotacao_async(ticker)
+        # Nada foi ao disco na resposta, mas a leitura já vê o pendente
+        assert api.cache_disco.gravacoes == 0 and api.cache_disco.pendentes == 3
+        assert api.cache_disco.ler('cotacao_VALE3')[0] == {'stock': 'VALE3'}
+        await asyncio.sleep(0.05)
+        return threading.get_ident()
+    thread_do_loop = asyncio.run(comandos())
+
+    assert api.cache_disco.gravacoes == 3 and api.cache_disco.pendentes == 0
+    assert threads == [threads[0]] and threads[0] != thread_do_loop  # Um commit, numa thread
+    api.cache_disco.fechar()
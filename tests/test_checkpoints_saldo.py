@@ -0,0 +1,43 @@
+import random
+
+from database import Database
+
+
+def movimentar_muito(db, quantidade=400):
+    random.seed(3)
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    for _ in range(quantidade):
+        user_id = random.choice((1, 2))
+        db.atualizar_saldo(user_id, round(random.uniform(-5, 6), 2), 'jogo', '')
+    return db
+
+
+def test_saldo_em_qualquer_momento_bate_com_o_log():
+    db = movimentar_muito(Database())
+    transacoes = list(db.transacoes)
+    assert len(db._checkpoints[1]) > 2  # O teste passa por vários intervalos
+
+    for user_id in (1, 2):
+        do_usuario = [t for t in transacoes if t['user_id'] == user_id]
+        for transacao in do_usuario[::7] + do_usuario[-1:]:
+            esperado = [t['saldo_posterior'] for t in do_usuario if t['data'] <= transacao['data']][-1]
+            assert db.obter_saldo_em(user_id, transacao['data']) == esperado
+        assert db.obter_saldo_em(user_id, do_usuario[0]['data'].replace(year=2000)) is None
+
+
+def test_reconciliacao_acha_divergencia_uma_vez():
+    db = movimentar_muito(Database())
+    assert db.reconciliar() == []
+
+    # Valor adulterado dentro de um intervalo já fechado e saldo alterado por fora do ledger
+    db.atualizar_saldo(1, 1.0, 'jogo', '')
+    posicao = db._indice_transacoes[1][-100]
+    db.transacoes.centavos[posicao - db.transacoes.base] += 500
+    db.usuarios[2].saldo += 10
+    db._reconciliar_pendentes.add(2)
+    db._checkpoints[1].verificados = 0
+
+    divergencias = db.reconciliar()
+    assert {d['user_id'] for d in divergencias} == {1, 2}
+    assert db.reconciliar() == []  # Nada mudou desde a última rodada
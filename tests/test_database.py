@@ -0,0 +1,111 @@
+import pytest
+
+from database import Credito, Database, Debito, Experiencia, RegistroPix, SaldoInsuficiente
+
+
+@pytest.fixture
+def db():
+    db = Database()
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    return db
+
+
+def extrato(db, user_id):
+    return [(t['tipo'], t['valor'], t['saldo_posterior']) for t in db.obter_extrato(user_id)]
+
+
+# ===== TRANSFERÊNCIAS =====
+def test_transferencia_com_taxa_gera_as_tres_pernas(db):
+    assert db.transferir(1, 2, 100.0, taxa=2.5) == (900.0, 1097.5)
+
+    assert extrato(db, 1) == [('transferencia_enviada', -97.5, 902.5), ('taxa', -2.5, 900.0)]
+    assert extrato(db, 2) == [('transferencia_recebida', 97.5, 1097.5)]
+    assert db.reconciliar() == []
+
+
+def test_saldo_insuficiente_nao_mexe_em_nada(db):
+    db.transferir(1, 2, 950.0)
+    transacoes = len(db.transacoes)
+
+    # A taxa é a perna que estoura: nem o envio nem o crédito acontecem
+    with pytest.raises(SaldoInsuficiente) as erro:
+        db.transferir(1, 2, 50.5, taxa=0.5)
+    assert (erro.value.user_id, erro.value.necessario) == (1, 50.5)
+    assert db.obter_saldo(1) == 50.0 and db.obter_saldo(2) == 1950.0
+    assert len(db.transacoes) == transacoes
+
+
+def test_movimentar_confere_a_soma_por_conta(db):
+    # Débito maior que o saldo compensado por um crédito na mesma conta: passa
+    saldos = db.movimentar([(1, -1500.0, 'aposta', ''), (1, 800.0, 'premio', ''), (2, 700.0, 'premio', '')])
+    assert saldos == {1: 300.0, 2: 1700.0}
+
+    with pytest.raises(SaldoInsuficiente):
+        db.movimentar([(2, 10.0, 'premio', ''), (1, -300.01, 'aposta', '')])
+    assert (db.obter_saldo(1), db.obter_saldo(2)) == (300.0, 1700.0)
+    assert len(db.transacoes) == 3
+
+
+def test_transferencia_invalida(db):
+    with pytest.raises(ValueError):
+        db.transferir(1, 1, 10.0)
+    with pytest.raises(ValueError):
+        db.transferir(1, 2, 10.0, taxa=11.0)
+
+
+# ===== LOTES =====
+def lote_pix(valor, taxa=1.0):
+    """O lote do !pix: débito, taxa, crédito, registro do PIX e xp"""
+    return [
+        Debito(1, valor - taxa, 'pix_enviado', 'PIX para Bia'),
+        Debito(1, taxa, 'taxa_pix', 'Taxa PIX'),
+        Credito(2, valor - taxa, 'pix_recebido', 'PIX de Ana'),
+        RegistroPix(1, 'Ana', 2, 'Bia', valor, taxa, valor - taxa, '', 7, 'Servidor', 8, 9),
+        Experiencia(1, 5),
+    ]
+
+
+def test_lote_aplica_tudo_e_devolve_os_novos_saldos(db):
+    # Os saldos devolvidos são os que o cog mostra como "Novo Saldo"
+    assert db.aplicar_lote(lote_pix(100.0)) == {1: 900.0, 2: 1099.0}
+
+    assert extrato(db, 1) == [('pix_enviado', -99.0, 901.0), ('taxa_pix', -1.0, 900.0)]
+    assert extrato(db, 2) == [('pix_recebido', 99.0, 1099.0)]
+    assert db.obter_usuario(1)['xp'] == 5
+    assert db.obter_estatisticas_pix(2)['valor_total_recebido'] == 99.0
+
+
+def test_lote_sem_saldo_nao_aplica_nada(db):
+    db.aplicar_lote([Debito(1, 950.0, 'aposta', '')])
+    transacoes, pix = len(db.transacoes), len(db.pix_transacoes_list)
+
+    # O débito principal cabe; a taxa, no meio do lote, não
+    with pytest.raises(SaldoInsuficiente):
+        db.aplicar_lote(lote_pix(50.5, taxa=0.5))
+    assert (db.obter_saldo(1), db.obter_saldo(2)) == (50.0, 1000.0)
+    assert (len(db.transacoes), len(db.pix_transacoes_list)) == (transacoes, pix)
+    assert db.obter_usuario(1)['xp'] == 0
+    assert db.obter_estatisticas_pix(1)['total_enviados'] == 0
+
+
+def test_lote_recusa_valor_negativo(db):
+    with pytest.raises(ValueError):
+        db.aplicar_lote([Credito(2, 10.0), Debito(1, -10.0)])
+    assert db.obter_saldo(2) == 1000.0
+
+
+# ===== PIX =====
+def test_historico_pix_usa_o_indice_por_usuario(db):
+    db.criar_usuario(3, 'Caio')
+    for i in range(30):
+        origem, destino = [(1, 2), (2, 1), (2, 3)][i % 3]
+        db.registrar_transacao_pix(origem, '', destino, '', float(i), 0.0, float(i), '', 7, 'Servidor', 8, i)
+
+    historico = db.obter_historico_pix(1, limite=4)
+    assert [p['mensagem_id'] for p in historico['enviados']] == [18, 21, 24, 27]
+    assert [p['mensagem_id'] for p in historico['recebidos']] == [19, 22, 25, 28]
+
+    # Só os PIX do próprio usuário são percorridos
+    db.pix_transacoes_list[0] = None
+    assert db.obter_historico_pix(3, limite=100)['recebidos'][0]['mensagem_id'] == 2
@@ -0,0 +1,302 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from database_mongo import DatabaseMongo
+
+
+# ===== MOTOR EM PROCESSO =====
+class CursorAssincrono:
+    """Cursor do mongomock com a interface assíncrona do motor"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor.sort(*args, **kwargs)
+        return self
+
+    async def __aiter__(self):
+        for documento in self.cursor:
+            yield documento
+
+
+class ColecaoAssincrona:
+    def __init__(self, colecao):
+        self.colecao = colecao
+        self.falha = None  # função (operações) -> exceção, chamada no próximo bulk_write
+
+    async def create_index(self, *args, **kwargs):
+        return self.colecao.create_index(*args, **kwargs)
+
+    async def find_one(self, *args, **kwargs):
+        return self.colecao.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        return CursorAssincrono(self.colecao.find(*args, **kwargs))
+
+    def aggregate(self, pipeline):
+        return CursorAssincrono(self.colecao.aggregate(pipeline))
+
+    async def bulk_write(self, operacoes, ordered=True):
+        falha, self.falha = self.falha, None
+        if falha is not None:
+            raise falha(operacoes)
+        return self.colecao.bulk_write(operacoes, ordered=ordered)
+
+
+class BancoAssincrono:
+    def __init__(self, banco):
+        self.banco = banco
+        self._colecoes = {}
+
+    def __getitem__(self, nome):
+        if nome not in self._colecoes:
+            self._colecoes[nome] = ColecaoAssincrona(self.banco[nome])
+        return self._colecoes[nome]
+
+    __getattr__ = __getitem__
+
+
+class ClienteAssincrono:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self._bancos = {}
+
+    def __getitem__(self, nome):
+        if nome not in self._bancos:
+            self._bancos[nome] = BancoAssincrono(self.cliente[nome])
+        return self._bancos[nome]
+
+
+class ClienteVigiado:
+    """Cliente pymongo (síncrono) que anota em que thread cada find rodou"""
+
+    def __init__(self, cliente, threads):
+        self.cliente = cliente
+        self.threads = threads
+
+    def __getitem__(self, nome):
+        return BancoVigiado(self.cliente[nome], self.threads)
+
+
+class BancoVigiado:
+    def __init__(self, banco, threads):
+        self.banco = banco
+        self.threads = threads
+
+    def __getattr__(self, nome):
+        colecao = self.banco[nome]
+        threads = self.threads
+
+        class ColecaoVigiada:
+            def find(self, *args, **kwargs):
+                threads.append(threading.get_ident())
+                return colecao.find(*args, **kwargs)
+        return ColecaoVigiada()
+
+
+@pytest.fixture
+def mongo():
+    return mongomock.MongoClient()
+
+
+def abrir(mongo, **kwargs):
+    async def conectar():
+        db = DatabaseMongo(cliente=ClienteAssincrono(mongo), intervalo_persistencia=3600, **kwargs)
+        await db.conectar()
+        return db
+    return asyncio.run(conectar())
+
+
+def fechar(db):
+    asyncio.run(db.fechar())
+
+
+def saldo_no_mongo(mongo, user_id):
+    return mongo['economia_b3'].usuarios.find_one({'user_id': user_id})['saldo']
+
+
+# ===== FALHAS NO PERSISTIR =====
+def test_erro_no_meio_do_lote_reenvia_so_o_resto(mongo):
+    db = abrir(mongo)
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    db.transferir(1, 2, 100.0)
+    db.atualizar_saldo(1, 50.0, 'daily', 'Recompensa')
+
+    def aplicar_parte(operacoes):
+        # As duas primeiras entram, a terceira falha
+        mongo['economia_b3'].transacoes.bulk_write(operacoes[:2])
+        return BulkWriteError({'writeErrors': [{'index': 2, 'code': 6, 'errmsg': 'rede'}], 'nInserted': 0})
+    db.banco.transacoes.falha = aplicar_parte
+
+    with pytest.raises(BulkWriteError):
+        asyncio.run(db.persistir())
+    assert len(db._fila) == 1  # Só a terceira transação voltou
+
+    asyncio.run(db.persistir())
+    posicoes = sorted(t['posicao'] for t in mongo['economia_b3'].transacoes.find())
+    assert posicoes == [0, 1, 2]
+    fechar(db)
+
+
+def test_resposta_perdida_nao_duplica_nada(mongo):
+    db = abrir(mongo)
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    db.transferir(1, 2, 100.0)
+    db.adicionar_xp(2, 30)
+    db.registrar_transacao_pix(1, 'Ana', 2, 'Bia', 10.0, 0.1, 9.9, '', 7, 'Servidor', 8, 9)
+    asyncio.run(db.persistir())
+
+    db.atualizar_saldo(1, 25.0, 'daily', 'Recompensa')
+    db.adicionar_xp(2, 5)
+
+    def aplicar_tudo_e_cair(operacoes):
+        # Aplicado no servidor, mas a confirmação não chegou
+        mongo['economia_b3'].usuarios.bulk_write(operacoes)
+        return AutoReconnect('conexão perdida')
+    db.banco.usuarios.falha = aplicar_tudo_e_cair
+
+    with pytest.raises(AutoReconnect):
+        asyncio.run(db.persistir())
+    asyncio.run(db.persistir())
+
+    assert saldo_no_mongo(mongo, 1) == db.obter_saldo(1) == 925.0
+    usuario = mongo['economia_b3'].usuarios.find_one({'user_id': 2})
+    assert usuario['xp'] == usuario['experiencia'] == 35
+    assert mongo['economia_b3'].transacoes.count_documents({}) == 3
+    assert mongo['economia_b3'].pix_transacoes.count_documents({}) == 1
+    fechar(db)
+
+
+# ===== RECARGA =====
+def test_recarregar_reconstroi_o_estado(mongo):
+    db = abrir(mongo)
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    db.transferir(1, 2, 100.0, taxa=1.0)
+    db.registrar_transacao_pix(1, 'Ana', 2, 'Bia', 10.0, 0.1, 9.9, '', 7, 'Servidor', 8, 9)
+    aposta_id = db.criar_aposta(1, 2, 20.0, 'cara ou coroa')
+    fechar(db)
+
+    db = abrir(mongo)
+    assert db.obter_saldo(1) == 900.0
+    assert db.obter_saldo(2) == 1099.0
+    assert [t['tipo'] for t in db.obter_extrato(1)] == ['transferencia_enviada', 'taxa']
+    assert db.obter_estatisticas_pix(2)['total_recebidos'] == 1
+    assert db.obter_aposta(aposta_id)['valor'] == 20.0
+
+    # Continua numerando depois do que já estava no Mongo
+    db.atualizar_saldo(2, 1.0, 'daily', 'Recompensa')
+    fechar(db)
+    posicoes = sorted(t['posicao'] for t in mongo['economia_b3'].transacoes.find())
+    assert posicoes == [0, 1, 2, 3]
+
+
+def test_documentos_antigos_ganham_posicao(mongo):
+    transacoes = mongo['economia_b3'].transacoes
+    transacoes.insert_many([
+        {'user_id': 1, 'tipo': 'daily', 'valor': 5.0, 'descricao': '', 'data': datetime(2024, 1, 2)},
+        {'user_id': 1, 'tipo': 'daily', 'valor': 3.0, 'descricao': '', 'data': datetime(2024, 1, 1)},
+    ])
+
+    db = abrir(mongo)
+    assert [t['valor'] for t in transacoes.find().sort('posicao', 1)] == [3.0, 5.0]
+    assert [t['valor'] for t in db.obter_extrato(1)] == [3.0, 5.0]
+    fechar(db)
+
+
+# ===== JANELA QUENTE =====
+def semear_historico(mongo, agora):
+    """40 transações e 40 PIX do usuário 1: metade de 60 dias atrás, metade de hoje"""
+    banco = mongo['economia_b3']
+    banco.usuarios.insert_one({'user_id': 1, 'nome': 'Ana', 'saldo': 1000.0, 'xp': 0, 'nivel': 1})
+    banco.usuarios.insert_one({'user_id': 2, 'nome': 'Bia', 'saldo': 1000.0, 'xp': 0, 'nivel': 1})
+    datas = [agora - timedelta(days=60, minutes=40 - i) for i in range(20)]
+    datas += [agora - timedelta(minutes=40 - i) for i in range(20, 40)]
+    banco.transacoes.insert_many([
+        {'posicao': i, 'user_id': 1, 'tipo': 'daily', 'valor': float(i), 'descricao': '',
+         'data': data, 'saldo_posterior': 1000.0}
+        for i, data in enumerate(datas)
+    ])
+    banco.pix_transacoes.insert_many([
+        {'posicao': i, 'remetente_id': 1, 'remetente_nome': 'Ana', 'destinatario_id': 2,
+         'destinatario_nome': 'Bia', 'valor_bruto': 10.0, 'taxa': 1.0, 'valor_liquido': 9.0,
+         'descricao': '', 'servidor_id': 7, 'servidor_nome': 'Servidor', 'canal_id': 8,
+         'mensagem_id': i, 'data': data, 'status': 'concluido'}
+        for i, data in enumerate(datas)
+    ])
+    return datas
+
+
+def test_carrega_so_a_janela_quente(mongo):
+    agora = datetime.now().replace(microsecond=0)  # O Mongo guarda milissegundos
+    semear_historico(mongo, agora)
+    db = abrir(mongo, cliente_sincrono=mongo, janela_quente=timedelta(days=30))
+
+    assert len(db.transacoes) == 20
+    assert len(db.pix_transacoes_list) == 20
+
+    # Extrato paginado atravessa a memória e continua no Mongo sem repetir nada
+    valores, cursor = [], None
+    while True:
+        pagina, cursor = db.obter_extrato_pagina(1, tamanho=7, cursor=cursor)
+        valores += [t['valor'] for t in pagina]
+        if cursor is None:
+            break
+    assert valores == [float(i) for i in range(39, -1, -1)]
+    assert [t['valor'] for t in db.obter_historico(1, limite=25)] == [float(i) for i in range(15, 40)]
+
+    pix, cursor = db.obter_pix_pagina(2, tamanho=30)
+    assert [p['posicao'] for p in pix] == list(range(39, 9, -1))
+
+    # Agregados incluem o que ficou só no Mongo
+    assert db.obter_estatisticas_pix(1)['total_enviados'] == 40
+    assert db.obter_estatisticas_pix(2)['valor_total_recebido'] == 360.0
+    assert db.obter_relatorio_pix_servidor(7)['total_transacoes'] == 40
+    inicio_antigo = agora - timedelta(days=60, minutes=30)
+    assert db.obter_relatorio_pix_servidor(7, inicio_antigo, agora - timedelta(days=1))['total_transacoes'] == 10
+    fechar(db)
+
+
+def test_janela_quente_continua_numerando(mongo):
+    semear_historico(mongo, datetime.now())
+    db = abrir(mongo, cliente_sincrono=mongo, janela_quente=timedelta(days=30))
+    db.atualizar_saldo(1, 5.0, 'daily', 'Recompensa')
+    db.registrar_transacao_pix(2, 'Bia', 1, 'Ana', 10.0, 0.1, 9.9, '', 7, 'Servidor', 8, 99)
+    fechar(db)
+
+    banco = mongo['economia_b3']
+    assert banco.transacoes.find_one({'posicao': 40})['valor'] == 5.0
+    assert banco.pix_transacoes.find_one({'posicao': 40})['remetente_id'] == 2
+    assert banco.transacoes.count_documents({}) == banco.pix_transacoes.count_documents({}) == 41
+
+
+def test_comandos_leem_o_historico_fora_do_event_loop(mongo):
+    agora = datetime.now().replace(microsecond=0)
+    semear_historico(mongo, agora)
+    threads = []
+    db = abrir(mongo, cliente_sincrono=ClienteVigiado(mongo, threads), janela_quente=timedelta(days=30))
+    inicio_antigo = agora - timedelta(days=60, minutes=30)
+
+    async def comandos():
+        extrato, _ = await db.consultar('obter_extrato_pagina', 1, 30)
+        historico = await db.consultar('obter_historico_pix', 2, 25)
+        relatorio = await db.consultar('obter_relatorio_pix_servidor', 7, inicio_antigo, agora - timedelta(days=1))
+        return threading.get_ident(), extrato, historico, relatorio
+    thread_do_loop, extrato, historico, relatorio = asyncio.run(comandos())
+
+    assert threads and thread_do_loop not in threads  # Nenhuma ida ao Mongo no event loop
+    assert [t['valor'] for t in extrato] == [float(i) for i in range(39, 9, -1)]
+    assert [p['mensagem_id'] for p in historico['recebidos']] == list(range(15, 40))
+    assert relatorio['total_transacoes'] == 10
+
+    # Fora de um comando (scripts) a mesma consulta lê direto e dá o mesmo resultado
+    assert db.obter_extrato_pagina(1, 30)[0] == extrato
+    fechar(db)
@@ -0,0 +1,72 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from database import SaldoInsuficiente
+from database_sqlite import DatabaseSQLite
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Commits só quando o teste pedir
+    db = DatabaseSQLite(str(tmp_path / 'economia.db'), commit_a_cada=10_000, intervalo_commit=3600)
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    db.commit()
+    yield db
+    db.fechar()
+
+
+def saldo_em_disco(db, user_id):
+    with sqlite3.connect(db.caminho) as conexao:
+        return conexao.execute('SELECT saldo FROM usuarios WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+
+def test_movimentacao_com_erro_desfaz_so_ela(db):
+    db.conexao.execute(
+        "CREATE TRIGGER falha BEFORE INSERT ON transacoes WHEN NEW.tipo = 'explode' "
+        "BEGIN SELECT RAISE(ABORT, 'falha'); END"
+    )
+    db.atualizar_saldo(1, 5.0, 'daily', 'Pendente de commit')
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.movimentar([(1, -100.0, 'envio', ''), (2, 100.0, 'explode', '')])
+
+    assert db.obter_saldo(1) == 1005.0
+    assert db.obter_saldo(2) == 1000.0
+    db.commit()
+    assert saldo_em_disco(db, 1) == 1005.0
+    assert saldo_em_disco(db, 2) == 1000.0
+    assert [t['tipo'] for t in db.obter_extrato(1)] == ['daily']
+
+
+def test_movimentacao_nao_faz_commit_fora_do_lote(db):
+    db.transferir(1, 2, 100.0)
+    assert saldo_em_disco(db, 1) == 1000.0  # Ainda no lote
+    db.commit()
+    assert saldo_em_disco(db, 1) == 900.0
+
+
+def test_saldo_insuficiente_nao_altera_nada(db):
+    with pytest.raises(SaldoInsuficiente):
+        db.movimentar([(1, -5000.0, 'envio', ''), (2, 5000.0, 'recebimento', '')])
+    db.commit()
+    assert (saldo_em_disco(db, 1), saldo_em_disco(db, 2)) == (1000.0, 1000.0)
+    assert db.obter_extrato(2) == []
+
+
+def test_commit_periodico_sem_nova_escrita(tmp_path):
+    db = DatabaseSQLite(str(tmp_path / 'economia.db'), commit_a_cada=10_000, intervalo_commit=0.05)
+
+    async def escrever_e_esperar():
+        db.iniciar()
+        db.criar_usuario(1, 'Ana')
+        db.atualizar_saldo(1, 50.0, 'daily', 'Recompensa')
+        await asyncio.sleep(0.2)  # Nenhuma escrita depois desta: só a task fecha o lote
+        return saldo_em_disco(db, 1)
+
+    try:
+        assert asyncio.run(escrever_e_esperar()) == 1050.0
+    finally:
+        db.fechar()
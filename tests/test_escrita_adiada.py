@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+
+from database import Credito, Experiencia, RegistroPix, SaldoInsuficiente
+from database_sqlite import DatabaseSQLite
+from escrita_adiada import EscritaAdiada, FilaCheia
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = DatabaseSQLite(str(tmp_path / 'economia.db'), commit_a_cada=10_000, intervalo_commit=3600)
+    backend.criar_usuario(1, 'Ana')
+    backend.criar_usuario(2, 'Bia')
+    backend.commit()
+    return backend
+
+
+@pytest.fixture
+def db(backend):
+    # Só grava quando o teste pedir (ou a fila chegar ao limite)
+    db = EscritaAdiada(backend, intervalo=3600, operacoes_por_lote=10_000, maximo_pendentes=4)
+    yield db
+    db.fechar()
+
+
+def em_disco(backend, sql, *parametros):
+    with sqlite3.connect(backend.caminho) as conexao:
+        return conexao.execute(sql, parametros).fetchone()[0]
+
+
+def saldo_em_disco(backend, user_id):
+    return em_disco(backend, 'SELECT saldo FROM usuarios WHERE user_id = ?', user_id)
+
+
+# ===== ESCRITAS ADIADAS =====
+def test_movimentar_fica_na_fila_ate_descarregar(db, backend):
+    saldos = db.movimentar([(1, -100.0, 'aposta', 'Slots'), (1, 250.0, 'premio', 'Slots')])
+
+    assert saldos == {1: 1150.0}
+    assert db.obter_saldo(1) == 1150.0
+    assert backend.obter_saldo(1) == 1000.0  # Nada foi ao backend ainda
+    assert db.lotes_gravados == 0
+
+    db.descarregar()
+    assert saldo_em_disco(backend, 1) == 1150.0
+    assert [t['saldo_posterior'] for t in backend.obter_extrato(1)] == [900.0, 1150.0]
+
+
+def test_movimentar_confere_saldo_com_o_pendente(db, backend):
+    db.movimentar([(1, -800.0, 'aposta', '')])
+    with pytest.raises(SaldoInsuficiente):
+        db.transferir(1, 2, 300.0)
+
+    assert db.obter_saldo(1) == 200.0
+    assert db.obter_saldo(2) == 1000.0
+    db.descarregar()
+    assert backend.obter_extrato(2) == []
+
+
+def test_aplicar_lote_adia_saldo_xp_e_pix(db, backend):
+    saldos = db.aplicar_lote([
+        Credito(1, 50.0, 'daily', 'Recompensa'),
+        Experiencia(1, 30),
+        RegistroPix(1, 'Ana', 2, 'Bia', 10.0, 0.1, 9.9, '', 7, 'Servidor', 8, 9),
+    ])
+
+    assert saldos == {1: 1050.0}
+    assert db.obter_usuario(1)['xp'] == db.obter_usuario(1)['experiencia'] == 30
+    assert em_disco(backend, 'SELECT COUNT(*) FROM pix_transacoes') == 0
+
+    db.descarregar()
+    assert em_disco(backend, 'SELECT xp FROM usuarios WHERE user_id = 1') == 30
+    assert em_disco(backend, 'SELECT COUNT(*) FROM pix_transacoes') == 1
+    assert backend.obter_usuario(1)['xp'] == 30
+
+
+def test_daily_inteiro_vai_num_lote(db, backend):
+    db.aplicar_lote([Credito(1, 100.0, 'daily', 'Daily'), Experiencia(1, 10)])
+    db.atualizar_campos_usuario(1, {'streak_daily': 3, 'ultima_recompensa_daily': '2026-10-18T10:00:00'})
+
+    assert db.lotes_gravados == 0
+    usuario = db.obter_usuario(1)
+    assert (usuario['saldo'], usuario['xp'], usuario['streak_daily']) == (1100.0, 10, 3)
+
+    db.descarregar()
+    assert db.lotes_gravados == 1
+    usuario = backend.obter_usuario(1)
+    assert (usuario['saldo'], usuario['streak_daily']) == (1100.0, 3)
+    assert usuario['ultima_recompensa_daily'] == '2026-10-18T10:00:00'
+
+
+def test_outros_metodos_gravam_o_pendente_antes(db, backend):
+    db.atualizar_saldo(1, 10.0, 'daily', '')
+    db.adicionar_acao(1, 'PETR4', 1, 10.0)  # Vai direto ao backend
+    assert db.lotes_gravados == 1
+    assert backend.obter_saldo(1) == 1010.0
+
+    db.atualizar_saldo(1, 10.0, 'daily', '')
+    db.obter_carteira(1)  # Leitura independente: não grava
+    assert db.lotes_gravados == 1
+
+
+# ===== BACKPRESSURE =====
+def test_fila_cheia_recusa_antes_de_aplicar(db, backend, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(backend, 'gravar_lote', falhar)
+
+    for _ in range(4):
+        db.atualizar_saldo(1, 1.0, 'daily', '')  # Entram na fila sem erro
+    with pytest.raises(FilaCheia):
+        db.movimentar([(1, 5.0, 'premio', '')])
+    with pytest.raises(FilaCheia):
+        db.atualizar_saldo(1, 1.0, 'daily', '')
+
+    assert db.obter_saldo(1) == 1004.0
+    assert db.recusadas == 2
+
+    monkeypatch.undo()
+    db.descarregar()
+    assert saldo_em_disco(backend, 1) == 1004.0
+    assert len(backend.obter_extrato(1)) == 4
+
+
+def test_falha_ao_gravar_nao_levanta_para_escrita_aceita(backend, monkeypatch):
+    db = EscritaAdiada(backend, intervalo=3600, operacoes_por_lote=2, maximo_pendentes=100)
+    def falhar(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(backend, 'gravar_lote', falhar)
+
+    db.atualizar_saldo(1, 1.0, 'daily', '')
+    assert db.movimentar([(1, 1.0, 'premio', '')]) == {1: 1002.0}  # Tentou gravar, falhou, ficou na fila
+
+    monkeypatch.undo()
+    db.fechar()
+    assert saldo_em_disco(backend, 1) == 1002.0
@@ -0,0 +1,31 @@
+from datetime import date, datetime
+
+import horario_b3
+from horario_b3 import FUSO_B3, VALIDADE_MINIMA, VALIDADE_PREGAO
+
+
+def b3(*args):
+    return datetime(*args, tzinfo=FUSO_B3)
+
+
+def test_feriados_moveis_e_ultimo_dia_util():
+    dias = horario_b3.feriados(2024)
+    assert {date(2024, 2, 12), date(2024, 2, 13), date(2024, 3, 29), date(2024, 5, 30)} <= dias
+    assert date(2024, 12, 31) in dias  # Terça-feira: último dia útil do ano
+    assert date(2022, 12, 30) in horario_b3.feriados(2022)  # 31/12/2022 caiu num sábado
+    assert horario_b3.dia_de_pregao(date(2024, 3, 28))
+
+
+def test_pregao_e_proxima_abertura():
+    assert horario_b3.pregao_aberto(b3(2024, 3, 28, 10))
+    assert not horario_b3.pregao_aberto(b3(2024, 3, 28, 18))
+    # Quinta à noite antes da Sexta-feira Santa: abre só na segunda
+    assert horario_b3.proxima_abertura(b3(2024, 3, 28, 20)) == b3(2024, 4, 1, 10)
+    assert horario_b3.proxima_abertura(b3(2024, 4, 1, 9, 30)) == b3(2024, 4, 1, 10)
+
+
+def test_validade_curta_no_pregao_e_ate_a_abertura_fora_dele():
+    assert horario_b3.validade_cotacao(b3(2024, 4, 1, 15)) == VALIDADE_PREGAO
+    assert horario_b3.validade_cotacao(b3(2024, 4, 1, 9, 30)) == 30 * 60
+    assert horario_b3.validade_cotacao(b3(2024, 4, 1, 9, 59, 30)) == VALIDADE_MINIMA
+    assert horario_b3.validade_cotacao(b3(2024, 3, 29, 12)) == (3 * 24 - 2) * 60 * 60
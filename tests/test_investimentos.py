@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import cogs.investimentos.investimentos as modulo
+from database import Database
+
+
+class BrapiFalsa:
+    """Cotação fixa entregue depois de ceder o event loop (como uma requisição real)"""
+
+    def __init__(self, preco):
+        self.preco = preco
+        self.vencida = False  # Só a cotação do cache, vencida, e a API sem vaga
+
+    async def obter_cotacao_async(self, ticker, usar_cache=True, permitir_velha=True):
+        await asyncio.sleep(0)
+        cotacao = {'stock': ticker, 'regularMarketPrice': self.preco}
+        if self.vencida and not permitir_velha:
+            cotacao['desatualizada'] = True
+        return cotacao
+
+
+class Contexto:
+    def __init__(self, user_id):
+        self.author = SimpleNamespace(id=user_id, name=f'User{user_id}')
+        self.embeds = []
+
+    async def send(self, embed=None, **_):
+        self.embeds.append(embed)
+
+
+@pytest.fixture
+def cog(monkeypatch):
+    db = Database()
+    monkeypatch.setattr(modulo, 'db', db)
+    monkeypatch.setattr(modulo, 'brapi', BrapiFalsa(10.0))
+    cog = object.__new__(modulo.Investimentos)  # Sem bot: não inicia o loop de pré-aquecimento
+    cog.db = db
+    return cog
+
+
+def rodar(*corrotinas):
+    async def juntas():
+        return await asyncio.gather(*corrotinas)
+    return asyncio.run(juntas())
+
+
+def test_vendas_simultaneas_nao_creditam_em_dobro(cog):
+    cog.db.obter_usuario(1)
+    cog.db.adicionar_acao(1, 'PETR4', 10, 10.0)
+    a, b = Contexto(1), Contexto(1)
+
+    rodar(modulo.Investimentos.vender_acao.callback(cog, a, 'PETR4', 10),
+          modulo.Investimentos.vender_acao.callback(cog, b, 'PETR4', 10))
+
+    titulos = sorted(ctx.embeds[0].title for ctx in (a, b))
+    assert titulos == ['✅ Venda Realizada!', '❌ Quantidade Insuficiente']
+    assert cog.db.obter_saldo(1) == 1100
+    assert cog.db.obter_carteira(1) == {}
+
+
+def test_compras_simultaneas_nao_deixam_saldo_negativo(cog):
+    cog.db.obter_usuario(1)
+    a, b = Contexto(1), Contexto(1)
+
+    rodar(modulo.Investimentos.comprar_acao.callback(cog, a, 'PETR4', 80),
+          modulo.Investimentos.comprar_acao.callback(cog, b, 'PETR4', 80))
+
+    titulos = sorted(ctx.embeds[0].title for ctx in (a, b))
+    assert titulos == ['✅ Compra Realizada!', '❌ Saldo Insuficiente']
+    assert cog.db.obter_saldo(1) == 200
+    assert cog.db.obter_carteira(1)['PETR4']['quantidade'] == 80
+    novo_saldo = next(ctx for ctx in (a, b) if ctx.embeds[0].title.startswith('✅')).embeds[0].fields[-1].value
+    assert novo_saldo == '💵 200.00'
+
+
+def test_quantidade_negativa_e_recusada(cog):
+    cog.db.obter_usuario(1)
+    ctx = Contexto(1)
+    rodar(modulo.Investimentos.comprar_acao.callback(cog, ctx, 'PETR4', -5))
+    assert ctx.embeds[0].title == '❌ Quantidade Inválida'
+    assert cog.db.obter_saldo(1) == 1000
+
+
+@pytest.mark.parametrize('comando', ['comprar_acao', 'vender_acao'])
+def test_cotacao_vencida_nao_negocia(cog, comando):
+    cog.db.obter_usuario(1)
+    cog.db.adicionar_acao(1, 'PETR4', 10, 10.0)
+    modulo.brapi.vencida = True
+    ctx = Contexto(1)
+
+    rodar(getattr(modulo.Investimentos, comando).callback(cog, ctx, 'PETR4', 5))
+
+    assert ctx.embeds[0].title == '⏳ Cotação indisponível'
+    assert cog.db.obter_saldo(1) == 1000
+    assert cog.db.obter_carteira(1)['PETR4']['quantidade'] == 10
+
+
+# ===== PRÉ-AQUECIMENTO =====
+def test_pre_aquecimento_segue_rodando_depois_de_erro(cog, capsys):
+    for user_id, tickers in ((1, ['PETR4', 'VALE3']), (2, ['VALE3']), (3, ['VALE3', 'ITUB4']), (4, ['ITUB4'])):
+        for ticker in tickers:
+            cog.db.adicionar_acao(user_id, ticker, 1, 10.0)
+    pedidos = []
+
+    async def atualizar(tickers, antecedencia=60, maximo=None):
+        pedidos.append(tickers)
+        if len(pedidos) == 1:
+            raise RuntimeError('resposta inesperada')
+        return len(tickers)
+    modulo.brapi.atualizar_cotacoes_async = atualizar
+
+    # Erro numa rodada é registrado e não escapa (escapando, o tasks.loop pararia de vez)
+    rodar(modulo.Investimentos.pre_aquecer_cotacoes.coro(cog), modulo.Investimentos.pre_aquecer_cotacoes.coro(cog))
+    assert '❌ Erro no pré-aquecimento' in capsys.readouterr().out
+    assert pedidos == [['VALE3', 'ITUB4', 'PETR4']] * 2  # Mais detidos primeiro
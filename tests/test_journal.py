@@ -0,0 +1,122 @@
+import os
+
+from database import Database
+from journal import Journal
+
+
+def abrir(diretorio):
+    db = Database()
+    db.ativar_journal(Journal(diretorio, intervalo_commit=0.01))
+    return db
+
+
+def caminho_journal(diretorio):
+    nome, = [nome for nome in os.listdir(diretorio) if nome.startswith('journal-')]
+    return os.path.join(diretorio, nome)
+
+
+def test_replay_reconstroi_saldos(tmp_path):
+    db = abrir(tmp_path)
+    db.atualizar_saldo(1, 5, 'ganho')
+    db.movimentar([(1, -10, 'envio', ''), (2, 10, 'recebimento', '')])
+    db.journal.fechar()
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 995
+    assert db.obter_saldo(2) == 1010
+    assert [t['tipo'] for t in db.obter_extrato(1)] == ['ganho', 'envio']
+    db.journal.fechar()
+
+
+def test_cauda_rasgada_e_cortada_e_escritas_seguintes_sobrevivem(tmp_path):
+    db = abrir(tmp_path)
+    db.atualizar_saldo(1, 5)
+    db.journal.fechar()
+
+    # Escrita interrompida no meio de um frame
+    with open(caminho_journal(tmp_path), 'ab') as f:
+        f.write(b'\x40\x00\x00\x00\xde\xad\xbe\xef lixo')
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1005
+    db.atualizar_saldo(1, 100)
+    db.journal.fechar()
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1105
+    db.journal.fechar()
+
+
+def test_frame_com_crc_invalido_e_descartado(tmp_path):
+    db = abrir(tmp_path)
+    db.atualizar_saldo(1, 5)
+    db.journal.fechar()
+    tamanho_valido = os.path.getsize(caminho_journal(tmp_path))
+
+    db = abrir(tmp_path)
+    db.atualizar_saldo(1, 7)
+    db.journal.fechar()
+    with open(caminho_journal(tmp_path), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        ultimo = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([ultimo[0] ^ 0xFF]))
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1005
+    assert os.path.getsize(caminho_journal(tmp_path)) == tamanho_valido
+    db.atualizar_saldo(1, 1)
+    db.journal.fechar()
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1006
+    db.journal.fechar()
+
+
+def test_snapshot_e_gravado_fora_do_processo_do_bot(tmp_path, monkeypatch):
+    pid_bot = os.getpid()
+    serializar = Journal._serializar
+
+    def serializar_fora_do_bot(self, estado):
+        assert os.getpid() != pid_bot, 'snapshot serializado no caminho da escrita'
+        return serializar(self, estado)
+    monkeypatch.setattr(Journal, '_serializar', serializar_fora_do_bot)
+
+    db = Database()
+    db.ativar_journal(Journal(tmp_path, intervalo_commit=0.01, registros_por_snapshot=5))
+    for _ in range(12):
+        db.atualizar_saldo(1, 1)
+    db.journal.fechar()
+    assert any(nome.startswith('snapshot-') for nome in os.listdir(tmp_path))
+    assert not any(nome.startswith('journal-000000000000') for nome in os.listdir(tmp_path))
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1012
+    db.journal.fechar()
+
+
+class FormatoQuebrado:
+    EXTENSAO = 'bin'
+
+    @staticmethod
+    def serializar(estado):
+        raise OSError('disco cheio')
+
+
+def test_snapshot_que_falha_mantem_journals_e_o_replay_le_os_dois(tmp_path):
+    db = Database()
+    db.ativar_journal(Journal(tmp_path, intervalo_commit=0.01, registros_por_snapshot=3,
+                              formato_snapshot=FormatoQuebrado))
+    for _ in range(5):
+        db.atualizar_saldo(1, 1)
+    db.journal.fechar()
+    assert sorted(os.listdir(tmp_path)) == ['journal-000000000000.log', 'journal-000000000001.log']
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1005
+    db.atualizar_saldo(1, 10)  # Continua no journal mais novo, depois dos registros dele
+    db.journal.fechar()
+
+    db = abrir(tmp_path)
+    assert db.obter_saldo(1) == 1015
+    db.journal.fechar()
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from pix_particionado import PixParticionado
+
+
+def gerar_pix(inicio, quantidade):
+    """PIX a cada 7 horas alternando entre dois servidores"""
+    return [
+        {'servidor_id': 1 + i % 2, 'data': inicio + timedelta(hours=7 * i),
+         'valor_bruto': float(i + 1), 'taxa': 0.5}
+        for i in range(quantidade)
+    ]
+
+
+def esperado(todos, servidor_id, inicio, fim):
+    dentro = [p for p in todos if p['servidor_id'] == servidor_id
+              and (inicio is None or p['data'] >= inicio) and (fim is None or p['data'] < fim)]
+    return len(dentro), sum(p['valor_bruto'] for p in dentro), 0.5 * len(dentro)
+
+
+PERIODOS = [
+    (None, None),
+    (datetime(2024, 1, 2, 10), datetime(2024, 1, 9, 3)),   # Bordas no meio do dia
+    (datetime(2024, 1, 3), datetime(2024, 1, 6)),          # Dias inteiros
+    (datetime(2024, 1, 5, 13), None),
+    (datetime(2024, 2, 1), None),                          # Sem nada
+]
+
+
+def test_resumo_soma_dias_inteiros_e_percorre_bordas():
+    todos = gerar_pix(datetime(2024, 1, 1, 3), 60)
+    pix = PixParticionado()
+    for transacao_pix in todos:
+        pix.anexar(transacao_pix)
+
+    for inicio, fim in PERIODOS:
+        assert pix.resumo(1, inicio, fim) == esperado(todos, 1, inicio, fim)
+
+
+def test_dias_arquivados_leem_as_bordas_do_disco():
+    todos = gerar_pix(datetime(2024, 1, 1, 3), 60)
+    pix = PixParticionado()
+    for transacao_pix in todos:
+        pix.anexar(transacao_pix)
+    pix.arquivar_ate(datetime(2024, 1, 8).toordinal())
+
+    lidos = []
+
+    def carregar_dia(servidor_id, dia):
+        lidos.append(dia)
+        return [p for p in todos if p['servidor_id'] == servidor_id and p['data'].toordinal() == dia]
+
+    for inicio, fim in PERIODOS:
+        assert pix.resumo(1, inicio, fim, carregar_dia) == esperado(todos, 1, inicio, fim)
+    # Só os dias de borda arquivados foram lidos
+    assert set(lidos) == {datetime(2024, 1, 2).toordinal(), datetime(2024, 1, 5).toordinal()}
+
+    recentes = pix.listar(2, datetime(2024, 1, 6, 12), limite=4, carregar_dia=carregar_dia)
+    do_servidor = [p for p in todos if p['servidor_id'] == 2 and p['data'] >= datetime(2024, 1, 6, 12)]
+    assert recentes == do_servidor[::-1][:4]
+
+
+def test_totais_anexados_entram_no_resumo():
+    pix = PixParticionado()
+    dia = datetime(2024, 1, 1).toordinal()
+    pix.anexar_totais(1, dia, 10, 500.0, 5.0)
+    pix.anexar_totais(1, dia, 2, 20.0, 1.0)
+    pix.anexar({'servidor_id': 1, 'data': datetime(2024, 1, 2, 9), 'valor_bruto': 7.0, 'taxa': 0.1})
+
+    assert pix.resumo(1) == (13, 527.0, 6.1)
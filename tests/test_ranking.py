@@ -0,0 +1,69 @@
+import random
+
+from ranking import ListaIndexada, Ranking
+
+
+def conferir(lista, esperado):
+    """Comparar com uma lista ordenada: tamanho, posição de cada chave e fatias"""
+    assert len(lista) == len(esperado)
+    assert lista.fatia(0, len(esperado) + 1) == esperado
+    for posicao, chave in enumerate(esperado):
+        assert lista.indice(chave) == posicao
+    for inicio in range(0, len(esperado), 7):
+        assert lista.fatia(inicio, 5) == esperado[inicio:inicio + 5]
+
+
+def test_skip_list_acompanha_lista_ordenada():
+    random.seed(5)
+    lista, esperado = ListaIndexada(), []
+    for _ in range(2000):
+        if esperado and random.random() < 0.4:
+            chave = random.choice(esperado)
+            lista.remover(chave)
+            esperado.remove(chave)
+        else:
+            chave = (random.randint(-500, 0), random.randint(0, 10**6))
+            if chave not in esperado:
+                lista.inserir(chave)
+                esperado.append(chave)
+                esperado.sort()
+    conferir(lista, esperado)
+    assert lista.indice((1, 1)) is None
+
+
+def test_montagem_ordenada_aceita_insercoes_e_remocoes():
+    random.seed(7)
+    esperado = sorted(random.sample(range(10**6), 300))
+    lista = ListaIndexada.de_ordenadas(esperado)
+    conferir(lista, esperado)
+
+    for chave in esperado[::3]:
+        lista.remover(chave)
+    esperado = [chave for i, chave in enumerate(esperado) if i % 3]
+    for chave in (-1, 10**6 + 1, esperado[10] + 1):
+        lista.inserir(chave)
+    conferir(lista, sorted(esperado + [-1, 10**6 + 1, esperado[10] + 1]))
+
+
+def test_ranking_empate_pelo_menor_id_e_atualizacao():
+    ranking = Ranking()
+    for user_id, valor in ((3, 50.0), (1, 50.0), (2, 80.0), (4, 10.0)):
+        ranking.atualizar(user_id, valor)
+
+    assert ranking.top(10) == [(2, 80.0), (1, 50.0), (3, 50.0), (4, 10.0)]
+    ranking.atualizar(4, 90.0)
+    ranking.remover(2)
+    assert ranking.top(2, inicio=1) == [(1, 50.0), (3, 50.0)]
+    assert ranking.posicao(4) == 1
+    assert ranking.posicao(2) is None
+
+
+def test_ranking_adiado_aplica_o_que_mudou_antes_de_montar():
+    ranking = Ranking()
+    ranking.carregar_depois(lambda: iter([(1, 10.0), (2, 20.0), (3, 30.0)]))
+    ranking.atualizar(1, 40.0)
+    ranking.remover(3)
+    ranking.atualizar(5, 5.0)
+
+    assert ranking.top(10) == [(1, 40.0), (2, 20.0), (5, 5.0)]
+    assert len(ranking) == 3
@@ -0,0 +1,79 @@
+import pickle
+import struct
+
+import snapshot_binario
+from database import Database
+
+
+def popular():
+    db = Database()
+    db.criar_usuario(1, 'Ana')
+    db.criar_usuario(2, 'Bia')
+    db.criar_usuario(3, 'Caio')
+    db.adicionar_acao(1, 'PETR4', 10, 12.5)
+    db.atualizar_saldo(2, 50.0, 'daily', 'Recompensa')
+    db.registrar_transacao_pix(1, 'Ana', 2, 'Bia', 100.0, 1.0, 99.0, '', 7, 'Servidor', 8, 9)
+    db.registrar_transacao_pix(2, 'Bia', 3, 'Caio', 30.0, 0.3, 29.7, '', 7, 'Servidor', 8, 10)
+    return db
+
+
+def abrir(tmp_path, dados):
+    caminho = tmp_path / 'snapshot.bin'
+    caminho.write_bytes(dados)
+    db = Database()
+    db._carregar_estado(snapshot_binario.abrir(str(caminho)))
+    return db
+
+
+def para_versao_2(dados, estatisticas_pix):
+    """Mesmo estado no layout da versão 2: cinco seções e estatísticas dentro do pickle"""
+    _, _, com_carteira, *indice = snapshot_binario.CABECALHO.unpack_from(dados)
+    secoes = {nome: dados[indice[2 * i]:indice[2 * i] + indice[2 * i + 1]]
+              for i, nome in enumerate(snapshot_binario.SECOES)}
+    resto = pickle.loads(secoes['resto'])
+    resto['estatisticas_pix'] = estatisticas_pix
+    secoes['resto'] = pickle.dumps(resto)
+
+    cabecalho = struct.Struct(snapshot_binario.INICIO_CABECALHO.format + 'QQ' * 5)
+    posicao, indice = cabecalho.size, []
+    for nome in snapshot_binario.SECOES_ANTIGAS:
+        indice += [posicao, len(secoes[nome])]
+        posicao += len(secoes[nome])
+    partes = [secoes[nome] for nome in snapshot_binario.SECOES_ANTIGAS]
+    return b''.join([cabecalho.pack(snapshot_binario.MAGICO, 2, com_carteira, *indice), *partes])
+
+
+def test_snapshot_reabre_o_mesmo_estado(tmp_path):
+    original = popular()
+    db = abrir(tmp_path, snapshot_binario.serializar(original._estado()))
+
+    for user_id in (1, 2, 3):
+        assert db.obter_estatisticas_pix(user_id) == original.obter_estatisticas_pix(user_id)
+        assert dict(db.usuarios[user_id]) == dict(original.usuarios[user_id])
+    assert db.obter_carteira(1) == {'PETR4': {'quantidade': 10, 'preco_medio': 12.5}}
+    assert [t['valor'] for t in db.obter_extrato(2)] == [50.0]
+    assert db.obter_relatorio_pix_servidor(7)['total_transacoes'] == 2
+
+
+def test_estatisticas_pix_sao_lidas_sob_demanda(tmp_path):
+    db = abrir(tmp_path, snapshot_binario.serializar(popular()._estado()))
+    estatisticas = db._estatisticas_pix
+
+    assert isinstance(estatisticas, snapshot_binario.MapaPreguicoso)
+    assert len(estatisticas) == 3 and not estatisticas._vivos
+    assert db.obter_estatisticas_pix(2)['valor_total_recebido'] == 99.0
+
+    # Novo PIX altera o objeto materializado e o próximo snapshot leva a mudança
+    db.registrar_transacao_pix(3, 'Caio', 2, 'Bia', 5.0, 0.0, 5.0, '', 7, 'Servidor', 8, 11)
+    db = abrir(tmp_path, snapshot_binario.serializar(db._estado()))
+    assert db.obter_estatisticas_pix(2)['total_recebidos'] == 2
+    assert db.obter_estatisticas_pix(3)['total_enviados'] == 1
+
+
+def test_snapshot_da_versao_2_continua_abrindo(tmp_path):
+    original = popular()
+    dados = para_versao_2(snapshot_binario.serializar(original._estado()), original._estatisticas_pix)
+    db = abrir(tmp_path, dados)
+
+    assert db.obter_estatisticas_pix(1) == original.obter_estatisticas_pix(1)
+    assert db.obter_saldo(2) == 1050.0
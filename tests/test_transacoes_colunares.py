@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import transacoes_colunares
+from transacoes_colunares import TransacoesColunares
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def caminho(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(transacoes_colunares, 'np', None)
+    elif transacoes_colunares.np is None:
+        pytest.skip('NumPy não instalado')
+    return request.param
+
+
+def popular():
+    inicio = datetime(2024, 3, 1, 12)
+    transacoes = TransacoesColunares()
+    linhas = [
+        (1, 'daily', 100.0, 'Recompensa', 1100.0),
+        (2, 'aposta', -25.5, 'Slots', 974.5),
+        (1, 'aposta', -10.1, 'Slots', 1089.9),
+        (2, 'premio', 0.3, 'Slots', 974.8),
+        (1, 'daily', 100.0, 'Recompensa', None),
+    ]
+    for i, (user_id, tipo, valor, descricao, saldo) in enumerate(linhas):
+        transacoes.anexar(user_id, tipo, valor, descricao, inicio + timedelta(hours=i), saldo)
+    return transacoes, inicio
+
+
+def test_linha_volta_no_formato_dos_cogs():
+    transacoes, inicio = popular()
+    assert transacoes[1] == {'user_id': 2, 'tipo': 'aposta', 'valor': -25.5, 'descricao': 'Slots',
+                             'data': inicio + timedelta(hours=1), 'saldo_posterior': 974.5}
+    assert transacoes[4]['saldo_posterior'] is None
+    assert len(transacoes.textos) == 2  # Descrições repetidas guardadas uma vez
+
+
+def test_agregacoes_por_tipo_e_usuario(caminho):
+    transacoes, inicio = popular()
+
+    assert transacoes.somar_por_tipo() == {'daily': 200.0, 'aposta': -35.6, 'premio': 0.3}
+    assert transacoes.somar_por_tipo(user_id=2) == {'aposta': -25.5, 'premio': 0.3}
+    assert transacoes.somar_por_tipo(inicio + timedelta(hours=1), inicio + timedelta(hours=3)) == {
+        'aposta': -35.6
+    }
+    assert transacoes.somar_por_usuario(tipo='aposta') == {1: -10.1, 2: -25.5}
+    assert transacoes.somar_por_usuario(tipo='inexistente') == {}
+    assert transacoes.somar_por_tipo(inicio + timedelta(days=1)) == {}
+
+
+def test_descartar_inicio_mantem_posicoes_do_log():
+    transacoes, inicio = popular()
+    transacoes.descartar_inicio(transacoes.contar_anteriores(inicio + timedelta(hours=2)))
+
+    assert transacoes.base == 2 and len(transacoes) == 3
+    assert [t['valor'] for t in transacoes] == [-10.1, 0.3, 100.0]
+    assert transacoes[3]['tipo'] == 'premio'
+    posicao = transacoes.anexar(2, 'daily', 1.0, 'Nova', inicio + timedelta(hours=9))
+    assert posicao == 5 and transacoes[5]['descricao'] == 'Nova'
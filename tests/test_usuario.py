@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from database import Database, Usuario
+
+
+def test_usuario_se_comporta_como_o_dict_antigo():
+    criado = datetime(2024, 5, 1, 12, 30)
+    antigo = {'user_id': 1, 'nome': 'Ana', 'saldo': 50.0, 'xp': 7, 'experiencia': 7,
+              'nivel': 2, 'streak_daily': 3, 'data_criacao': criado.isoformat(), 'apelido': 'aninha'}
+    usuario = Usuario.de_dict(antigo)
+
+    assert usuario['experiencia'] == usuario['xp'] == 7
+    assert usuario['data_criacao'] == criado
+    assert usuario['apelido'] == 'aninha'
+    assert usuario.get('ultima_recompensa_daily') is None
+
+    usuario['experiencia'] = 9
+    usuario['ultima_recompensa_daily'] = '2024-05-02T00:00:00'
+    assert usuario.xp == 9
+    assert dict(usuario) == dict(antigo, xp=9, experiencia=9, data_criacao=criado,
+                                 ultima_recompensa_daily='2024-05-02T00:00:00')
+
+
+def test_consultar_nao_cria_usuario():
+    db = Database()
+    assert db.consultar_usuario(5)['saldo'] == 1000.00
+    assert 5 not in db.usuarios
+    db.obter_usuario(5)
+    assert isinstance(db.usuarios[5], Usuario)
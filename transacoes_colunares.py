@@ -0,0 +1,180 @@
+# ============================================================================
+# TRANSAÇÕES COLUNARES - LOG DE TRANSAÇÕES EM ARRAYS TIPADOS
+# ============================================================================
+#
+# Em vez de um dict por transação, cada campo vira uma coluna:
+#   user_id    array('q')   id do Discord
+#   timestamp  array('q')   microssegundos desde 1970-01-01 (datetime ingênuo)
+#   centavos   array('q')   valor em centavos (somas exatas)
+#   tipo       array('H')   código pequeno do tipo ('daily', 'pix_enviado'...)
+#   descricao  array('i')   índice numa tabela de textos sem repetição
+#   saldo      array('q')   saldo do usuário logo depois da transação, em centavos
+#                           (SALDO_DESCONHECIDO para registros antigos)
+#
+# As agregações usam NumPy direto sobre os buffers dos arrays (sem cópia)
+# quando disponível, e um laço em Python puro caso contrário.
+
+import bisect
+from array import array
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele as agregações são em Python puro
+    np = None
+
+EPOCA = datetime(1970, 1, 1)
+MICROSSEGUNDO = timedelta(microseconds=1)
+SALDO_DESCONHECIDO = -(1 << 63)
+
+
+def para_timestamp(data):
+    return (data - EPOCA) // MICROSSEGUNDO
+
+
+def para_datetime(timestamp):
+    return EPOCA + timedelta(microseconds=timestamp)
+
+
+class TransacoesColunares:
+    """Log append-only de transações armazenado por colunas"""
+
+    base = 0  # Posição (no log completo) da primeira linha ainda em memória
+
+    def __init__(self):
+        self.user_ids = array('q')
+        self.timestamps = array('q')
+        self.centavos = array('q')
+        self.tipos = array('H')
+        self.descricoes = array('i')
+        self.saldos = array('q')
+
+        # Tabelas de internamento: texto <-> código
+        self.nomes_tipo = []
+        self._codigos_tipo = {}
+        self.textos = []
+        self._codigos_texto = {}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        if 'saldos' not in estado:  # Snapshot anterior à coluna de saldos
+            self.saldos = array('q', [SALDO_DESCONHECIDO]) * len(self.user_ids)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __getitem__(self, posicao):
+        """Materializar a transação (posição no log completo) no formato dict usado pelos cogs"""
+        posicao -= self.base
+        return {
+            'user_id': self.user_ids[posicao],
+            'tipo': self.nomes_tipo[self.tipos[posicao]],
+            'valor': self.centavos[posicao] / 100,
+            'descricao': self.textos[self.descricoes[posicao]],
+            'data': para_datetime(self.timestamps[posicao]),
+            'saldo_posterior': self.saldo(posicao + self.base)
+        }
+
+    def __iter__(self):
+        for posicao in range(self.base, self.base + len(self)):
+            yield self[posicao]
+
+    def saldo(self, posicao):
+        """Saldo posterior da transação (posição no log completo) ou None"""
+        centavos = self.saldos[posicao - self.base]
+        return None if centavos == SALDO_DESCONHECIDO else centavos / 100
+
+    # ===== ESCRITA =====
+    @staticmethod
+    def _internar(texto, lista, codigos):
+        codigo = codigos.get(texto)
+        if codigo is None:
+            codigo = codigos[texto] = len(lista)
+            lista.append(texto)
+        return codigo
+
+    def anexar(self, user_id, tipo, valor, descricao, data, saldo_posterior=None):
+        """Adicionar uma transação e retornar sua posição no log"""
+        posicao = self.base + len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.timestamps.append(para_timestamp(data))
+        self.centavos.append(round(valor * 100))
+        self.tipos.append(self._internar(tipo, self.nomes_tipo, self._codigos_tipo))
+        if self._codigos_texto is None:
+            self._codigos_texto = {texto: codigo for codigo, texto in enumerate(self.textos)}
+        self.descricoes.append(self._internar(descricao, self.textos, self._codigos_texto))
+        self.saldos.append(SALDO_DESCONHECIDO if saldo_posterior is None else round(saldo_posterior * 100))
+        return posicao
+
+    def contar_anteriores(self, data):
+        """Quantas linhas em memória têm data anterior a `data`"""
+        return bisect.bisect_left(self.timestamps, para_timestamp(data))
+
+    def descartar_inicio(self, quantidade):
+        """Tirar da memória as `quantidade` linhas mais antigas (já arquivadas)"""
+        if quantidade <= 0:
+            return
+        for coluna in (self.user_ids, self.timestamps, self.centavos, self.tipos, self.descricoes, self.saldos):
+            del coluna[:quantidade]
+        self.base += quantidade
+
+        # Recriar a tabela de descrições só com os textos ainda referenciados
+        textos, codigos = [], {}
+        novas = array('i', (
+            self._internar(self.textos[codigo], textos, codigos) for codigo in self.descricoes
+        ))
+        self.descricoes, self.textos, self._codigos_texto = novas, textos, codigos
+
+    # ===== AGREGAÇÕES =====
+    def _intervalo(self, inicio, fim):
+        """Posições locais [a, b) com data em [inicio, fim) — o log está em ordem cronológica"""
+        a = 0 if inicio is None else bisect.bisect_left(self.timestamps, para_timestamp(inicio))
+        b = len(self) if fim is None else bisect.bisect_left(self.timestamps, para_timestamp(fim))
+        return a, b
+
+    def somar_por_tipo(self, inicio=None, fim=None, user_id=None):
+        """{tipo: soma dos valores} no período, opcionalmente de um só usuário"""
+        a, b = self._intervalo(inicio, fim)
+        if a >= b:
+            return {}
+
+        if np is not None:
+            codigos = np.frombuffer(self.tipos, dtype=np.uint16)[a:b]
+            centavos = np.frombuffer(self.centavos, dtype=np.int64)[a:b]
+            if user_id is not None:
+                filtro = np.frombuffer(self.user_ids, dtype=np.int64)[a:b] == user_id
+                codigos, centavos = codigos[filtro], centavos[filtro]
+            somas = np.bincount(codigos, weights=centavos, minlength=len(self.nomes_tipo))
+            presentes = np.bincount(codigos, minlength=len(self.nomes_tipo)) > 0
+            return {self.nomes_tipo[c]: float(somas[c]) / 100 for c in np.flatnonzero(presentes)}
+
+        somas = {}
+        for posicao in range(a, b):
+            if user_id is None or self.user_ids[posicao] == user_id:
+                codigo = self.tipos[posicao]
+                somas[codigo] = somas.get(codigo, 0) + self.centavos[posicao]
+        return {self.nomes_tipo[c]: total / 100 for c, total in somas.items()}
+
+    def somar_por_usuario(self, inicio=None, fim=None, tipo=None):
+        """{user_id: soma dos valores} no período, opcionalmente de um só tipo"""
+        a, b = self._intervalo(inicio, fim)
+        codigo_tipo = self._codigos_tipo.get(tipo) if tipo is not None else None
+        if a >= b or (tipo is not None and codigo_tipo is None):
+            return {}
+
+        if np is not None:
+            user_ids = np.frombuffer(self.user_ids, dtype=np.int64)[a:b]
+            centavos = np.frombuffer(self.centavos, dtype=np.int64)[a:b]
+            if codigo_tipo is not None:
+                filtro = np.frombuffer(self.tipos, dtype=np.uint16)[a:b] == codigo_tipo
+                user_ids, centavos = user_ids[filtro], centavos[filtro]
+            unicos, inverso = np.unique(user_ids, return_inverse=True)
+            somas = np.bincount(inverso, weights=centavos, minlength=len(unicos))
+            return {int(uid): float(total) / 100 for uid, total in zip(unicos, somas)}
+
+        somas = {}
+        for posicao in range(a, b):
+            if codigo_tipo is None or self.tipos[posicao] == codigo_tipo:
+                uid = self.user_ids[posicao]
+                somas[uid] = somas.get(uid, 0) + self.centavos[posicao]
+        return {uid: total / 100 for uid, total in somas.items()}